@@ -0,0 +1,129 @@
+#
+#  Copyright (C) 2024 RapidSilicon
+#  Authorized use only
+#
+import copy
+from enum import Enum
+from typing import Any, Callable, Dict, List, Type
+from flask import request
+from marshmallow import Schema, fields, validates_schema, ValidationError
+from submodule.rs_device_manager import RsDeviceManager
+from submodule.rs_device_resources import ModuleType
+from .device import is_compute_deferred
+from .errors import errors
+
+class BatchOperationType(Enum):
+    ADD = 'add'
+    UPDATE = 'update'
+    DELETE = 'delete'
+
+class BatchOperationSchema(Schema):
+    op = fields.Enum(BatchOperationType, by_value=True, required=True)
+    rownum = fields.Int()
+
+    # validate every item even if another item of the batch has field errors
+    @validates_schema(skip_on_field_errors=False)
+    def validate_operation(self, data, **kwargs):
+        if data.get('op') in (BatchOperationType.UPDATE, BatchOperationType.DELETE) and 'rownum' not in data:
+            raise ValidationError('Missing data for required field.', 'rownum')
+        if data.get('op') in (BatchOperationType.ADD, BatchOperationType.UPDATE) and 'data' not in data:
+            raise ValidationError('Missing data for required field.', 'data')
+
+class BatchItemErrorSchema(Schema):
+    index = fields.Int(allow_none=True)
+    message = fields.Raw()
+
+def get_schema_errors(messages: Dict) -> List[Dict[str, Any]]:
+    # many=True validation errors are keyed by item index
+    if isinstance(messages, dict):
+        return [{ 'index': key if isinstance(key, int) else None, 'message': value } for key, value in messages.items()]
+    return [{ 'index': None, 'message': messages }]
+
+def get_attributes(target, props: Dict[str, Any]) -> Dict[str, Any]:
+    # current values of the attributes about to be updated with props (see update_attributes)
+    values = {}
+    for key, value in props.items():
+        if hasattr(target, key):
+            if type(value) is dict:
+                values[key] = get_attributes(getattr(target, key), value)
+            else:
+                values[key] = copy.copy(getattr(target, key))
+    return values
+
+def get_rownum_errors(count: int, operations: List[Dict[str, Any]], message: str) -> List[Dict[str, Any]]:
+    # validate the row numbers of all operations against the number of rows after the previous operations
+    item_errors = []
+    for index, operation in enumerate(operations):
+        if operation['op'] == BatchOperationType.ADD:
+            count += 1
+        elif 0 <= operation['rownum'] < count:
+            count -= operation['op'] == BatchOperationType.DELETE
+        else:
+            item_errors.append({ 'index': index, 'message': message })
+    return item_errors
+
+def rollback(module, undo: List[Callable[[], Any]]) -> None:
+    # revert the applied operations in reverse order through the module, only the touched rows are restored
+    for operation in reversed(undo):
+        operation()
+
+def apply_operation(module, operation: Dict[str, Any], undo: List[Callable[[], Any]]) -> Any:
+    if operation['op'] == BatchOperationType.ADD:
+        item = module.add(operation['data'])
+        rownum = len(module.itemlist) - 1
+        undo.append(lambda: module.remove(rownum))
+        return item
+    rownum = operation['rownum']
+    if operation['op'] == BatchOperationType.UPDATE:
+        values = get_attributes(module.get(rownum), operation['data'])
+        item = module.update(rownum, operation['data'])
+        undo.append(lambda: module.update(rownum, values))
+        return item
+    removed = module.remove(rownum)
+    undo.append(lambda: module.insert(rownum, removed))
+    return None
+
+def apply_batch(device_id: str, modtype: ModuleType, schema: BatchOperationSchema, item_schema: Schema, \
+        not_found: Type[Exception], exceptions: Dict[Type[Exception], str]):
+    device = RsDeviceManager.get_instance().get_device(device_id)
+
+    # validate all operations in a single schema pass
+    try:
+        operations = schema.load(request.json, many=True)
+    except ValidationError as e:
+        return {
+            'message': errors['SchemaValidationError']['message'],
+            'errors': BatchItemErrorSchema(many=True).dump(get_schema_errors(e.messages))
+        }, errors['SchemaValidationError']['status']
+
+    # validate all row numbers before modifying any row
+    module = device.get_module(modtype)
+    item_errors = get_rownum_errors(len(module.itemlist), operations, errors[exceptions[not_found]]['message'])
+
+    # apply all operations in order, rownum refers to the rows after the previous operations
+    items, undo = [], []
+    if not item_errors:
+        try:
+            for index, operation in enumerate(operations):
+                try:
+                    items.append(apply_operation(module, operation, undo))
+                except tuple(exceptions) as e:
+                    items.append(None)
+                    item_errors.append({ 'index': index, 'message': errors[exceptions[type(e)]]['message'] })
+        except Exception as e:
+            rollback(module, undo)
+            raise e
+
+    # nothing is applied if any operation failed
+    if item_errors:
+        rollback(module, undo)
+        return {
+            'message': 'Batch operation failed, no change applied',
+            'errors': BatchItemErrorSchema(many=True).dump(item_errors)
+        }, 400
+
+    # compute once for the whole batch
+    device.request_compute(is_compute_deferred())
+    from submodule.rs_project import RsProjectManager
+    RsProjectManager.get_instance().set_modified(True)
+    return [None if item is None else item_schema.dump(item) for item in items], 200
@@ -2,13 +2,15 @@
 #  Copyright (C) 2024 RapidSilicon
 #  Authorized use only
 #
+from typing import Any, Dict
 from flask import Blueprint, request
 from flask_restful import Api, Resource
 from marshmallow import Schema, fields, ValidationError
 from submodule.bram import BRAM_Type
 from submodule.rs_device_manager import RsDeviceManager
 from submodule.rs_device_resources import ModuleType, DeviceNotFoundException, BramNotFoundException
-from .device import MessageSchema
+from .batch import BatchOperationSchema, apply_batch
+from .device import MessageSchema, is_compute_deferred, get_consumption_version, get_list_version, make_cached_response
 from .errors import DeviceNotExistsError, InternalServerError, BramNotExistsError, \
     SchemaValidationError
 from .errors import errors
@@ -17,6 +19,7 @@ from .errors import errors
 # endpoints                               | methods                 | classes               #
 #-------------------------------------------------------------------------------------------# 
 # devices/<device_id>/bram                | get, post               | BramsApi              #
+# devices/<device_id>/bram/batch          | post                    | BramsBatchApi         #
 # devices/<device_id>/bram/<rownum>       | get, patch, delete      | BramApi               #
 # devices/<device_id>/bram/consumption    | get                     | BramConsumptionApi    #
 #-------------------------------------------------------------------------------------------#
@@ -29,6 +32,7 @@ class BramResourcesConsumptionSchema(Schema):
     total_bram_block_power = fields.Number()
     total_bram_interconnect_power = fields.Number()
     messages = fields.Nested(MessageSchema, many=True)
+    stale = fields.Bool()
 
 class BramPortPropertiesOutputSchema(Schema):
     clock_frequency = fields.Int()
@@ -72,6 +76,11 @@ class BramsApi(Resource):
               in: path 
               type: string
               required: true
+            - name: If-None-Match
+              in: header
+              type: string
+              description: ETag of the version already held by the client
+              required: false
         definitions:
             BRAMPortProperties:
                 type: object
@@ -147,6 +156,7 @@ class BramsApi(Resource):
                         total_bram_interconnect_power:
                             type: number
                     - $ref: '#/definitions/ItemMessage'
+                    - $ref: '#/definitions/Stale'
         responses:
             200:
                 description: Successfully returned a list of block rams
@@ -156,6 +166,8 @@ class BramsApi(Resource):
                         allOf:
                             - $ref: '#/definitions/BRAM'
                             - $ref: '#/definitions/BRAMOutput'
+            304:
+                description: Not modified since the version identified by If-None-Match
             400:
                 description: Invalid request
                 schema:
@@ -167,7 +179,7 @@ class BramsApi(Resource):
             bram_module = device.get_module(ModuleType.BRAM)
             brams = bram_module.get_all()
             schema = BramSchema(many=True)
-            return schema.dump(brams)
+            return make_cached_response(get_list_version(device), lambda: schema.dump(brams))
         except DeviceNotFoundException as e:
             raise DeviceNotExistsError
         except Exception as e:
@@ -212,7 +224,7 @@ class BramsApi(Resource):
             bram_module = device.get_module(ModuleType.BRAM)
             schema = BramSchema()
             bram = bram_module.add(schema.load(request.json))
-            device.compute_output_power()
+            device.request_compute(is_compute_deferred())
             from submodule.rs_project import RsProjectManager
             RsProjectManager.get_instance().set_modified(True)
             return schema.dump(bram), 201
@@ -309,7 +321,7 @@ class BramApi(Resource):
             bram_module = device.get_module(ModuleType.BRAM)
             schema = BramSchema()
             bram = bram_module.update(rownum, schema.load(request.json))
-            device.compute_output_power()
+            device.request_compute(is_compute_deferred())
             from submodule.rs_project import RsProjectManager
             RsProjectManager.get_instance().set_modified(True)
             return schema.dump(bram), 200
@@ -352,7 +364,7 @@ class BramApi(Resource):
             bram_module = device.get_module(ModuleType.BRAM)
             schema = BramSchema()
             bram_module.remove(rownum)
-            device.compute_output_power()
+            device.request_compute(is_compute_deferred())
             from submodule.rs_project import RsProjectManager
             RsProjectManager.get_instance().set_modified(True)
             return '', 204
@@ -363,7 +375,25 @@ class BramApi(Resource):
         except Exception as e:
             raise InternalServerError
 
+def get_bram_consumption(bram_module) -> Dict[str, Any]:
+    # power consumption and resource utilization of the bram module as computed (snapshot)
+    consumption = bram_module.get_power_consumption()
+    messages = bram_module.get_all_messages()
+    res = bram_module.get_resources()
+    return {
+        'total_18k_bram_available': res[1],
+        'total_18k_bram_used': res[0],
+        'total_36k_bram_available': res[3],
+        'total_36k_bram_used': res[2],
+        'total_bram_block_power': consumption[0],
+        'total_bram_interconnect_power': consumption[1],
+        'messages': messages
+    }
+
 class BramConsumptionApi(Resource):
+    # reads the published snapshot thus does not lock the device
+    lock_free = True
+
     def get(self, device_id : str):
         """
         This is an endpoint that returns overall block ram power consumption and resource utilization of a device
@@ -376,11 +406,18 @@ class BramConsumptionApi(Resource):
               in: path 
               type: string
               required: true
+            - name: If-None-Match
+              in: header
+              type: string
+              description: ETag of the version already held by the client
+              required: false
         responses:
             200:
                 description: Successfully returned block ram power consumption and resource utilization
                 schema:
                     $ref: '#/definitions/BRAMConsumptionAndResourceUsage'
+            304:
+                description: Not modified since the version identified by If-None-Match
             400:
                 description: Invalid request 
                 schema:
@@ -389,21 +426,68 @@ class BramConsumptionApi(Resource):
         try:
             device_mgr = RsDeviceManager.get_instance()
             device = device_mgr.get_device(device_id)
-            bram_module = device.get_module(ModuleType.BRAM)
-            consumption = bram_module.get_power_consumption()
-            messages = bram_module.get_all_messages()
-            res = bram_module.get_resources()
-            data = {
-                'total_18k_bram_available': res[1],
-                'total_18k_bram_used': res[0],
-                'total_36k_bram_available': res[3],
-                'total_36k_bram_used': res[2],
-                'total_bram_block_power': consumption[0],
-                'total_bram_interconnect_power': consumption[1],
-                'messages': messages
-            }
+            snapshot, stale = device.get_snapshot(), device.is_stale()
+            data = { **get_bram_consumption(snapshot.get_module(ModuleType.BRAM)), 'stale': stale }
             schema = BramResourcesConsumptionSchema()
-            return schema.dump(data)
+            return make_cached_response(get_consumption_version(device, snapshot, stale), lambda: schema.dump(data))
+        except DeviceNotFoundException as e:
+            raise DeviceNotExistsError
+        except Exception as e:
+            raise InternalServerError
+
+class BramBatchOperationSchema(BatchOperationSchema):
+    data = fields.Nested(BramSchema)
+
+class BramsBatchApi(Resource):
+    def post(self, device_id : str):
+        """
+        This is an endpoint that creates, updates and deletes block rams of a device in a single batch
+        ---
+        tags:
+            - Block RAM
+        description: Apply a list of block ram operations of a device in order and compute the power once. Nothing is applied if any operation fails.
+        parameters:
+            - name: device_id
+              in: path
+              type: string
+              required: true
+            - name: operations
+              in: body
+              description: List of block ram operations. rownum refers to the rows after the previous operations
+              schema:
+                type: array
+                items:
+                    type: object
+                    properties:
+                        op:
+                            type: string
+                            enum: [add, update, delete]
+                        rownum:
+                            type: integer
+                        data:
+                            $ref: '#/definitions/BRAM'
+        responses:
+            200:
+                description: Successfully applied all operations. Returns the block ram of each add and update operation, null for delete
+                schema:
+                    type: array
+                    items:
+                        allOf:
+                            - $ref: '#/definitions/BRAM'
+                            - $ref: '#/definitions/BRAMOutput'
+            400:
+                description: One or more operations failed, no change applied
+                schema:
+                    $ref: '#/definitions/BatchError'
+            403:
+                description: Schema validation error
+                schema:
+                    $ref: '#/definitions/BatchError'
+        """
+        try:
+            return apply_batch(device_id, ModuleType.BRAM, BramBatchOperationSchema(), BramSchema(), BramNotFoundException, {
+                BramNotFoundException: 'BramNotExistsError'
+            })
         except DeviceNotFoundException as e:
             raise DeviceNotExistsError
         except Exception as e:
@@ -412,5 +496,6 @@ class BramConsumptionApi(Resource):
 bram_api = Blueprint('bram_api', __name__)
 api = Api(bram_api, errors=errors)
 api.add_resource(BramsApi, '/devices/<string:device_id>/bram')
+api.add_resource(BramsBatchApi, '/devices/<string:device_id>/bram/batch')
 api.add_resource(BramApi, '/devices/<string:device_id>/bram/<int:rownum>')
 api.add_resource(BramConsumptionApi, '/devices/<string:device_id>/bram/consumption')
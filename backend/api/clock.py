@@ -2,6 +2,7 @@
 #  Copyright (C) 2024 RapidSilicon
 #  Authorized use only
 #
+from typing import Any, Dict
 from flask import Blueprint, request
 from flask_restful import Api, Resource
 from marshmallow import Schema, fields, ValidationError
@@ -9,7 +10,8 @@ from submodule.clock import Clock_State, Source
 from submodule.rs_device_manager import RsDeviceManager
 from submodule.rs_device_resources import ModuleType, DeviceNotFoundException, ClockNotFoundException, \
     ClockDescriptionPortValidationException, ClockMaxCountReachedException
-from .device import MessageSchema
+from .batch import BatchOperationSchema, apply_batch
+from .device import MessageSchema, is_compute_deferred, get_consumption_version, get_list_version, make_cached_response
 from .errors import ClockMaxCountReachedError, DeviceNotExistsError, InternalServerError, ClockNotExistsError, \
     ClockDescriptionPortValidationError, \
     SchemaValidationError
@@ -19,6 +21,7 @@ from .errors import errors
 # endpoints                               | methods                 | classes               #
 #-------------------------------------------------------------------------------------------# 
 # devices/<device_id>/clock               | get, post               | ClocksApi             #
+# devices/<device_id>/clock/batch         | post                    | ClocksBatchApi        #
 # devices/<device_id>/clock/<rownum>      | get, patch, delete      | ClockApi              #
 # devices/<device_id>/clock/consumption   | get                     | ClockConsumptionApi   #
 #-------------------------------------------------------------------------------------------#
@@ -32,6 +35,7 @@ class ClockResourcesConsumptionSchema(Schema):
     total_clock_interconnect_power = fields.Number()
     total_pll_power = fields.Number()
     messages = fields.Nested(MessageSchema, many=True)
+    stale = fields.Bool()
 
 class ClockOutputSchema(Schema):
     fan_out = fields.Int()
@@ -62,6 +66,11 @@ class ClocksApi(Resource):
               in: path 
               type: string
               required: true
+            - name: If-None-Match
+              in: header
+              type: string
+              description: ETag of the version already held by the client
+              required: false
         definitions:
             Clock:
                 type: object
@@ -115,6 +124,7 @@ class ClocksApi(Resource):
                         total_pll_power:
                             type: number
                     - $ref: '#/definitions/ItemMessage'
+                    - $ref: '#/definitions/Stale'
         responses:
             200:
                 description: A list of clocks
@@ -124,6 +134,8 @@ class ClocksApi(Resource):
                         allOf:
                             - $ref: '#/definitions/Clock'
                             - $ref: '#/definitions/ClockOutput'
+            304:
+                description: Not modified since the version identified by If-None-Match
             400:
                 description: Invalid request
                 schema:
@@ -135,7 +147,7 @@ class ClocksApi(Resource):
             clock_module = device.get_module(ModuleType.CLOCKING)
             clocks = clock_module.get_all()
             schema = ClockSchema(many=True)
-            return schema.dump(clocks)
+            return make_cached_response(get_list_version(device), lambda: schema.dump(clocks))
         except DeviceNotFoundException as e:
             raise DeviceNotExistsError
         except Exception as e:
@@ -180,7 +192,7 @@ class ClocksApi(Resource):
             clock_module = device.get_module(ModuleType.CLOCKING)
             schema = ClockSchema()
             clock = clock_module.add(schema.load(request.json))
-            device.compute_output_power()
+            device.request_compute(is_compute_deferred())
             from submodule.rs_project import RsProjectManager
             RsProjectManager.get_instance().set_modified(True)
             return schema.dump(clock), 201
@@ -281,7 +293,7 @@ class ClockApi(Resource):
             clock_module = device.get_module(ModuleType.CLOCKING)
             schema = ClockSchema()
             clock = clock_module.update(rownum, schema.load(request.json))
-            device.compute_output_power()
+            device.request_compute(is_compute_deferred())
             from submodule.rs_project import RsProjectManager
             RsProjectManager.get_instance().set_modified(True)
             return schema.dump(clock), 200
@@ -324,7 +336,7 @@ class ClockApi(Resource):
             clock_module = device.get_module(ModuleType.CLOCKING)
             schema = ClockSchema()
             clock_module.remove(rownum)
-            device.compute_output_power()
+            device.request_compute(is_compute_deferred())
             from submodule.rs_project import RsProjectManager
             RsProjectManager.get_instance().set_modified(True)
             return '', 204
@@ -335,7 +347,26 @@ class ClockApi(Resource):
         except Exception as e:
             raise InternalServerError
 
+def get_clock_consumption(clock_module) -> Dict[str, Any]:
+    # power consumption and resource utilization of the clocking module as computed (snapshot)
+    consumption = clock_module.get_power_consumption()
+    messages = clock_module.get_all_messages()
+    res = clock_module.get_resources()
+    return {
+        'total_clocks_available': res[0],
+        'total_clocks_used': res[2],
+        'total_plls_available': res[1],
+        'total_plls_used': res[3],
+        'total_clock_block_power': consumption[0],
+        'total_clock_interconnect_power': consumption[1],
+        'total_pll_power': consumption[2],
+        'messages': messages
+    }
+
 class ClockConsumptionApi(Resource):
+    # reads the published snapshot thus does not lock the device
+    lock_free = True
+
     def get(self, device_id : str):
         """
         This is an endpoint that returns overall clock power consumption and resource utilization of a device
@@ -348,11 +379,18 @@ class ClockConsumptionApi(Resource):
               in: path 
               type: string
               required: true
+            - name: If-None-Match
+              in: header
+              type: string
+              description: ETag of the version already held by the client
+              required: false
         responses:
             200:
                 description: Successfully returned clock power consumption and resource utilization
                 schema:
                     $ref: '#/definitions/ClockConsumptionAndResourceUsage'
+            304:
+                description: Not modified since the version identified by If-None-Match
             400:
                 description: Invalid request 
                 schema:
@@ -361,22 +399,70 @@ class ClockConsumptionApi(Resource):
         try:
             device_mgr = RsDeviceManager.get_instance()
             device = device_mgr.get_device(device_id)
-            clock_module = device.get_module(ModuleType.CLOCKING)
-            consumption = clock_module.get_power_consumption()
-            messages = clock_module.get_all_messages()
-            res = clock_module.get_resources()
-            data = {
-                'total_clocks_available': res[0],
-                'total_clocks_used': res[2],
-                'total_plls_available': res[1],
-                'total_plls_used': res[3],
-                'total_clock_block_power': consumption[0],
-                'total_clock_interconnect_power': consumption[1],
-                'total_pll_power': consumption[2],
-                'messages': messages
-            }
+            snapshot, stale = device.get_snapshot(), device.is_stale()
+            data = { **get_clock_consumption(snapshot.get_module(ModuleType.CLOCKING)), 'stale': stale }
             schema = ClockResourcesConsumptionSchema()
-            return schema.dump(data)
+            return make_cached_response(get_consumption_version(device, snapshot, stale), lambda: schema.dump(data))
+        except DeviceNotFoundException as e:
+            raise DeviceNotExistsError
+        except Exception as e:
+            raise InternalServerError
+
+class ClockBatchOperationSchema(BatchOperationSchema):
+    data = fields.Nested(ClockSchema)
+
+class ClocksBatchApi(Resource):
+    def post(self, device_id : str):
+        """
+        This is an endpoint that creates, updates and deletes clocks of a device in a single batch
+        ---
+        tags:
+            - Clock
+        description: Apply a list of clock operations of a device in order and compute the power once. Nothing is applied if any operation fails.
+        parameters:
+            - name: device_id
+              in: path
+              type: string
+              required: true
+            - name: operations
+              in: body
+              description: List of clock operations. rownum refers to the rows after the previous operations
+              schema:
+                type: array
+                items:
+                    type: object
+                    properties:
+                        op:
+                            type: string
+                            enum: [add, update, delete]
+                        rownum:
+                            type: integer
+                        data:
+                            $ref: '#/definitions/Clock'
+        responses:
+            200:
+                description: Successfully applied all operations. Returns the clock of each add and update operation, null for delete
+                schema:
+                    type: array
+                    items:
+                        allOf:
+                            - $ref: '#/definitions/Clock'
+                            - $ref: '#/definitions/ClockOutput'
+            400:
+                description: One or more operations failed, no change applied
+                schema:
+                    $ref: '#/definitions/BatchError'
+            403:
+                description: Schema validation error
+                schema:
+                    $ref: '#/definitions/BatchError'
+        """
+        try:
+            return apply_batch(device_id, ModuleType.CLOCKING, ClockBatchOperationSchema(), ClockSchema(), ClockNotFoundException, {
+                ClockDescriptionPortValidationException: 'ClockDescriptionPortValidationError',
+                ClockMaxCountReachedException: 'ClockMaxCountReachedError',
+                ClockNotFoundException: 'ClockNotExistsError'
+            })
         except DeviceNotFoundException as e:
             raise DeviceNotExistsError
         except Exception as e:
@@ -385,5 +471,6 @@ class ClockConsumptionApi(Resource):
 clock_api = Blueprint('clock_api', __name__)
 api = Api(clock_api, errors=errors)
 api.add_resource(ClocksApi, '/devices/<string:device_id>/clocking')
+api.add_resource(ClocksBatchApi, '/devices/<string:device_id>/clocking/batch')
 api.add_resource(ClockApi, '/devices/<string:device_id>/clocking/<int:rownum>')
 api.add_resource(ClockConsumptionApi, '/devices/<string:device_id>/clocking/consumption')
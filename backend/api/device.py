@@ -2,22 +2,62 @@
 #  Copyright (C) 2024 RapidSilicon
 #  Authorized use only
 #
-from flask import Blueprint, request
+import uuid
+from typing import Any, Callable, Dict, Tuple
+from flask import Blueprint, has_request_context, request
 from flask_restful import Api, Resource
-from marshmallow import Schema, fields, ValidationError
+from werkzeug.http import quote_etag
+from marshmallow import Schema, fields, validate, ValidationError
 from submodule.rs_device_manager import RsDeviceManager
 from submodule.rs_device_resources import DeviceNotFoundException
 from submodule.rs_message import RsMessageType
 from .errors import DeviceNotExistsError, InternalServerError, SchemaValidationError
 from .errors import errors
 
-#---------------------------------------------------------------------------#
-# endpoints                       | methods         | classes               #
-#---------------------------------------------------------------------------# 
-# devices                         | get             | DevicesApi            #
-# devices/<device_id>             | get, patch      | DeviceApi             #
-# devices/<device_id>/consumption | get             | DeviceConsumptionApi  #
-#---------------------------------------------------------------------------#
+#------------------------------------------------------------------------------------------#
+# endpoints                              | methods            | classes                    #
+#------------------------------------------------------------------------------------------# 
+# devices                                | get                | DevicesApi                 #
+# devices/<device_id>                    | get, patch         | DeviceApi                  #
+# devices/<device_id>/consumption        | get                | DeviceConsumptionApi       #
+# devices/<device_id>/transaction        | get, post, delete  | DeviceTransactionApi       #
+# devices/<device_id>/transaction/commit | post               | DeviceTransactionCommitApi #
+#--------------------------------------------------------------------------------------------#
+
+def is_compute_deferred() -> bool:
+    # ?compute=deferred queues the recompute until the next commit or immediate compute
+    return has_request_context() and request.args.get('compute') == 'deferred'
+
+def is_trace_requested() -> bool:
+    # ?trace=true recomputes the device and returns the trace messages of the computation
+    return has_request_context() and request.args.get('trace') == 'true'
+
+# etags are unique to this server process
+etag_prefix = uuid.uuid4().hex[:8]
+
+# last serialized payload of each resource path along with its etag
+payload_cache: Dict[str, Tuple[str, Any]] = {}
+
+def get_consumption_version(device, snapshot, stale : bool) -> str:
+    # consumption is made of the last computed results and whether inputs changed since then
+    return f'{device.get_instance_id()}-{snapshot.version}-{int(stale)}'
+
+def get_list_version(device) -> str:
+    # rows are made of the inputs, changed by every modification request, and the computed outputs
+    return f'{device.get_instance_id()}-{device.get_revision()}-{device.get_snapshot().version}'
+
+def make_cached_response(version : str, dump : Callable[[], Any]):
+    # not modified if the client already has this version, otherwise the payload serialized for
+    # this version is reused
+    etag = f'{etag_prefix}-{version}'
+    headers = { 'ETag': quote_etag(etag) }
+    if request.if_none_match.contains(etag):
+        return '', 304, headers
+    cached = payload_cache.get(request.path)
+    if cached is None or cached[0] != etag:
+        cached = (etag, dump())
+        payload_cache[request.path] = cached
+    return cached[1], 200, headers
 
 class MessageSchema(Schema):
     type = fields.Enum(RsMessageType, by_value=True)
@@ -30,6 +70,8 @@ class AmbientSchema(Schema):
 class ThermalSpecSchema(Schema):
     theta_ja = fields.Number()
     ambient = fields.Nested(AmbientSchema)
+    tolerance = fields.Number(validate=validate.Range(min=0, min_inclusive=False))
+    max_iterations = fields.Int(validate=validate.Range(min=1))
 
 class TypicalDynamicScalingSchema(Schema):
     fpga_complex = fields.Number()
@@ -52,6 +94,10 @@ class DeviceSchema(Schema):
     temperature_grade = fields.Str()
     specification = fields.Nested(SpecificationSchema)
 
+class DeviceSummarySchema(Schema):
+    id = fields.Str(attribute='name')
+    series = fields.Str()
+
 class DeviceTotalPowerTemperatureSchema(Schema):
     type = fields.Str()
     power = fields.Number()
@@ -81,6 +127,11 @@ class DeviceConsumptionSchema(Schema):
     total_power_temperature = fields.Nested(DeviceTotalPowerTemperatureSchema, many=True)
     processing_complex = fields.Nested(DeviceComplexSchema)
     fpga_complex = fields.Nested(DeviceComplexSchema)
+    stale = fields.Bool()
+
+class DeviceTransactionSchema(Schema):
+    transaction = fields.Bool()
+    stale = fields.Bool()
 
 class DevicesApi(Resource):
     def get(self):
@@ -110,6 +161,22 @@ class DevicesApi(Resource):
                         type: array
                         items:
                             $ref: '#/definitions/Message'
+            BatchItemError:
+                type: object
+                properties:
+                    index:
+                        type: integer
+                    message:
+                        type: string
+            BatchError:
+                type: object
+                properties:
+                    message:
+                        type: string
+                    errors:
+                        type: array
+                        items:
+                            $ref: '#/definitions/BatchItemError'
             DeviceSummary:
                 type: object
                 properties:
@@ -190,6 +257,24 @@ class DevicesApi(Resource):
                         $ref: '#/definitions/DeviceComplex'
                     fpga_complex:
                         $ref: '#/definitions/DeviceComplex'
+                    stale:
+                        type: boolean
+                    trace:
+                        type: array
+                        items:
+                            type: string
+            Stale:
+                type: object
+                properties:
+                    stale:
+                        type: boolean
+            DeviceTransaction:
+                type: object
+                properties:
+                    transaction:
+                        type: boolean
+                    stale:
+                        type: boolean
             Ambient:
                 type: object
                 properties:
@@ -211,6 +296,10 @@ class DevicesApi(Resource):
                         type: number
                     ambient:
                         $ref: '#/definitions/Ambient'
+                    tolerance:
+                        type: number
+                    max_iterations:
+                        type: integer
             Power:
                 type: object
                 properties:
@@ -238,8 +327,8 @@ class DevicesApi(Resource):
         """
         try:
             device_mgr = RsDeviceManager.get_instance()
-            schema = DeviceSchema(many=True, only=('id', 'series'))
-            return schema.dump(device_mgr.get_device_all())
+            schema = DeviceSummarySchema(many=True)
+            return schema.dump(device_mgr.get_device_list())
         except Exception as e:
             raise InternalServerError
 
@@ -312,7 +401,7 @@ class DeviceApi(Resource):
             device = device_mgr.get_device(device_id)
             schema = DeviceSchema()
             device.update_spec(schema.load(request.json)['specification'])
-            device.compute_output_power()
+            device.request_compute(is_compute_deferred())
             from submodule.rs_project import RsProjectManager
             RsProjectManager.get_instance().set_modified(True)
             return schema.dump(device), 200
@@ -324,23 +413,39 @@ class DeviceApi(Resource):
            raise InternalServerError
 
 class DeviceConsumptionApi(Resource):
+    # reads the published snapshot thus does not lock the device
+    lock_free = True
+
     def get(self, device_id : str):
         """
         This is an endpoint that returns the total power consumption of a device
         ---
         tags:
             - Device
-        description: Returns the total power consumption.
+        description: Returns the total power consumption. With trace=true, the device is recomputed and
+            the trace messages of the computation are returned along with the consumption.
         parameters:
             - name: device_id
               in: path 
               type: string
               required: true
+            - name: trace
+              in: query
+              type: string
+              description: Set to true to recompute the device and return the trace messages of the computation
+              required: false
+            - name: If-None-Match
+              in: header
+              type: string
+              description: ETag of the version already held by the client
+              required: false
         responses:
             200:
                 description: Successfully returned the total power consumption
                 schema:
                     $ref: '#/definitions/DeviceConsumption'
+            304:
+                description: Not modified since the version identified by If-None-Match
             400:
                 description: Invalid request
                 schema:
@@ -350,7 +455,145 @@ class DeviceConsumptionApi(Resource):
             device_mgr = RsDeviceManager.get_instance()
             device = device_mgr.get_device(device_id)
             schema = DeviceConsumptionSchema()
-            return schema.dump(device.get_power_consumption())
+            if is_trace_requested():
+                # recomputing requires the device lock which this endpoint does not take otherwise
+                with device_mgr.get_device_lock(device_id).write_locked():
+                    records = device.compute_output_power_trace()
+                    snapshot, stale = device.get_snapshot(), device.is_stale()
+                return { **schema.dump(snapshot.get_power_consumption()), 'stale': stale, 'trace': records }
+            snapshot, stale = device.get_snapshot(), device.is_stale()
+            return make_cached_response(get_consumption_version(device, snapshot, stale), \
+                lambda: { **schema.dump(snapshot.get_power_consumption()), 'stale': stale })
+        except DeviceNotFoundException as e:
+           raise DeviceNotExistsError
+        except Exception as e:
+           raise InternalServerError
+
+class DeviceTransactionApi(Resource):
+    def get(self, device_id : str):
+        """
+        This is an endpoint that returns the transaction state of a device
+        ---
+        tags:
+            - Device
+        description: Return whether a transaction is open and whether the power results are stale.
+        parameters:
+            - name: device_id
+              in: path
+              type: string
+              required: true
+        responses:
+            200:
+                description: Successfully returned the transaction state
+                schema:
+                    $ref: '#/definitions/DeviceTransaction'
+            400:
+                description: Invalid request
+                schema:
+                    $ref: '#/definitions/HTTPErrorMessage'
+        """
+        try:
+            device = RsDeviceManager.get_instance().get_device(device_id)
+            schema = DeviceTransactionSchema()
+            return schema.dump({ 'transaction': device.in_transaction(), 'stale': device.is_stale() })
+        except DeviceNotFoundException as e:
+           raise DeviceNotExistsError
+        except Exception as e:
+           raise InternalServerError
+
+    def post(self, device_id : str):
+        """
+        This is an endpoint that begins a transaction on a device
+        ---
+        tags:
+            - Device
+        description: Begin a transaction. Power computation is deferred until the transaction is committed.
+        parameters:
+            - name: device_id
+              in: path
+              type: string
+              required: true
+        responses:
+            200:
+                description: Successfully began a transaction
+                schema:
+                    $ref: '#/definitions/DeviceTransaction'
+            400:
+                description: Invalid request
+                schema:
+                    $ref: '#/definitions/HTTPErrorMessage'
+        """
+        try:
+            device = RsDeviceManager.get_instance().get_device(device_id)
+            device.begin_transaction()
+            schema = DeviceTransactionSchema()
+            return schema.dump({ 'transaction': device.in_transaction(), 'stale': device.is_stale() }), 200
+        except DeviceNotFoundException as e:
+           raise DeviceNotExistsError
+        except Exception as e:
+           raise InternalServerError
+
+    def delete(self, device_id : str):
+        """
+        This is an endpoint that aborts the transaction of a device
+        ---
+        tags:
+            - Device
+        description: Close the transaction, e.g. left open by a client, and recompute the power consumption.
+            The changes made within the transaction are kept.
+        parameters:
+            - name: device_id
+              in: path
+              type: string
+              required: true
+        responses:
+            200:
+                description: Successfully aborted the transaction
+                schema:
+                    $ref: '#/definitions/DeviceTransaction'
+            400:
+                description: Invalid request
+                schema:
+                    $ref: '#/definitions/HTTPErrorMessage'
+        """
+        try:
+            device = RsDeviceManager.get_instance().get_device(device_id)
+            device.abort_transaction()
+            schema = DeviceTransactionSchema()
+            return schema.dump({ 'transaction': device.in_transaction(), 'stale': device.is_stale() }), 200
+        except DeviceNotFoundException as e:
+           raise DeviceNotExistsError
+        except Exception as e:
+           raise InternalServerError
+
+class DeviceTransactionCommitApi(Resource):
+    def post(self, device_id : str):
+        """
+        This is an endpoint that commits the transaction of a device
+        ---
+        tags:
+            - Device
+        description: Close the transaction and recompute the power consumption once if any change was deferred.
+        parameters:
+            - name: device_id
+              in: path
+              type: string
+              required: true
+        responses:
+            200:
+                description: Successfully committed the transaction
+                schema:
+                    $ref: '#/definitions/DeviceTransaction'
+            400:
+                description: Invalid request
+                schema:
+                    $ref: '#/definitions/HTTPErrorMessage'
+        """
+        try:
+            device = RsDeviceManager.get_instance().get_device(device_id)
+            device.commit_transaction()
+            schema = DeviceTransactionSchema()
+            return schema.dump({ 'transaction': device.in_transaction(), 'stale': device.is_stale() }), 200
         except DeviceNotFoundException as e:
            raise DeviceNotExistsError
         except Exception as e:
@@ -361,3 +604,5 @@ api = Api(device_api, errors=errors)
 api.add_resource(DevicesApi, '/devices')
 api.add_resource(DeviceApi, '/devices/<string:device_id>')
 api.add_resource(DeviceConsumptionApi, '/devices/<string:device_id>/consumption')
+api.add_resource(DeviceTransactionApi, '/devices/<string:device_id>/transaction')
+api.add_resource(DeviceTransactionCommitApi, '/devices/<string:device_id>/transaction/commit')
@@ -2,13 +2,15 @@
 #  Copyright (C) 2024 RapidSilicon
 #  Authorized use only
 #
+from typing import Any, Dict
 from flask import Blueprint, request
 from flask_restful import Api, Resource
 from marshmallow import Schema, fields, ValidationError
 from submodule.dsp import DSP_Mode, Pipelining
 from submodule.rs_device_manager import RsDeviceManager
 from submodule.rs_device_resources import ModuleType, DeviceNotFoundException, DspNotFoundException
-from .device import MessageSchema
+from .batch import BatchOperationSchema, apply_batch
+from .device import MessageSchema, is_compute_deferred, get_consumption_version, get_list_version, make_cached_response
 from .errors import DeviceNotExistsError, InternalServerError, DspNotExistsError, \
     SchemaValidationError
 from .errors import errors
@@ -17,6 +19,7 @@ from .errors import errors
 # endpoints                               | methods                 | classes               #
 #-------------------------------------------------------------------------------------------# 
 # devices/<device_id>/dsp                 | get, post               | DspsApi               #
+# devices/<device_id>/dsp/batch           | post                    | DspsBatchApi          #
 # devices/<device_id>/dsp/<rownum>        | get, patch, delete      | DspApi                #
 # devices/<device_id>/dsp/consumption     | get                     | DspConsumptionApi     #
 #-------------------------------------------------------------------------------------------#
@@ -27,6 +30,7 @@ class DspResourcesConsumptionSchema(Schema):
     total_dsp_block_power = fields.Number()
     total_dsp_interconnect_power = fields.Number()
     messages = fields.Nested(MessageSchema, many=True)
+    stale = fields.Bool()
 
 class DspOutputSchema(Schema):
     dsp_blocks_used = fields.Number()
@@ -62,6 +66,11 @@ class DspsApi(Resource):
               in: path 
               type: string
               required: true
+            - name: If-None-Match
+              in: header
+              type: string
+              description: ETag of the version already held by the client
+              required: false
         definitions:
             Dsp:
                 type: object
@@ -121,6 +130,7 @@ class DspsApi(Resource):
                         total_dsp_interconnect_power:
                             type: number
                     - $ref: '#/definitions/ItemMessage'
+                    - $ref: '#/definitions/Stale'
         responses:
             200:
                 description: Successfully returned a list of dsp
@@ -130,6 +140,8 @@ class DspsApi(Resource):
                         allOf:
                             - $ref: '#/definitions/Dsp'
                             - $ref: '#/definitions/DspOutput'
+            304:
+                description: Not modified since the version identified by If-None-Match
             400:
                 description: Invalid request
                 schema:
@@ -141,7 +153,7 @@ class DspsApi(Resource):
             dsp_module = device.get_module(ModuleType.DSP)
             dsps = dsp_module.get_all()
             schema = DspSchema(many=True)
-            return schema.dump(dsps)
+            return make_cached_response(get_list_version(device), lambda: schema.dump(dsps))
         except DeviceNotFoundException as e:
             raise DeviceNotExistsError
         except Exception as e:
@@ -186,7 +198,7 @@ class DspsApi(Resource):
             dsp_module = device.get_module(ModuleType.DSP)
             schema = DspSchema()
             dsp = dsp_module.add(schema.load(request.json))
-            device.compute_output_power()
+            device.request_compute(is_compute_deferred())
             from submodule.rs_project import RsProjectManager
             RsProjectManager.get_instance().set_modified(True)
             return schema.dump(dsp), 201
@@ -283,7 +295,7 @@ class DspApi(Resource):
             dsp_module = device.get_module(ModuleType.DSP)
             schema = DspSchema()
             dsp = dsp_module.update(rownum, schema.load(request.json))
-            device.compute_output_power()
+            device.request_compute(is_compute_deferred())
             from submodule.rs_project import RsProjectManager
             RsProjectManager.get_instance().set_modified(True)
             return schema.dump(dsp), 200
@@ -326,7 +338,7 @@ class DspApi(Resource):
             dsp_module = device.get_module(ModuleType.DSP)
             schema = DspSchema()
             dsp_module.remove(rownum)
-            device.compute_output_power()
+            device.request_compute(is_compute_deferred())
             from submodule.rs_project import RsProjectManager
             RsProjectManager.get_instance().set_modified(True)
             return '', 204
@@ -337,7 +349,23 @@ class DspApi(Resource):
         except Exception as e:
             raise InternalServerError
 
+def get_dsp_consumption(dsp_module) -> Dict[str, Any]:
+    # power consumption and resource utilization of the dsp module as computed (snapshot)
+    consumption = dsp_module.get_power_consumption()
+    messages = dsp_module.get_all_messages()
+    res = dsp_module.get_resources()
+    return {
+        'total_dsp_blocks_available': res[1],
+        'total_dsp_blocks_used': res[0],
+        'total_dsp_block_power': consumption[0],
+        'total_dsp_interconnect_power': consumption[1],
+        'messages': messages
+    }
+
 class DspConsumptionApi(Resource):
+    # reads the published snapshot thus does not lock the device
+    lock_free = True
+
     def get(self, device_id : str):
         """
         This is an endpoint that returns overall dsp power consumption and resource utilization of a device
@@ -350,11 +378,18 @@ class DspConsumptionApi(Resource):
               in: path 
               type: string
               required: true
+            - name: If-None-Match
+              in: header
+              type: string
+              description: ETag of the version already held by the client
+              required: false
         responses:
             200:
                 description: Successfully returned dsp power consumption and resource utilization
                 schema:
                     $ref: '#/definitions/DspConsumptionAndResourceUsage'
+            304:
+                description: Not modified since the version identified by If-None-Match
             400:
                 description: Invalid request 
                 schema:
@@ -363,19 +398,68 @@ class DspConsumptionApi(Resource):
         try:
             device_mgr = RsDeviceManager.get_instance()
             device = device_mgr.get_device(device_id)
-            dsp_module = device.get_module(ModuleType.DSP)
-            consumption = dsp_module.get_power_consumption()
-            messages = dsp_module.get_all_messages()
-            res = dsp_module.get_resources()
-            data = {
-                'total_dsp_blocks_available': res[1],
-                'total_dsp_blocks_used': res[0],
-                'total_dsp_block_power': consumption[0],
-                'total_dsp_interconnect_power': consumption[1],
-                'messages': messages
-            }
+            snapshot, stale = device.get_snapshot(), device.is_stale()
+            data = { **get_dsp_consumption(snapshot.get_module(ModuleType.DSP)), 'stale': stale }
             schema = DspResourcesConsumptionSchema()
-            return schema.dump(data)
+            return make_cached_response(get_consumption_version(device, snapshot, stale), lambda: schema.dump(data))
+        except DeviceNotFoundException as e:
+            raise DeviceNotExistsError
+        except Exception as e:
+            raise InternalServerError
+
+class DspBatchOperationSchema(BatchOperationSchema):
+    data = fields.Nested(DspSchema)
+
+class DspsBatchApi(Resource):
+    def post(self, device_id : str):
+        """
+        This is an endpoint that creates, updates and deletes dsps of a device in a single batch
+        ---
+        tags:
+            - Dsp
+        description: Apply a list of dsp operations of a device in order and compute the power once. Nothing is applied if any operation fails.
+        parameters:
+            - name: device_id
+              in: path
+              type: string
+              required: true
+            - name: operations
+              in: body
+              description: List of dsp operations. rownum refers to the rows after the previous operations
+              schema:
+                type: array
+                items:
+                    type: object
+                    properties:
+                        op:
+                            type: string
+                            enum: [add, update, delete]
+                        rownum:
+                            type: integer
+                        data:
+                            $ref: '#/definitions/Dsp'
+        responses:
+            200:
+                description: Successfully applied all operations. Returns the dsp of each add and update operation, null for delete
+                schema:
+                    type: array
+                    items:
+                        allOf:
+                            - $ref: '#/definitions/Dsp'
+                            - $ref: '#/definitions/DspOutput'
+            400:
+                description: One or more operations failed, no change applied
+                schema:
+                    $ref: '#/definitions/BatchError'
+            403:
+                description: Schema validation error
+                schema:
+                    $ref: '#/definitions/BatchError'
+        """
+        try:
+            return apply_batch(device_id, ModuleType.DSP, DspBatchOperationSchema(), DspSchema(), DspNotFoundException, {
+                DspNotFoundException: 'DspNotExistsError'
+            })
         except DeviceNotFoundException as e:
             raise DeviceNotExistsError
         except Exception as e:
@@ -384,5 +468,6 @@ class DspConsumptionApi(Resource):
 dsp_api = Blueprint('dsp_api', __name__)
 api = Api(dsp_api, errors=errors)
 api.add_resource(DspsApi, '/devices/<string:device_id>/dsp')
+api.add_resource(DspsBatchApi, '/devices/<string:device_id>/dsp/batch')
 api.add_resource(DspApi, '/devices/<string:device_id>/dsp/<int:rownum>')
 api.add_resource(DspConsumptionApi, '/devices/<string:device_id>/dsp/consumption')
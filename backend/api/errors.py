@@ -65,6 +65,9 @@ class ProjectNotLoadedError(Exception):
 class ProjectFileNotFoundError(Exception):
     pass
 
+class EventStreamLimitReachedError(Exception):
+    pass
+
 errors = {
     "DeviceNotExistsError": {
         "message": "Device with given id doesn't exists",
@@ -150,4 +153,8 @@ errors = {
         "message": "Project file not found",
         "status": 400
     },
+    "EventStreamLimitReachedError": {
+        "message": "Too many event streams open, retry later",
+        "status": 503
+    },
 }
@@ -0,0 +1,212 @@
+#
+#  Copyright (C) 2024 RapidSilicon
+#  Authorized use only
+#
+import json
+import threading
+from typing import Any, Dict, Iterator
+from flask import Blueprint, Response, stream_with_context
+from flask_restful import Api, Resource
+from submodule.rs_device_manager import RsDeviceManager
+from submodule.rs_device_resources import ModuleType, DeviceNotFoundException
+from .bram import BramOutputSchema, BramResourcesConsumptionSchema, get_bram_consumption
+from .clock import ClockOutputSchema, ClockResourcesConsumptionSchema, get_clock_consumption
+from .device import DeviceConsumptionSchema, MessageSchema
+from .dsp import DspOutputSchema, DspResourcesConsumptionSchema, get_dsp_consumption
+from .fabric_le import FabricLogicElementOutputSchema, FabricLogicElementResourcesConsumptionSchema, get_fabric_le_consumption
+from .io import IoOutputSchema, IoResourcesConsumptionSchema, get_io_consumption
+from .peripherals import PeripheralConsumptionSchema, get_peripherals_consumption
+from .errors import DeviceNotExistsError, EventStreamLimitReachedError, InternalServerError
+from .errors import errors
+
+#------------------------------------------------------------------#
+# endpoints                   | methods    | classes               #
+#------------------------------------------------------------------#
+# devices/<device_id>/events  | get        | DeviceEventsApi       #
+#------------------------------------------------------------------#
+
+# seconds between keep-alive comments, which also detect the disconnected clients
+heartbeat_interval = 15.0
+
+# set on server shutdown to end the event streams, which never complete otherwise
+streams_closed = threading.Event()
+
+# every open stream holds a worker thread of the server, the number of streams is limited to leave
+# workers to the other requests (see set_max_event_streams)
+max_event_streams = 4
+open_event_streams = 0
+streams_lock = threading.Lock()
+
+def dump_peripheral_output(output) -> Dict[str, Any]:
+    return { **output['output'], 'messages': MessageSchema(many=True).dump(output['messages']) }
+
+# module name, consumption, consumption schema and row output serializer of each module
+event_modules = {
+    ModuleType.CLOCKING: ('clocking', get_clock_consumption, ClockResourcesConsumptionSchema, \
+        lambda output: ClockOutputSchema().dump(output)),
+    ModuleType.FABRIC_LE: ('fabric_le', get_fabric_le_consumption, FabricLogicElementResourcesConsumptionSchema, \
+        lambda output: FabricLogicElementOutputSchema().dump(output)),
+    ModuleType.BRAM: ('bram', get_bram_consumption, BramResourcesConsumptionSchema, \
+        lambda output: BramOutputSchema().dump(output)),
+    ModuleType.DSP: ('dsp', get_dsp_consumption, DspResourcesConsumptionSchema, \
+        lambda output: DspOutputSchema().dump(output)),
+    ModuleType.IO: ('io', get_io_consumption, IoResourcesConsumptionSchema, \
+        lambda output: IoOutputSchema().dump(output)),
+    ModuleType.SOC_PERIPHERALS: ('peripherals', get_peripherals_consumption, PeripheralConsumptionSchema, \
+        dump_peripheral_output),
+}
+
+def set_max_event_streams(count : int) -> None:
+    global max_event_streams
+    max_event_streams = count
+
+def open_event_stream() -> bool:
+    global open_event_streams
+    with streams_lock:
+        if open_event_streams >= max_event_streams:
+            return False
+        open_event_streams += 1
+        return True
+
+def release_event_stream() -> None:
+    global open_event_streams
+    with streams_lock:
+        open_event_streams -= 1
+
+def close_event_streams() -> None:
+    streams_closed.set()
+    # streams are only open on the devices accessed so far
+    for device in RsDeviceManager.get_instance().get_created_devices():
+        device.notify_change()
+
+def get_module_state(modtype : ModuleType, module_snapshot) -> Dict[str, Any]:
+    _, get_consumption, consumption_schema, dump_output = event_modules[modtype]
+    consumption = consumption_schema().dump(get_consumption(module_snapshot))
+    return {
+        'snapshot': module_snapshot,
+        'consumption': consumption,
+        'messages': consumption.pop('messages', []),
+        'outputs': [dump_output(output) for output in module_snapshot.get_outputs()]
+    }
+
+def get_state(device, previous : Dict[str, Any]) -> Dict[str, Any]:
+    # serialized results of the published snapshot, the modules of the snapshot shared with the
+    # previous one are not serialized again
+    snapshot = device.get_snapshot()
+    modules = {}
+    for modtype in event_modules:
+        module_snapshot = snapshot.get_module(modtype)
+        state = previous['modules'].get(modtype) if previous else None
+        if state is None or state['snapshot'] is not module_snapshot:
+            state = get_module_state(modtype, module_snapshot)
+        modules[modtype] = state
+    return {
+        'revision': device.get_revision(),
+        'version': snapshot.version,
+        'stale': device.is_stale(),
+        'total': DeviceConsumptionSchema().dump(snapshot.get_power_consumption()),
+        'modules': modules
+    }
+
+def get_changed(previous : Dict[str, Any], current : Dict[str, Any]) -> Dict[str, Any]:
+    return { key: value for key, value in current.items() if key not in previous or previous[key] != value }
+
+def get_module_delta(previous : Dict[str, Any], current : Dict[str, Any]) -> Dict[str, Any]:
+    # changed totals, changed or added rows (by row number) and new messages of a module
+    delta = {}
+    if consumption := get_changed(previous['consumption'], current['consumption']):
+        delta['consumption'] = consumption
+    if outputs := get_changed(dict(enumerate(previous['outputs'])), dict(enumerate(current['outputs']))):
+        delta['outputs'] = outputs
+    if len(previous['outputs']) != len(current['outputs']):
+        delta['count'] = len(current['outputs'])
+    if messages := [message for message in current['messages'] if message not in previous['messages']]:
+        delta['messages'] = messages
+    return delta
+
+def get_delta(previous : Dict[str, Any], current : Dict[str, Any]) -> Dict[str, Any]:
+    # everything is new to the first event of a stream
+    empty = { 'consumption': {}, 'messages': [], 'outputs': [] }
+    delta = { 'version': current['version'], 'stale': current['stale'] }
+    if total := get_changed(previous['total'] if previous else {}, current['total']):
+        delta['total'] = total
+    modules = {}
+    for modtype, state in current['modules'].items():
+        prev_state = previous['modules'][modtype] if previous else empty
+        if state is not prev_state:
+            if module_delta := get_module_delta(prev_state, state):
+                modules[event_modules[modtype][0]] = module_delta
+    if modules:
+        delta['modules'] = modules
+    return delta
+
+def format_event(delta : Dict[str, Any]) -> str:
+    return f"id: {delta['version']}\nevent: delta\ndata: {json.dumps(delta)}\n\n"
+
+def stream_events(device) -> Iterator[str]:
+    # push the full state first then a delta whenever the device is recomputed or gets stale
+    state = get_state(device, None)
+    yield format_event(get_delta(None, state))
+    while not streams_closed.is_set():
+        if not device.wait_change(state['revision'], state['version'], heartbeat_interval):
+            yield ': keep-alive\n\n'
+            continue
+        previous, state = state, get_state(device, state)
+        if state['version'] != previous['version'] or state['stale'] != previous['stale']:
+            yield format_event(get_delta(previous, state))
+
+class DeviceEventsApi(Resource):
+    # streams the published snapshots thus does not lock the device
+    lock_free = True
+
+    def get(self, device_id : str):
+        """
+        This is an endpoint that streams the results of every computation of a device as server-sent events
+        ---
+        tags:
+            - Device
+        description: Streams a 'delta' event made of the whole results of a device on connection, then
+            a 'delta' event each time the device is computed or gets stale. A delta only includes the
+            device total power which changed and, for each module (clocking, fabric_le, bram, dsp, io and
+            peripherals), the changed totals, the changed or added row outputs by row number, the new
+            number of rows if rows were added or removed and the new messages.
+        produces:
+            - text/event-stream
+        parameters:
+            - name: device_id
+              in: path
+              type: string
+              required: true
+        responses:
+            200:
+                description: Successfully opened the stream of events
+                schema:
+                    type: string
+            400:
+                description: Invalid request
+                schema:
+                    $ref: '#/definitions/HTTPErrorMessage'
+            503:
+                description: Too many event streams open
+                schema:
+                    $ref: '#/definitions/HTTPErrorMessage'
+        """
+        try:
+            device = RsDeviceManager.get_instance().get_device(device_id)
+        except DeviceNotFoundException as e:
+            raise DeviceNotExistsError
+        if not open_event_stream():
+            raise EventStreamLimitReachedError
+        try:
+            response = Response(stream_with_context(stream_events(device)), mimetype='text/event-stream', \
+                headers={ 'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no' })
+            # released once the stream is closed by the server (ended or client disconnected)
+            response.call_on_close(release_event_stream)
+            return response
+        except Exception as e:
+            release_event_stream()
+            raise InternalServerError
+
+events_api = Blueprint('events_api', __name__)
+api = Api(events_api, errors=errors)
+api.add_resource(DeviceEventsApi, '/devices/<string:device_id>/events')
@@ -2,6 +2,7 @@
 #  Copyright (C) 2024 RapidSilicon
 #  Authorized use only
 #
+from typing import Any, Dict
 from flask import Blueprint, request
 from flask_restful import Api, Resource
 from marshmallow import Schema, fields, ValidationError
@@ -9,7 +10,8 @@ from submodule.fabric_logic_element import Glitch_Factor
 from submodule.rs_device_manager import RsDeviceManager
 from submodule.rs_device_resources import ModuleType, DeviceNotFoundException, FabricLeNotFoundException, \
     FabricLeDescriptionAlreadyExistsException
-from .device import MessageSchema
+from .batch import BatchOperationSchema, apply_batch
+from .device import MessageSchema, is_compute_deferred, get_consumption_version, get_list_version, make_cached_response
 from .errors import DeviceNotExistsError, InternalServerError, FabricLeNotExistsError, \
     FabricLeDescriptionAlreadyExistsError, \
     SchemaValidationError
@@ -19,6 +21,7 @@ from .errors import errors
 # endpoints                                  | methods                 | classes                 #
 #------------------------------------------------------------------------------------------------# 
 # devices/<device_id>/fabric_le              | get, post               | Fabric_LesApi           #
+# devices/<device_id>/fabric_le/batch        | post                    | Fabric_LesBatchApi      #
 # devices/<device_id>/fabric_le/<rownum>     | get, patch, delete      | Fabric_LeApi            #
 # devices/<device_id>/fabric_le/consumption  | get                     | Fabric_LeConsumptionApi #
 #------------------------------------------------------------------------------------------------#
@@ -31,6 +34,7 @@ class FabricLogicElementResourcesConsumptionSchema(Schema):
     total_block_power = fields.Number()
     total_interconnect_power = fields.Number()
     messages = fields.Nested(MessageSchema, many=True)
+    stale = fields.Bool()
 
 class FabricLogicElementOutputSchema(Schema):
     clock_frequency = fields.Int()
@@ -64,6 +68,11 @@ class Fabric_LesApi(Resource):
               in: path 
               type: string
               required: true
+            - name: If-None-Match
+              in: header
+              type: string
+              description: ETag of the version already held by the client
+              required: false
         definitions:
             FabricLE:
                 type: object
@@ -121,6 +130,7 @@ class Fabric_LesApi(Resource):
                         total_interconnect_power:
                             type: number
                     - $ref: '#/definitions/ItemMessage'
+                    - $ref: '#/definitions/Stale'
         responses:
             200:
                 description: Successfully returned a list of fabric logic elements
@@ -130,6 +140,8 @@ class Fabric_LesApi(Resource):
                         allOf:
                             - $ref: '#/definitions/FabricLE'
                             - $ref: '#/definitions/FabricLEOutput'
+            304:
+                description: Not modified since the version identified by If-None-Match
             400:
                 description: Invalid request
                 schema:
@@ -141,7 +153,7 @@ class Fabric_LesApi(Resource):
             fle_module = device.get_module(ModuleType.FABRIC_LE)
             logic_elements = fle_module.get_all()
             schema = FabricLogicElementSchema(many=True)
-            return schema.dump(logic_elements)
+            return make_cached_response(get_list_version(device), lambda: schema.dump(logic_elements))
         except DeviceNotFoundException as e:
             raise DeviceNotExistsError
         except Exception as e:
@@ -186,7 +198,7 @@ class Fabric_LesApi(Resource):
             fle_module = device.get_module(ModuleType.FABRIC_LE)
             schema = FabricLogicElementSchema()
             logic_element = fle_module.add(schema.load(request.json))
-            device.compute_output_power()
+            device.request_compute(is_compute_deferred())
             from submodule.rs_project import RsProjectManager
             RsProjectManager.get_instance().set_modified(True)
             return schema.dump(logic_element), 201
@@ -285,7 +297,7 @@ class Fabric_LeApi(Resource):
             fle_module = device.get_module(ModuleType.FABRIC_LE)
             schema = FabricLogicElementSchema()
             logic_element = fle_module.update(rownum, schema.load(request.json))
-            device.compute_output_power()
+            device.request_compute(is_compute_deferred())
             from submodule.rs_project import RsProjectManager
             RsProjectManager.get_instance().set_modified(True)
             return schema.dump(logic_element), 200
@@ -328,7 +340,7 @@ class Fabric_LeApi(Resource):
             fle_module = device.get_module(ModuleType.FABRIC_LE)
             schema = FabricLogicElementSchema()
             fle_module.remove(rownum)
-            device.compute_output_power()
+            device.request_compute(is_compute_deferred())
             from submodule.rs_project import RsProjectManager
             RsProjectManager.get_instance().set_modified(True)
             return '', 204
@@ -339,7 +351,25 @@ class Fabric_LeApi(Resource):
         except Exception as e:
             raise InternalServerError
 
+def get_fabric_le_consumption(fle_module) -> Dict[str, Any]:
+    # power consumption and resource utilization of the fabric logic element module as computed (snapshot)
+    consumption = fle_module.get_power_consumption()
+    messages = fle_module.get_all_messages()
+    res = fle_module.get_resources()
+    return {
+        'total_lut6_available': res[1],
+        'total_lut6_used': res[0],
+        'total_flip_flop_available': res[3],
+        'total_flip_flop_used': res[2],
+        'total_block_power': consumption[0],
+        'total_interconnect_power': consumption[1],
+        'messages': messages
+    }
+
 class Fabric_LeConsumptionApi(Resource):
+    # reads the published snapshot thus does not lock the device
+    lock_free = True
+
     def get(self, device_id : str):
         """
         This is an endpoint that returns overall the fabric logic element power consumption and resource utilization of a device
@@ -352,11 +382,18 @@ class Fabric_LeConsumptionApi(Resource):
               in: path 
               type: string
               required: true
+            - name: If-None-Match
+              in: header
+              type: string
+              description: ETag of the version already held by the client
+              required: false
         responses:
             200:
                 description: Successfully returned fabric logic element power consumption and resource utilization
                 schema:
                     $ref: '#/definitions/FabricLEConsumptionAndResourceUsage'
+            304:
+                description: Not modified since the version identified by If-None-Match
             400:
                 description: Invalid request 
                 schema:
@@ -365,21 +402,69 @@ class Fabric_LeConsumptionApi(Resource):
         try:
             device_mgr = RsDeviceManager.get_instance()
             device = device_mgr.get_device(device_id)
-            fle_module = device.get_module(ModuleType.FABRIC_LE)
-            consumption = fle_module.get_power_consumption()
-            messages = fle_module.get_all_messages()
-            res = fle_module.get_resources()
-            data = {
-                'total_lut6_available': res[1],
-                'total_lut6_used': res[0],
-                'total_flip_flop_available': res[3],
-                'total_flip_flop_used': res[2],
-                'total_block_power': consumption[0],
-                'total_interconnect_power': consumption[1],
-                'messages': messages
-            }
+            snapshot, stale = device.get_snapshot(), device.is_stale()
+            data = { **get_fabric_le_consumption(snapshot.get_module(ModuleType.FABRIC_LE)), 'stale': stale }
             schema = FabricLogicElementResourcesConsumptionSchema()
-            return schema.dump(data)
+            return make_cached_response(get_consumption_version(device, snapshot, stale), lambda: schema.dump(data))
+        except DeviceNotFoundException as e:
+            raise DeviceNotExistsError
+        except Exception as e:
+            raise InternalServerError
+
+class FabricLogicElementBatchOperationSchema(BatchOperationSchema):
+    data = fields.Nested(FabricLogicElementSchema)
+
+class Fabric_LesBatchApi(Resource):
+    def post(self, device_id : str):
+        """
+        This is an endpoint that creates, updates and deletes fabric logic elements of a device in a single batch
+        ---
+        tags:
+            - Fabric Logic Element
+        description: Apply a list of fabric logic element operations of a device in order and compute the power once. Nothing is applied if any operation fails.
+        parameters:
+            - name: device_id
+              in: path
+              type: string
+              required: true
+            - name: operations
+              in: body
+              description: List of fabric logic element operations. rownum refers to the rows after the previous operations
+              schema:
+                type: array
+                items:
+                    type: object
+                    properties:
+                        op:
+                            type: string
+                            enum: [add, update, delete]
+                        rownum:
+                            type: integer
+                        data:
+                            $ref: '#/definitions/FabricLE'
+        responses:
+            200:
+                description: Successfully applied all operations. Returns the fabric logic element of each add and update operation, null for delete
+                schema:
+                    type: array
+                    items:
+                        allOf:
+                            - $ref: '#/definitions/FabricLE'
+                            - $ref: '#/definitions/FabricLEOutput'
+            400:
+                description: One or more operations failed, no change applied
+                schema:
+                    $ref: '#/definitions/BatchError'
+            403:
+                description: Schema validation error
+                schema:
+                    $ref: '#/definitions/BatchError'
+        """
+        try:
+            return apply_batch(device_id, ModuleType.FABRIC_LE, FabricLogicElementBatchOperationSchema(), FabricLogicElementSchema(), FabricLeNotFoundException, {
+                FabricLeDescriptionAlreadyExistsException: 'FabricLeDescriptionAlreadyExistsError',
+                FabricLeNotFoundException: 'FabricLeNotExistsError'
+            })
         except DeviceNotFoundException as e:
             raise DeviceNotExistsError
         except Exception as e:
@@ -388,5 +473,6 @@ class Fabric_LeConsumptionApi(Resource):
 fabric_le_api = Blueprint('fabric_le_api', __name__)
 api = Api(fabric_le_api, errors=errors)
 api.add_resource(Fabric_LesApi, '/devices/<string:device_id>/fabric_le')
+api.add_resource(Fabric_LesBatchApi, '/devices/<string:device_id>/fabric_le/batch')
 api.add_resource(Fabric_LeApi, '/devices/<string:device_id>/fabric_le/<int:rownum>')
 api.add_resource(Fabric_LeConsumptionApi, '/devices/<string:device_id>/fabric_le/consumption')
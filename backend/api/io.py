@@ -2,7 +2,7 @@
 #  Copyright (C) 2024 RapidSilicon
 #  Authorized use only
 #
-from typing import Type
+from typing import Any, Dict, Type
 from flask import Blueprint, request
 from flask_restful import Api, Resource
 from marshmallow import Schema, fields, post_dump, post_load, ValidationError, INCLUDE
@@ -10,7 +10,8 @@ from submodule.io import IO_Direction, IO_Drive_Strength, IO_Feature, IO_Feature
     IO_Data_Type, IO_Standard, IO_Synchronization, IO_Pull_up_down
 from submodule.rs_device_manager import RsDeviceManager
 from submodule.rs_device_resources import IOFeatureNotFoundException, IOFeatureOdtBankNotFoundException, IOFeatureTypeMismatchException, ModuleType, IO_BankType, DeviceNotFoundException, IONotFoundException
-from .device import MessageSchema
+from .batch import BatchOperationSchema, apply_batch
+from .device import MessageSchema, is_compute_deferred, get_consumption_version, get_list_version, make_cached_response
 from .errors import DeviceNotExistsError, IOFeatureNotExistsError, IOFeatureOdtBankNotExistsError, IOFeatureTypeMismatchError, InternalServerError, IONotExistsError, \
     SchemaValidationError
 from .errors import errors
@@ -19,6 +20,7 @@ from .errors import errors
 # endpoints                               | methods                 | classes               #
 #-------------------------------------------------------------------------------------------# 
 # devices/<device_id>/io                  | get, post               | IosApi                #
+# devices/<device_id>/io/batch            | post                    | IosBatchApi           #
 # devices/<device_id>/io/<rownum>         | get, patch, delete      | IoApi                 #
 # devices/<device_id>/io/features         | get                     | IoFeaturesApi         #
 # devices/<device_id>/io/features/<index> | get, patch              | IoFeatureApi          #
@@ -89,6 +91,7 @@ class IoResourcesConsumptionSchema(Schema):
     io_usage = fields.Nested(IoUsageSchema, many=True)
     io_features = fields.Nested(IoFeatureSchema, many=True)
     messages = fields.Nested(MessageSchema, many=True)
+    stale = fields.Bool()
 
 class IoOutputSchema(Schema):
     bank_type = fields.Enum(IO_BankType, by_value=True)
@@ -132,6 +135,11 @@ class IosApi(Resource):
               in: path 
               type: string
               required: true
+            - name: If-None-Match
+              in: header
+              type: string
+              description: ETag of the version already held by the client
+              required: false
         definitions:
             IO:
                 type: object
@@ -260,6 +268,7 @@ class IosApi(Resource):
                             items:
                                 $ref: '#/definitions/IOFeature'
                     - $ref: '#/definitions/ItemMessage'
+                    - $ref: '#/definitions/Stale'
         responses:
             200:
                 description: Successfully returned a list of IO
@@ -269,6 +278,8 @@ class IosApi(Resource):
                         allOf:
                             - $ref: '#/definitions/IO'
                             - $ref: '#/definitions/IOOutput'
+            304:
+                description: Not modified since the version identified by If-None-Match
             400:
                 description: Invalid request
                 schema:
@@ -280,7 +291,7 @@ class IosApi(Resource):
             io_module = device.get_module(ModuleType.IO)
             ios = io_module.get_all()
             schema = IoSchema(many=True)
-            return schema.dump(ios)
+            return make_cached_response(get_list_version(device), lambda: schema.dump(ios))
         except DeviceNotFoundException as e:
             raise DeviceNotExistsError
         except Exception as e:
@@ -325,7 +336,7 @@ class IosApi(Resource):
             io_module = device.get_module(ModuleType.IO)
             schema = IoSchema()
             io = io_module.add(schema.load(request.json))
-            device.compute_output_power()
+            device.request_compute(is_compute_deferred())
             from submodule.rs_project import RsProjectManager
             RsProjectManager.get_instance().set_modified(True)
             return schema.dump(io), 201
@@ -422,7 +433,7 @@ class IoApi(Resource):
             io_module = device.get_module(ModuleType.IO)
             schema = IoSchema()
             io = io_module.update(rownum, schema.load(request.json))
-            device.compute_output_power()
+            device.request_compute(is_compute_deferred())
             from submodule.rs_project import RsProjectManager
             RsProjectManager.get_instance().set_modified(True)
             return schema.dump(io), 200
@@ -465,7 +476,7 @@ class IoApi(Resource):
             io_module = device.get_module(ModuleType.IO)
             schema = IoSchema()
             io_module.remove(rownum)
-            device.compute_output_power()
+            device.request_compute(is_compute_deferred())
             from submodule.rs_project import RsProjectManager
             RsProjectManager.get_instance().set_modified(True)
             return '', 204
@@ -476,7 +487,25 @@ class IoApi(Resource):
         except Exception as e:
             raise InternalServerError
 
+def get_io_consumption(io_module) -> Dict[str, Any]:
+    # power consumption and resource utilization of the io module as computed (snapshot)
+    consumption = io_module.get_power_consumption()
+    features = io_module.get_features()
+    messages = io_module.get_all_messages()
+    res = io_module.get_resources()
+    return {
+        'total_block_power': consumption[0],
+        'total_interconnect_power': consumption[1],
+        'total_on_die_termination_power': consumption[2],
+        'io_usage': res[0],
+        'io_features': features,
+        'messages': messages
+    }
+
 class IoConsumptionApi(Resource):
+    # reads the published snapshot thus does not lock the device
+    lock_free = True
+
     def get(self, device_id : str):
         """
         This is an endpoint that returns overall IO power consumption and resource utilization of a device
@@ -489,11 +518,18 @@ class IoConsumptionApi(Resource):
               in: path 
               type: string
               required: true
+            - name: If-None-Match
+              in: header
+              type: string
+              description: ETag of the version already held by the client
+              required: false
         responses:
             200:
                 description: Successfully returned IO power consumption and resource utilization
                 schema:
                     $ref: '#/definitions/IOConsumptionAndResourceUsage'
+            304:
+                description: Not modified since the version identified by If-None-Match
             400:
                 description: Invalid request 
                 schema:
@@ -502,21 +538,10 @@ class IoConsumptionApi(Resource):
         try:
             device_mgr = RsDeviceManager.get_instance()
             device = device_mgr.get_device(device_id)
-            io_module = device.get_module(ModuleType.IO)
-            consumption = io_module.get_power_consumption()
-            features = io_module.get_features()
-            messages = io_module.get_all_messages()
-            res = io_module.get_resources()
-            data = {
-                'total_block_power': consumption[0],
-                'total_interconnect_power': consumption[1],
-                'total_on_die_termination_power': consumption[2],
-                'io_usage': res[0],
-                'io_features': features,
-                'messages': messages
-            }
+            snapshot, stale = device.get_snapshot(), device.is_stale()
+            data = { **get_io_consumption(snapshot.get_module(ModuleType.IO)), 'stale': stale }
             schema = IoResourcesConsumptionSchema()
-            return schema.dump(data)
+            return make_cached_response(get_consumption_version(device, snapshot, stale), lambda: schema.dump(data))
         except DeviceNotFoundException as e:
             raise DeviceNotExistsError
         except Exception as e:
@@ -678,7 +703,7 @@ class IoFeatureApi(Resource):
             data = schema.load(request.json)
             feature = device.get_module(ModuleType.IO).get_feature(index)
             feature.update(data)
-            device.compute_output_power()
+            device.request_compute(is_compute_deferred())
             from submodule.rs_project import RsProjectManager
             RsProjectManager.get_instance().set_modified(True)
             return schema.dump(feature), 200
@@ -695,9 +720,68 @@ class IoFeatureApi(Resource):
         except Exception as e:
             raise InternalServerError
 
+class IoBatchOperationSchema(BatchOperationSchema):
+    data = fields.Nested(IoSchema)
+
+class IosBatchApi(Resource):
+    def post(self, device_id : str):
+        """
+        This is an endpoint that creates, updates and deletes IOs of a device in a single batch
+        ---
+        tags:
+            - IO
+        description: Apply a list of IO operations of a device in order and compute the power once. Nothing is applied if any operation fails.
+        parameters:
+            - name: device_id
+              in: path
+              type: string
+              required: true
+            - name: operations
+              in: body
+              description: List of IO operations. rownum refers to the rows after the previous operations
+              schema:
+                type: array
+                items:
+                    type: object
+                    properties:
+                        op:
+                            type: string
+                            enum: [add, update, delete]
+                        rownum:
+                            type: integer
+                        data:
+                            $ref: '#/definitions/IO'
+        responses:
+            200:
+                description: Successfully applied all operations. Returns the IO of each add and update operation, null for delete
+                schema:
+                    type: array
+                    items:
+                        allOf:
+                            - $ref: '#/definitions/IO'
+                            - $ref: '#/definitions/IOOutput'
+            400:
+                description: One or more operations failed, no change applied
+                schema:
+                    $ref: '#/definitions/BatchError'
+            403:
+                description: Schema validation error
+                schema:
+                    $ref: '#/definitions/BatchError'
+        """
+        try:
+            return apply_batch(device_id, ModuleType.IO, IoBatchOperationSchema(), IoSchema(), IONotFoundException, {
+                IONotFoundException: 'IONotExistsError'
+            })
+        except DeviceNotFoundException as e:
+            raise DeviceNotExistsError
+        except Exception as e:
+            raise InternalServerError
+
 io_api = Blueprint('io_api', __name__)
 api = Api(io_api, errors=errors)
 api.add_resource(IosApi, '/devices/<string:device_id>/io')
+api.add_resource(IosBatchApi, '/devices/<string:device_id>/io/batch')
 api.add_resource(IoApi, '/devices/<string:device_id>/io/<int:rownum>')
 api.add_resource(IoFeaturesApi, '/devices/<string:device_id>/io/features')
 api.add_resource(IoFeatureApi, '/devices/<string:device_id>/io/features/<int:index>')
@@ -2,7 +2,7 @@
 #  Copyright (C) 2024 RapidSilicon
 #  Authorized use only
 #
-from typing import Type
+from typing import Any, Dict, Type
 from flask import Blueprint, request
 from flask_restful import Api, Resource
 from marshmallow import Schema, fields, ValidationError, post_dump
@@ -12,7 +12,7 @@ from submodule.peripherals import Peripheral, PeripheralTarget, PeripheralType,
     N22_RISC_V_Clock, Port_Activity, A45_Load
 from submodule.rs_device_manager import RsDeviceManager
 from submodule.rs_device_resources import ModuleType, DeviceNotFoundException, PeripheralNotFoundException, InvalidPeripheralTypeException, PeripheralPortNotFoundException
-from .device import MessageSchema
+from .device import MessageSchema, is_compute_deferred, get_consumption_version, make_cached_response
 from .errors import DeviceNotExistsError, InternalServerError, PeripheralChannelNotExistsError, PeripheralNotExistsError, \
     InvalidPeripheralTypeError, PeripheralEndpointNotExistsError, \
     SchemaValidationError
@@ -63,6 +63,7 @@ class PeripheralConsumptionSchema(Schema):
     total_soc_io_available = fields.Int()
     total_soc_io_used = fields.Int()
     messages = fields.Nested(MessageSchema, many=True)
+    stale = fields.Bool()
 
 class PeripheralOutputSchema(Schema):
     calculated_bandwidth = fields.Number()
@@ -317,6 +318,7 @@ class PeripheralsApi(Resource):
                         total_soc_io_used:
                             type: integer
                     - $ref: '#/definitions/ItemMessage'
+                    - $ref: '#/definitions/Stale'
             EndpointUrl:
                 type: object
                 properties:
@@ -433,7 +435,27 @@ class PeripheralsApi(Resource):
         except Exception as e:
             raise InternalServerError
 
+def get_peripherals_consumption(periph_module) -> Dict[str, Any]:
+    # power consumption and resource utilization of the soc peripherals module as computed (snapshot)
+    consumption = periph_module.get_power_consumption()
+    messages = periph_module.get_all_messages()
+    res = periph_module.get_resources()
+    return {
+        'total_memory_power': consumption[0],
+        'total_peripherals_power': consumption[1],
+        'total_acpu_power': consumption[2],
+        'total_dma_power': consumption[3],
+        'total_noc_interconnect_power': consumption[4],
+        'total_bcpu_power': consumption[5],
+        'total_soc_io_available': res[0],
+        'total_soc_io_used': res[1],
+        'messages': messages
+    }
+
 class PeripheralsConsumptionApi(Resource):
+    # reads the published snapshot thus does not lock the device
+    lock_free = True
+
     def get(self, device_id : str):
         """
         This is an endpoint that returns overall soc peripherals power consumption and resource utilization of a device
@@ -446,11 +468,18 @@ class PeripheralsConsumptionApi(Resource):
               in: path 
               type: string
               required: true
+            - name: If-None-Match
+              in: header
+              type: string
+              description: ETag of the version already held by the client
+              required: false
         responses:
             200:
                 description: Successful returned soc peripherals power consumption and resource utilization
                 schema:
                     $ref: '#/definitions/PeripheralConsumptionAndResourceUsage'
+            304:
+                description: Not modified since the version identified by If-None-Match
             400:
                 description: Invalid request 
                 schema:
@@ -458,23 +487,11 @@ class PeripheralsConsumptionApi(Resource):
         """
         try:
             # todo: return consumption as a structure
-            periph_module = RsDeviceManager.get_instance().get_device(device_id).get_module(ModuleType.SOC_PERIPHERALS)
-            consumption = periph_module.get_power_consumption()
-            messages = periph_module.get_all_messages()
-            res = periph_module.get_resources()
-            data = {
-                'total_memory_power': consumption[0],
-                'total_peripherals_power': consumption[1],
-                'total_acpu_power': consumption[2],
-                'total_dma_power': consumption[3],
-                'total_noc_interconnect_power': consumption[4],
-                'total_bcpu_power': consumption[5],
-                'total_soc_io_available': res[0],
-                'total_soc_io_used': res[1],
-                'messages': messages
-            }
+            device = RsDeviceManager.get_instance().get_device(device_id)
+            snapshot, stale = device.get_snapshot(), device.is_stale()
+            data = { **get_peripherals_consumption(snapshot.get_module(ModuleType.SOC_PERIPHERALS)), 'stale': stale }
             schema = PeripheralConsumptionSchema()
-            return schema.dump(data)
+            return make_cached_response(get_consumption_version(device, snapshot, stale), lambda: schema.dump(data))
         except DeviceNotFoundException as e:
             raise DeviceNotExistsError
         except Exception as e:
@@ -576,7 +593,7 @@ class PeripheralApi(Resource):
             peripheral = device.get_module(ModuleType.SOC_PERIPHERALS).get_peripheral(get_type(periph), rownum)
             schema = get_peripheral_schema(peripheral.get_type())
             peripheral.set_properties(schema.load(request.json))
-            device.compute_output_power()
+            device.request_compute(is_compute_deferred())
             from submodule.rs_project import RsProjectManager
             RsProjectManager.get_instance().set_modified(True)
             return schema.dump(peripheral), 200
@@ -693,7 +710,7 @@ class PeripheralEndpointApi(Resource):
             ep = device.get_module(ModuleType.SOC_PERIPHERALS).get_peripheral(get_type(periph), rownum).get_port(endpoint)
             schema = get_endpoint_schema(periph)
             ep.set_properties(schema.load(request.json))
-            device.compute_output_power()
+            device.request_compute(is_compute_deferred())
             from submodule.rs_project import RsProjectManager
             RsProjectManager.get_instance().set_modified(True)
             return schema.dump(ep), 200
@@ -812,7 +829,7 @@ class PeripheralChannelApi(Resource):
             channel = device.get_module(ModuleType.SOC_PERIPHERALS).get_peripheral(get_type(periph), rownum).get_port(chnum)
             schema = ChannelSchema()
             channel.set_properties(schema.load(request.json))
-            device.compute_output_power()
+            device.request_compute(is_compute_deferred())
             from submodule.rs_project import RsProjectManager
             RsProjectManager.get_instance().set_modified(True)
             return schema.dump(channel), 200
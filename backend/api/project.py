@@ -9,6 +9,7 @@ from flask_restful import Api, Resource
 from marshmallow import Schema, fields, ValidationError
 from api.errors import InternalServerError, SchemaValidationError
 from api.device import MessageSchema
+from submodule.rs_device_manager import RsDeviceManager
 from submodule.rs_device_resources import ProjectNotLoadedException
 from submodule.rs_project import RsProjectManager, RsProjectState
 from .errors import CreateProjectPermissionError, ProjectFileNotFoundError, ProjectNotLoadedError, errors
@@ -129,7 +130,7 @@ class ProjectApi(Resource):
                     $ref: '#/definitions/HTTPErrorMessage'
         """
         try:
-            with lock:
+            with lock, RsDeviceManager.get_instance().lock_devices(write=False):
                 proj_mgr = RsProjectManager.get_instance()
                 proj_mgr.save()
             return ProjectSchema().dump(proj_mgr.get()), 201
@@ -210,7 +211,7 @@ class ProjectCreateApi(Resource):
                     $ref: '#/definitions/HTTPErrorMessage'
         """
         try:
-            with lock:
+            with lock, RsDeviceManager.get_instance().lock_devices(write=False):
                 proj_mgr = RsProjectManager.get_instance()
                 proj_mgr.create(ProjectFilepathSchema().load(request.json)['filepath'])
             return "", 204
@@ -247,7 +248,7 @@ class ProjectOpenApi(Resource):
                     $ref: '#/definitions/HTTPErrorMessage'
         """
         try:
-            with lock:
+            with lock, RsDeviceManager.get_instance().lock_devices():
                 proj_mgr = RsProjectManager.get_instance()
                 proj_mgr.open(ProjectFilepathSchema().load(request.json)['filepath'])
             return "", 204
@@ -275,7 +276,7 @@ class ProjectCloseApi(Resource):
                     $ref: '#/definitions/HTTPErrorMessage'
         """
         try:
-            with lock:
+            with lock, RsDeviceManager.get_instance().lock_devices():
                 proj_mgr = RsProjectManager.get_instance()
                 proj_mgr.close()
             return "", 204
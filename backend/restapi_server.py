@@ -6,11 +6,18 @@ import argparse
 import os
 import signal
 import sys
-from flask import Flask, request, jsonify
+import threading
+import time
+import waitress
+from waitress import wasyncore
+from flask import Flask, current_app, request, jsonify, g
 from flasgger import Swagger
 from submodule.rs_device_manager import RsDeviceManager
+from submodule.rs_device_resources import DeviceNotFoundException
 from submodule.rs_logger import log_setup, log, RsLogLevel
+from submodule.rs_power_config import RsPowerConfig
 from api.device import device_api
+from api.events import events_api, close_event_streams, set_max_event_streams
 from api.clock import clock_api
 from api.dsp import dsp_api
 from api.fabric_le import fabric_le_api
@@ -19,6 +26,72 @@ from api.io import io_api
 from api.peripherals import peripherals_api
 from api.utils import attrs_api
 from api.project import project_api
+from utilities.common_utils import RsReadWriteLock
+
+#
+# Production WSGI server (waitress) with graceful shutdown, requests are served by a fixed pool of
+# worker threads. waitress has no public api to stop accepting connections then drain the requests
+# in progress, thus its internals are used (waitress is pinned in requirements.txt and
+# test_waitress_internals fails when they change)
+#
+class RsWSGIServer:
+    # seconds given to the requests in progress to complete on shutdown
+    drain_timeout = 30.0
+
+    def __init__(self, app: Flask, port: int, threads: int):
+        self.server = waitress.create_server(app, host='127.0.0.1', port=port, threads=threads)
+        self.server_port = self.server.effective_port
+        self.stopping = threading.Event()
+        # guards the trigger waking up the serving thread, closed once the server is stopped
+        self.trigger_lock = threading.RLock()
+        self.trigger_closed = False
+
+    def poll(self) -> None:
+        self.server.asyncore.loop(timeout=self.server.adj.asyncore_loop_timeout, map=self.server._map, count=1)
+
+    def is_busy(self) -> bool:
+        # requests received and not completed yet or responses not sent yet
+        return any(channel.requests or channel.total_outbufs_len for channel in self.server.active_channels.values())
+
+    def serve_forever(self) -> None:
+        while not self.stopping.is_set():
+            self.poll()
+
+        # stop accepting connections then drain the requests in progress before closing
+        wasyncore.dispatcher.close(self.server)
+        expiration = time.monotonic() + self.drain_timeout
+        while self.is_busy() and time.monotonic() < expiration:
+            self.poll()
+        self.server.task_dispatcher.shutdown()
+        for channel in list(self.server.active_channels.values()):
+            channel.handle_close()
+        with self.trigger_lock:
+            self.trigger_closed = True
+            self.server.trigger.close()
+
+    def shutdown(self) -> None:
+        # does not block thus can be called by a signal handler of the serving thread
+        with self.trigger_lock:
+            self.stopping.set()
+            if not self.trigger_closed:
+                self.server.pull_trigger()
+
+def create_server(app: Flask, port: int, threads: int) -> RsWSGIServer:
+    return RsWSGIServer(app, port, threads)
+
+def get_request_lock() -> RsReadWriteLock:
+    # device requests run concurrently on a device for reads, exclusively for writes (project
+    # requests lock the devices by themselves)
+    device_id = (request.view_args or {}).get('device_id')
+    if device_id is None:
+        return None
+    view_class = getattr(current_app.view_functions.get(request.endpoint), 'view_class', None)
+    if getattr(view_class, 'lock_free', False):
+        return None
+    try:
+        return RsDeviceManager.get_instance().get_device_lock(device_id)
+    except DeviceNotFoundException:
+        return None
 
 #
 # Main entry point
@@ -28,20 +101,30 @@ def main():
     parser = argparse.ArgumentParser(description='Rapid Power Estimator Rest API Server command-line arguments.')
     parser.add_argument('device_file', type=str, help='Path to the input device xml file')
     parser.add_argument('--port', type=int, default=5000, help='Specify TCP Port to use for REST server')
-    parser.add_argument('--debug', default=False, action='store_true', help='Enable/Disable debug mode')
+    parser.add_argument('--debug', default=False, action='store_true', help='Enable/Disable debug mode (served by the flask development server)')
+    parser.add_argument('--threads', type=int, default=8, help='Specify no. of worker threads of the WSGI server (at least 2)')
     parser.add_argument('--logfile', type=str, default="rpe.log", help='Specify log file name')
     parser.add_argument('--maxbytes', type=int, default=2048, help='Specify maximun log file size in kilobytes before rollover')
     parser.add_argument('--backupcount', type=int, default=20, help='Specify no. of backup log files')
+    parser.add_argument('--cachedir', type=str, default=os.path.join(os.path.expanduser("~"), ".rpe_cache"), help='Specify power config snapshot cache directory, empty to disable')
+    parser.add_argument('--loglevel', type=str, default=RsLogLevel.INFO.value, choices=[l.value for l in RsLogLevel], help='Specify log level')
     args = parser.parse_args()
 
+    # an event stream holds a worker thread, at least one is left to the other requests
+    if not args.debug and args.threads < 2:
+        parser.error('--threads must be at least 2')
+
     # setup app logger
-    log_setup(filename=args.logfile, max_bytes=args.maxbytes * 1024, backup_count=args.backupcount)
+    log_setup(filename=args.logfile, max_bytes=args.maxbytes * 1024, backup_count=args.backupcount, level=RsLogLevel(args.loglevel))
 
     # Check if the device_file exists
     if os.path.exists(args.device_file) == False:
         log(f"Device file '{args.device_file}' does not exist.", RsLogLevel.ERROR)
         sys.exit(1)
 
+    # reuse power config snapshots from previous runs
+    RsPowerConfig.snapshot_dir = args.cachedir or None
+
     # Parse Device XML file into Device List
     devicemanager = RsDeviceManager.get_instance()
     devicemanager.load_xml(args.device_file)
@@ -63,6 +146,7 @@ def main():
 
     # bind device api objects onto the flask app
     app.register_blueprint(device_api)
+    app.register_blueprint(events_api)
     app.register_blueprint(clock_api)
     app.register_blueprint(dsp_api)
     app.register_blueprint(fabric_le_api)
@@ -76,26 +160,42 @@ def main():
     @app.before_request
     def before_request():
         log(f"{request.method} {request.url}")
+        lock = get_request_lock()
+        if lock is None:
+            return
+        if request.method in ('GET', 'HEAD', 'OPTIONS'):
+            lock.acquire_read()
+            g.release_lock = lock.release_read
+        else:
+            lock.acquire_write()
+            g.release_lock = lock.release_write
 
     @app.after_request
     def after_request(response):
         log(f"{request.method} {request.url} {response.status_code} - DONE")
         return response
 
-    # Graceful shutdown function
-    def shutdown_server():
-        log("Shutting down server...")
-        func = request.environ.get('werkzeug.server.shutdown')
-        if func is not None:
-            func()
-        else:
-            log("Server shutdown function not found.", RsLogLevel.ERROR)
+    @app.teardown_request
+    def teardown_request(exception):
+        release_lock = g.pop('release_lock', None)
+        if release_lock is not None:
+            release_lock()
+
+    server = None if args.debug else create_server(app, args.port, args.threads)
+
+    # event streams are served by the worker threads as well, half of them are left to the other requests
+    if server is not None:
+        set_max_event_streams(args.threads // 2)
 
-    # Signal handler for smooth shutdown
+    # Signal handler for graceful shutdown
     def signal_handler(signal_received, frame):
         log(f"Signal {signal_received} received, initiating shutdown...")
-        shutdown_server()
-        sys.exit(0)
+        if server is None:
+            sys.exit(0)
+        # end the event streams, their requests would never be drained otherwise
+        close_event_streams()
+        # stop accepting requests, serve_forever drains the ones in progress before returning
+        server.shutdown()
 
     # Register the signal handler for SIGINT (Ctrl+C) and SIGTERM
     signal.signal(signal.SIGINT, signal_handler)
@@ -104,8 +204,12 @@ def main():
     # log app server started
     log("App server is running...")
 
-    # Start Rest API server
-    app.run(debug=args.debug, port=args.port)
+    # Start Rest API server, the flask development server is only used for debugging
+    if server is None:
+        app.run(debug=args.debug, port=args.port)
+    else:
+        server.serve_forever()
+        log("App server is stopped")
 
 if __name__ == "__main__":
     main()
@@ -2,14 +2,14 @@
 #  Copyright (C) 2024 RapidSilicon
 #  Authorized use only
 #
-from dataclasses import dataclass, field
-from typing import List
 import numpy as np
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
 from utilities.common_utils import RsEnum, update_attributes
 from .rs_power_config import ElementType, PowerValue, ScenarioType
 from .rs_device_resources import BramNotFoundException, RsDeviceResources
 from .rs_message import RsMessage, RsMessageManager
-from .rs_logger import RsLogLevel, log
+from .rs_logger import trace, trace_enabled
 
 class BRAM_Type(RsEnum):
     BRAM_18K_SDP = 0, "18k SDP"
@@ -176,7 +176,120 @@ class BRAM:
             self.output.block_power = block_power
             self.output.interconnect_power = interconnect_power
 
+# port properties cleared by set_default_write_read_bram_properties for each bram type
+BRAM_DEFAULT_PORT_PROPERTIES = ('port_a.write_enable_rate', 'port_a.read_enable_rate', 'port_b.write_enable_rate', \
+    'port_b.read_enable_rate', 'port_b.width', 'port_b.toggle_rate')
+
+@dataclass
+class BRAM_TypeFlags:
+    rom : np.ndarray
+    sdp_fifo : np.ndarray
+    fifo : np.ndarray
+    single_port : np.ndarray
+    capacity : np.ndarray
+    cleared : np.ndarray
+
+    @staticmethod
+    def build() -> 'BRAM_TypeFlags':
+        # evaluated once per bram type instead of per row, indexed by BRAM_Type value
+        types = sorted(BRAM_Type, key=lambda bram_type: bram_type.value)
+        cleared = []
+        for bram_type in types:
+            probe = BRAM(type=bram_type)
+            for name in BRAM_DEFAULT_PORT_PROPERTIES:
+                port, prop = name.split('.')
+                setattr(getattr(probe, port), prop, 1)
+            probe.set_default_write_read_bram_properties()
+            cleared.append([getattr(getattr(probe, port), prop) == 0 for port, prop in \
+                (name.split('.') for name in BRAM_DEFAULT_PORT_PROPERTIES)])
+        return BRAM_TypeFlags(
+            rom=np.array(["ROM" in bram_type.name for bram_type in types], dtype=bool),
+            sdp_fifo=np.array(["SDP" in bram_type.name or "FIFO" in bram_type.name for bram_type in types], dtype=bool),
+            fifo=np.array(["FIFO" in bram_type.name for bram_type in types], dtype=bool),
+            single_port=np.array([bram_type in (BRAM_Type.BRAM_18K_SP, BRAM_Type.BRAM_36K_SP) for bram_type in types], dtype=bool),
+            capacity=np.array([BRAM(type=bram_type).get_bram_capacity() for bram_type in types], dtype=np.int64),
+            cleared=np.array(cleared, dtype=bool))
+
+@dataclass
+class BRAM_Columns:
+    type : np.ndarray
+    enable : np.ndarray
+    bram_used : np.ndarray
+    ports : Dict[str, np.ndarray]
+    clock_a : np.ndarray
+    clock_b : np.ndarray
+    clocks : List[Any] = field(default_factory=list)
+
+    @staticmethod
+    def build(items: List[BRAM], get_clock: Callable[[str], Optional[Any]]) -> 'BRAM_Columns':
+        # clocks are resolved once per name, index -1 means clock not found
+        clocks, clock_indexes = [], {}
+        def get_clock_index(name: str) -> int:
+            if name not in clock_indexes:
+                clock = get_clock(name)
+                clock_indexes[name] = -1 if clock is None else len(clocks)
+                if clock is not None:
+                    clocks.append(clock)
+            return clock_indexes[name]
+        ports = {}
+        for name in BRAM_DEFAULT_PORT_PROPERTIES + ('port_a.width', 'port_a.toggle_rate'):
+            port, prop = name.split('.')
+            ports[name] = np.array([getattr(getattr(item, port), prop) for item in items], dtype=np.float64)
+        return BRAM_Columns(
+            type=np.array([item.type.value for item in items], dtype=np.int64),
+            enable=np.array([item.enable != False for item in items], dtype=bool),
+            bram_used=np.array([item.bram_used for item in items], dtype=np.float64),
+            ports=ports,
+            clock_a=np.array([get_clock_index(item.port_a.clock) for item in items], dtype=np.int64),
+            clock_b=np.array([get_clock_index(item.port_b.clock) for item in items], dtype=np.int64),
+            clocks=clocks)
+
+    def get_clock_errors(self, flags: BRAM_TypeFlags) -> Tuple[np.ndarray, np.ndarray]:
+        return self.clock_a < 0, (self.clock_b < 0) & ~flags.single_port[self.type]
+
+    def compute(self, flags: BRAM_TypeFlags, WRITE_CAP, READ_CAP, INT_CAP, FIFO_CAP):
+        # same operation order as BRAM.compute_dynamic_power so that results are bit-identical
+        error_a, error_b = self.get_clock_errors(flags)
+        active = ~error_a & ~error_b & self.enable
+        frequencies = np.array([clock.frequency for clock in self.clocks] + [0], dtype=np.float64)
+        freq_a = np.where(active, frequencies[self.clock_a] / 1000000.0, 0.0)
+        freq_b = np.where(active, frequencies[self.clock_b] / 1000000.0, 0.0)
+
+        # apply the per type default port properties
+        cleared = flags.cleared[self.type] & active[:, None]
+        ports = { name: np.where(cleared[:, i], 0.0, self.ports[name]) for i, name in enumerate(BRAM_DEFAULT_PORT_PROPERTIES) }
+        a_width, a_write_rate, a_read_rate, a_toggle_rate = self.ports['port_a.width'], ports['port_a.write_enable_rate'], \
+            ports['port_a.read_enable_rate'], self.ports['port_a.toggle_rate']
+        b_width, b_write_rate, b_read_rate, b_toggle_rate = ports['port_b.width'], ports['port_b.write_enable_rate'], \
+            ports['port_b.read_enable_rate'], ports['port_b.toggle_rate']
+
+        a_signal_rate = a_write_rate * a_toggle_rate * freq_a
+        b_signal_rate = b_write_rate * b_toggle_rate * freq_b
+
+        a_write = a_width * a_write_rate * a_toggle_rate * freq_a * WRITE_CAP
+        a_read = a_width * a_read_rate * a_toggle_rate * freq_a * READ_CAP
+        a_int = a_width * a_read_rate * a_toggle_rate * freq_a * INT_CAP
+        b_write = b_width * b_write_rate * b_toggle_rate * freq_b * WRITE_CAP
+        b_read = b_width * b_read_rate * b_toggle_rate * freq_b * READ_CAP
+        b_int = b_width * b_read_rate * b_toggle_rate * freq_b * INT_CAP
+        fifo = (freq_a * a_write_rate + freq_b * b_write_rate) * FIFO_CAP
+
+        rom = flags.rom[self.type]
+        a_write, a_int, b_write, b_read, b_int, fifo = (np.where(rom, 0.0, value) for value in \
+            (a_write, a_int, b_write, b_read, b_int, fifo))
+
+        interconnect_power = np.where(flags.sdp_fifo[self.type], (a_int + b_int) * self.bram_used, 0.0)
+        block_power = (a_write + a_read + b_write + b_read) * self.bram_used
+        block_power = np.where(flags.fifo[self.type], block_power + fifo, block_power)
+
+        zeros = np.zeros(len(active))
+        return active, cleared, np.where(active, a_signal_rate, zeros), np.where(active, b_signal_rate, zeros), \
+            np.where(active, block_power, zeros), np.where(active, interconnect_power, zeros)
+
 class BRAM_SubModule:
+    # compute all rows in one vectorized pass, the scalar per-row path is kept for reference
+    columnar: bool = True
+    type_flags: BRAM_TypeFlags = None
 
     def __init__(self, resources: RsDeviceResources, itemlist: List[BRAM] = None):
         self.resources = resources
@@ -185,6 +298,7 @@ class BRAM_SubModule:
         self.total_interconnect_power = 0.0
         self.total_block_power = 0.0
         self.itemlist: List[BRAM] = itemlist or []
+        self.dirty = True
 
         # Read dynamic power calculation coeffs
         if self.total_36k_bram_available > 0 and self.total_18k_bram_available > 0:
@@ -220,6 +334,12 @@ class BRAM_SubModule:
     def get_all(self):
         return self.itemlist
 
+    def is_dirty(self) -> bool:
+        return self.dirty
+
+    def set_dirty(self, dirty: bool = True) -> None:
+        self.dirty = dirty
+
     def get(self, idx):
         if 0 <= idx < len(self.itemlist):
             return self.itemlist[idx]
@@ -228,57 +348,107 @@ class BRAM_SubModule:
     def add(self, data):
         item = update_attributes(BRAM(), data)
         self.itemlist.append(item)
+        self.dirty = True
         return item
 
     def update(self, idx, data):
         item = update_attributes(self.get(idx), data)
+        self.dirty = True
         return item
 
     def remove(self, idx):
         if 0 <= idx < len(self.itemlist):
+            self.dirty = True
             return self.itemlist.pop(idx)
         raise BramNotFoundException
 
+    def insert(self, idx, item):
+        # put back a row previously removed (e.g. batch rollback)
+        self.itemlist.insert(idx, item)
+        self.dirty = True
+        return item
+
     def clear(self) -> None:
         self.itemlist.clear()
+        self.dirty = True
 
-    def compute_output_power(self):
-        # Compute the total power consumption of all clocks
-        self.total_block_power = 0.0
-        self.total_interconnect_power = 0.0
+    def compute_output_power(self, items: List[BRAM] = None):
+        # Compute the power consumption for each individual items (or the given subset only)
+        items = self.itemlist if items is None else items
+        if self.columnar:
+            self.compute_columns(items)
+        else:
+            for item in items:
+                item.compute_dynamic_power(self.resources.get_clock(item.port_a.clock), self.resources.get_clock(item.port_b.clock), \
+                    self.BRAM_WRITE_CAP, self.BRAM_READ_CAP, self.BRAM_INT_CAP, self.BRAM_FIFO_CAP)
 
-        # Compute the power consumption for each individual items
-        for item in self.itemlist:
-            item.compute_dynamic_power(self.resources.get_clock(item.port_a.clock), self.resources.get_clock(item.port_b.clock), \
-                self.BRAM_WRITE_CAP, self.BRAM_READ_CAP, self.BRAM_INT_CAP, self.BRAM_FIFO_CAP)
-            self.total_interconnect_power += item.output.interconnect_power
-            self.total_block_power += item.output.block_power
+        # Compute the total power consumption of all items (cumsum adds in the same order as a loop)
+        block_power = np.array([item.output.block_power for item in self.itemlist], dtype=np.float64)
+        interconnect_power = np.array([item.output.interconnect_power for item in self.itemlist], dtype=np.float64)
+        self.total_block_power = float(np.cumsum(block_power)[-1]) if len(block_power) else 0.0
+        self.total_interconnect_power = float(np.cumsum(interconnect_power)[-1]) if len(interconnect_power) else 0.0
 
         # update individual clock percentage
         total_power = self.total_block_power + self.total_interconnect_power
-        for item in self.itemlist:
-            item.compute_percentage(total_power)
+        if total_power > 0:
+            percentages = ((block_power + interconnect_power) / total_power * 100).tolist()
+        else:
+            percentages = [0] * len(self.itemlist)
+        for item, percentage in zip(self.itemlist, percentages):
+            item.output.percentage = percentage
+
+    def compute_columns(self, items: List[BRAM]):
+        if BRAM_SubModule.type_flags is None:
+            BRAM_SubModule.type_flags = BRAM_TypeFlags.build()
+        flags = BRAM_SubModule.type_flags
+        columns = BRAM_Columns.build(items, self.resources.get_clock)
+        error_a, error_b = columns.get_clock_errors(flags)
+        active, cleared, a_signal_rate, b_signal_rate, block_power, interconnect_power = columns.compute(flags, \
+            self.BRAM_WRITE_CAP, self.BRAM_READ_CAP, self.BRAM_INT_CAP, self.BRAM_FIFO_CAP)
+        capacity = flags.capacity[columns.type].tolist()
+
+        # write the results back to the rows, messages are only generated for the rows in error or disabled
+        for item, clock_a, clock_b, has_error_a, has_error_b, is_active, clear, depth, a_rate, b_rate, block, interconnect in zip(items, \
+                columns.clock_a.tolist(), columns.clock_b.tolist(), error_a.tolist(), error_b.tolist(), active.tolist(), \
+                cleared.tolist(), capacity, a_signal_rate.tolist(), b_signal_rate.tolist(), block_power.tolist(), \
+                interconnect_power.tolist()):
+            output = item.output
+            output.messages.clear()
+            output.block_power = block
+            output.interconnect_power = interconnect
+            output.port_a.output_signal_rate = a_rate
+            output.port_b.output_signal_rate = b_rate
+            output.port_a.clock_frequency = 0 if clock_a < 0 else columns.clocks[clock_a].frequency
+            output.port_b.clock_frequency = 0 if clock_b < 0 else columns.clocks[clock_b].frequency
+            if has_error_a:
+                output.messages.append(RsMessageManager.get_message(302))
+            if has_error_b:
+                output.messages.append(RsMessageManager.get_message(303))
+            if is_active:
+                output.port_a.ram_depth = output.port_b.ram_depth = depth
+                if any(clear):
+                    for name, value in zip(BRAM_DEFAULT_PORT_PROPERTIES, clear):
+                        if value:
+                            port, prop = name.split('.')
+                            setattr(getattr(item, port), prop, 0)
+            elif not (has_error_a or has_error_b):
+                output.messages.append(RsMessageManager.get_message(104))
 
     def compute_static_power(self, temperature: float, scenario: ScenarioType) -> List[PowerValue]:
         mylist = []
 
         if self.total_36k_bram_available > 0 and self.total_18k_bram_available > 0:
-            for rail_type, scene_list in self.resources.powercfg.get_polynomial(ElementType.BRAM, scenario):
-                total_power = 0.0
-                for s in scene_list:
-                    power = np.polyval(s.coeffs, temperature) * s.factor
-                    power = power * self.total_36k_bram_available
-                    total_power += power
-                    # debug info
-                    log(f'[BRAM] {rail_type = }', RsLogLevel.DEBUG)
-                    log(f'[BRAM]   {temperature = }', RsLogLevel.DEBUG)
-                    log(f'[BRAM]   {scenario = }', RsLogLevel.DEBUG)
-                    log(f'[BRAM]   {s.coeffs = }', RsLogLevel.DEBUG)
-                    log(f'[BRAM]   {s.factor = }', RsLogLevel.DEBUG)
-                    log(f'[BRAM]   {self.total_36k_bram_available = }', RsLogLevel.DEBUG)
-                    log(f'[BRAM]   {self.total_18k_bram_available = }', RsLogLevel.DEBUG)
-                    log(f'[BRAM]   {power = }', RsLogLevel.DEBUG)
-                    log(f'[BRAM]   {total_power = }', RsLogLevel.DEBUG)
-                mylist.append(PowerValue(type=rail_type, value=total_power))
+            table = self.resources.powercfg.get_static_power_table(ElementType.BRAM, scenario)
+            powers = table.compute(temperature, self.total_36k_bram_available)
+            for rail_type, total_power in zip(table.rail_types, powers):
+                # debug info
+                if trace_enabled():
+                    trace(f'[BRAM] {rail_type = }')
+                    trace(f'[BRAM]   {temperature = }')
+                    trace(f'[BRAM]   {scenario = }')
+                    trace(f'[BRAM]   {self.total_36k_bram_available = }')
+                    trace(f'[BRAM]   {self.total_18k_bram_available = }')
+                    trace(f'[BRAM]   {total_power = }')
+                mylist.append(PowerValue(type=rail_type, value=float(total_power)))
 
         return mylist
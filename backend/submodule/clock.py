@@ -3,14 +3,13 @@
 #  Authorized use only
 #
 from dataclasses import dataclass, field
-from typing import List
-import numpy as np
+from typing import Dict, List, Set
 from utilities.common_utils import RsEnum, update_attributes
 from .rs_device_resources import ModuleType, ClockNotFoundException, ClockDescriptionPortValidationException, \
     ClockMaxCountReachedException, RsDeviceResources
 from .rs_message import RsMessage, RsMessageManager
 from .rs_power_config import ElementType, PowerValue, ScenarioType
-from .rs_logger import RsLogLevel, log
+from .rs_logger import trace, trace_enabled
 
 class Clock_State(RsEnum):
     ACTIVE = 1, "Active"
@@ -75,6 +74,10 @@ class Clock_SubModule:
         self.total_interconnect_power = 0.0
         self.total_pll_power = 0.0
         self.itemlist: List[Clock] = itemlist or []
+        self.dirty = True
+        self.modified_clocks: Set[str] = set()
+        self.clock_index: Dict[str, Clock] = {}
+        self.update_clock_index()
 
     def get_total_output_power(self) -> float:
         return sum(self.get_power_consumption())
@@ -90,6 +93,29 @@ class Clock_SubModule:
 
     def get_all(self):
         return self.itemlist
+
+    def is_dirty(self) -> bool:
+        return self.dirty
+
+    def set_dirty(self, dirty: bool = True) -> None:
+        self.dirty = dirty
+        if not dirty:
+            self.modified_clocks = set()
+        else:
+            # rows may have been replaced in place (e.g. batch rollback)
+            self.update_clock_index()
+
+    def update_clock_index(self) -> None:
+        # index clocks by port name, the first clock in the list wins if port names are duplicated
+        self.clock_index = {}
+        for item in self.itemlist:
+            self.clock_index.setdefault(item.port, item)
+
+    def get_clock_by_port(self, port: str) -> Clock:
+        return self.clock_index.get(port)
+
+    def get_modified_clocks(self) -> Set[str]:
+        return self.modified_clocks
     
     def get(self, idx):
         if 0 <= idx < len(self.itemlist):
@@ -105,19 +131,41 @@ class Clock_SubModule:
             raise ClockMaxCountReachedException
         item = update_attributes(Clock(), data)
         self.itemlist.append(item)
+        self.clock_index.setdefault(item.port, item)
+        self.modified_clocks.add(item.port)
+        self.dirty = True
         return item
 
     def remove(self, idx):
         if 0 <= idx < len(self.itemlist):
             item = self.itemlist.pop(idx)
+            self.update_clock_index()
+            self.modified_clocks.add(item.port)
+            self.dirty = True
             return item
         raise ClockNotFoundException
 
+    def insert(self, idx, item):
+        # put back a row previously removed (e.g. batch rollback)
+        self.itemlist.insert(idx, item)
+        self.update_clock_index()
+        self.modified_clocks.add(item.port)
+        self.dirty = True
+        return item
+
     def clear(self) -> None:
+        self.modified_clocks.update([item.port for item in self.itemlist])
         self.itemlist.clear()
+        self.clock_index = {}
+        self.dirty = True
 
     def update(self, idx, data):
+        # track both old and new port name in case of the clock being renamed
+        self.modified_clocks.add(self.get(idx).port)
         item = update_attributes(self.get(idx), data)
+        self.update_clock_index()
+        self.modified_clocks.add(item.port)
+        self.dirty = True
         return item
 
     def get_total_clock_used(self):
@@ -139,21 +187,13 @@ class Clock_SubModule:
         total_fanout = 0
 
         # fabric logic element
-        if (mod := self.resources.get_module(ModuleType.FABRIC_LE)) is not None:
-            total_fanout += sum(item.flip_flop for item in mod.get_all() \
-                if item.clock == clock)
+        total_fanout += sum(item.flip_flop for item in self.resources.get_clock_consumers(clock, ModuleType.FABRIC_LE))
 
-        # bram
-        if (mod := self.resources.get_module(ModuleType.BRAM)) is not None:
-            total_fanout += sum(item.bram_used for item in mod.get_all() \
-                if item.port_a.clock == clock)
-            total_fanout += sum(item.bram_used for item in mod.get_all() \
-                if item.port_b.clock == clock)
+        # bram (indexed once for each of port a & b using the clock)
+        total_fanout += sum(item.bram_used for item in self.resources.get_clock_consumers(clock, ModuleType.BRAM))
 
         # dsp
-        if (mod := self.resources.get_module(ModuleType.DSP)) is not None:
-            total_fanout += sum(item.number_of_multipliers for item in mod.get_all() \
-                if item.clock == clock)
+        total_fanout += sum(item.number_of_multipliers for item in self.resources.get_clock_consumers(clock, ModuleType.DSP))
 
         # io
         # todo: There is an excel formula logical error to calculate the fanout.
@@ -167,6 +207,10 @@ class Clock_SubModule:
 
         return total_fanout
 
+    def get_clock_fanouts(self) -> Dict[str, int]:
+        # fanout of the clocks of this module, looked up in the clock consumers index (see get_clock_fanout)
+        return { item.port: self.get_clock_fanout(item.port) for item in self.itemlist }
+
     def compute_output_power(self):
         # Get device power coefficients
         VCC_CORE    = self.resources.get_VCC_CORE()
@@ -184,8 +228,9 @@ class Clock_SubModule:
         self.total_pll_power = self.get_total_pll_used() * ((PLL_INT * VCC_CORE ** 2) + (PLL_AUX * VCC_AUX ** 2))
         
         # Compute the power consumption for each individual clocks
+        fanouts = self.get_clock_fanouts()
         for item in self.itemlist:
-            item.compute_dynamic_power(self.get_clock_fanout(item.port), CLK_CAP, CLK_INT_CAP)
+            item.compute_dynamic_power(fanouts.get(item.port, 0), CLK_CAP, CLK_INT_CAP)
             self.total_interconnect_power += item.output.interconnect_power
             self.total_block_power += item.output.block_power
 
@@ -198,20 +243,16 @@ class Clock_SubModule:
         VCC_AUX = self.resources.get_VCC_AUX()
         mylist = []
 
-        for rail_type, scene_list in self.resources.powercfg.get_polynomial(ElementType.CLOCKING, scenario):
-            total_power = 0.0
-            for s in scene_list:
-                power = np.polyval(s.coeffs, temperature) * s.factor * VCC_AUX
-                total_power += power
-                # debug info
-                log(f'[CLOCK] {rail_type = }', RsLogLevel.DEBUG)
-                log(f'[CLOCK]   {temperature = }', RsLogLevel.DEBUG)
-                log(f'[CLOCK]   {scenario = }', RsLogLevel.DEBUG)
-                log(f'[CLOCK]   {s.coeffs = }', RsLogLevel.DEBUG)
-                log(f'[CLOCK]   {s.factor = }', RsLogLevel.DEBUG)
-                log(f'[CLOCK]   {VCC_AUX = }', RsLogLevel.DEBUG)
-                log(f'[CLOCK]   {power = }', RsLogLevel.DEBUG)
-                log(f'[CLOCK]   {total_power = }', RsLogLevel.DEBUG)
-            mylist.append(PowerValue(type=rail_type, value=total_power))
+        table = self.resources.powercfg.get_static_power_table(ElementType.CLOCKING, scenario)
+        powers = table.compute(temperature, VCC_AUX)
+        for rail_type, total_power in zip(table.rail_types, powers):
+            # debug info
+            if trace_enabled():
+                trace(f'[CLOCK] {rail_type = }')
+                trace(f'[CLOCK]   {temperature = }')
+                trace(f'[CLOCK]   {scenario = }')
+                trace(f'[CLOCK]   {VCC_AUX = }')
+                trace(f'[CLOCK]   {total_power = }')
+            mylist.append(PowerValue(type=rail_type, value=float(total_power)))
 
         return mylist
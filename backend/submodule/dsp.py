@@ -4,12 +4,12 @@
 #
 import numpy as np
 from dataclasses import dataclass, field
-from typing import List
+from typing import Any, Callable, List, Optional
 from utilities.common_utils import RsEnum, update_attributes
 from .rs_device_resources import DspNotFoundException, RsDeviceResources
 from .rs_message import RsMessage, RsMessageManager
 from .rs_power_config import ElementType, PowerValue, ScenarioType
-from .rs_logger import RsLogLevel, log
+from .rs_logger import trace, trace_enabled
 
 class Pipelining(RsEnum):
     INPUT_AND_OUTPUT = 0, "Input and Output"
@@ -104,7 +104,75 @@ class DSP:
             # interconnect_power = VCC_CORE^2 * output_signal_rate * no. of multipliers * (a-input width + b-input width) * DSP_INT_CAP
             self.output.interconnect_power = VCC_CORE ** 2 * self.output.output_signal_rate * self.number_of_multipliers * (self.a_input_width + self.b_input_width) * DSP_INT_CAP
 
+@dataclass
+class DSP_Columns:
+    enable : np.ndarray
+    number_of_multipliers : np.ndarray
+    dsp_mode : np.ndarray
+    a_input_width : np.ndarray
+    b_input_width : np.ndarray
+    pipelining : np.ndarray
+    toggle_rate : np.ndarray
+    clock_index : np.ndarray
+    clocks : List[Any] = field(default_factory=list)
+
+    @staticmethod
+    def build(items: List[DSP], get_clock: Callable[[str], Optional[Any]]) -> 'DSP_Columns':
+        # clocks are resolved once per name, index -1 means clock not found
+        clocks, clock_indexes, clock_index = [], {}, []
+        for item in items:
+            if item.clock not in clock_indexes:
+                clock = get_clock(item.clock)
+                clock_indexes[item.clock] = -1 if clock is None else len(clocks)
+                if clock is not None:
+                    clocks.append(clock)
+            clock_index.append(clock_indexes[item.clock])
+        return DSP_Columns(
+            enable=np.array([item.enable != False for item in items], dtype=bool),
+            number_of_multipliers=np.array([item.number_of_multipliers for item in items], dtype=np.float64),
+            dsp_mode=np.array([item.dsp_mode.value for item in items], dtype=np.int64),
+            a_input_width=np.array([item.a_input_width for item in items], dtype=np.float64),
+            b_input_width=np.array([item.b_input_width for item in items], dtype=np.float64),
+            pipelining=np.array([item.pipelining.value for item in items], dtype=np.int64),
+            toggle_rate=np.array([item.toggle_rate for item in items], dtype=np.float64),
+            clock_index=np.array(clock_index, dtype=np.int64),
+            clocks=clocks)
+
+    def compute(self, VCC_CORE, DSP_MULT_CAP, DSP_MULT_CAP2, DSP_INT_CAP):
+        # same operation order as DSP.compute_dynamic_power so that results are bit-identical
+        frequencies = np.array([clock.frequency for clock in self.clocks] + [0], dtype=np.float64)
+        active = (self.clock_index >= 0) & self.enable
+        clock_mhz = np.where(active, frequencies[self.clock_index] / 1000000.0, 0.0)
+        multiply = self.dsp_mode == DSP_Mode.MULTIPLY.value
+        multiply_accumulate = self.dsp_mode == DSP_Mode.MULTIPLY_ACCUMULATE.value
+        input_only = self.pipelining == Pipelining.INPUT_ONLY.value
+        output_only = self.pipelining == Pipelining.OUTPUT_ONLY.value
+        input_registered = (self.pipelining == Pipelining.INPUT_AND_OUTPUT.value) | input_only
+        output_registered = (self.pipelining == Pipelining.INPUT_AND_OUTPUT.value) | output_only
+
+        dsp_blocks_used = self.number_of_multipliers * np.where((self.a_input_width < 10) & (self.b_input_width < 11), 0.5, 1.0)
+
+        signal_rate = clock_mhz * self.toggle_rate
+        output_signal_rate = np.where(output_registered | multiply_accumulate, signal_rate,
+                                      np.where(input_only, signal_rate * 1.15, signal_rate * 1.25))
+        multiplier_signal_rate = signal_rate * np.where(input_registered, 1.0, 1.2)
+        block_factor = np.where((self.a_input_width <= 9) & (self.b_input_width <= 10), 2.0, 1.0)
+        factor = np.where(input_registered, 1.0, 1.15)
+
+        vcc2 = VCC_CORE ** 2
+        width = self.a_input_width + self.b_input_width
+        p1 = vcc2 * multiplier_signal_rate * DSP_MULT_CAP * self.number_of_multipliers * width
+        block_power = np.where(multiply, p1 * factor / block_factor,
+                               p1 + self.number_of_multipliers * clock_mhz * DSP_MULT_CAP2 * factor / block_factor)
+        interconnect_power = vcc2 * output_signal_rate * self.number_of_multipliers * width * DSP_INT_CAP
+
+        zeros = np.zeros(len(active))
+        return np.where(active, dsp_blocks_used, zeros), np.where(active, output_signal_rate, zeros), \
+            np.where(active, block_power, zeros), np.where(active, interconnect_power, zeros)
+
 class DSP_SubModule:
+    # compute all rows in one vectorized pass, the scalar per-row path is kept for reference
+    columnar: bool = True
 
     def __init__(self, resources: RsDeviceResources, itemlist: List[DSP] = None):
         self.resources = resources
@@ -112,6 +180,7 @@ class DSP_SubModule:
         self.total_interconnect_power = 0.0
         self.total_block_power = 0.0
         self.itemlist: List[DSP] = itemlist or []
+        self.dirty = True
 
         # Read power calculation coeffs
         if self.total_dsp_blocks_available > 0:
@@ -144,6 +213,12 @@ class DSP_SubModule:
     def get_all(self):
         return self.itemlist
 
+    def is_dirty(self) -> bool:
+        return self.dirty
+
+    def set_dirty(self, dirty: bool = True) -> None:
+        self.dirty = dirty
+
     def get(self, idx):
         if 0 <= idx < len(self.itemlist):
             return self.itemlist[idx]
@@ -152,56 +227,93 @@ class DSP_SubModule:
     def add(self, data):
         item = update_attributes(DSP(), data)
         self.itemlist.append(item)
+        self.dirty = True
         return item
 
     def update(self, idx, data):
         item = update_attributes(self.get(idx), data)
+        self.dirty = True
         return item
 
     def remove(self, idx):
         if 0 <= idx < len(self.itemlist):
             item = self.itemlist.pop(idx)
+            self.dirty = True
             return item
         raise DspNotFoundException
 
+    def insert(self, idx, item):
+        # put back a row previously removed (e.g. batch rollback)
+        self.itemlist.insert(idx, item)
+        self.dirty = True
+        return item
+
     def clear(self) -> None:
         self.itemlist.clear()
+        self.dirty = True
 
-    def compute_output_power(self):
-        # Compute the total power consumption of all clocks
-        self.total_block_power = 0.0
-        self.total_interconnect_power = 0.0
+    def compute_output_power(self, items: List[DSP] = None):
+        # Compute the power consumption for each individual items (or the given subset only)
+        items = self.itemlist if items is None else items
+        if self.columnar:
+            self.compute_columns(items)
+        else:
+            for item in items:
+                item.compute_dynamic_power(self.resources.get_clock(item.clock), self.VCC_CORE, self.DSP_MULT_CAP, self.DSP_MULT_CAP2, self.DSP_INT_CAP)
 
-        # Compute the power consumption for each individual items
-        for item in self.itemlist:
-            item.compute_dynamic_power(self.resources.get_clock(item.clock), self.VCC_CORE, self.DSP_MULT_CAP, self.DSP_MULT_CAP2, self.DSP_INT_CAP)
-            self.total_interconnect_power += item.output.interconnect_power
-            self.total_block_power += item.output.block_power
+        # Compute the total power consumption of all items (cumsum adds in the same order as a loop)
+        block_power = np.array([item.output.block_power for item in self.itemlist], dtype=np.float64)
+        interconnect_power = np.array([item.output.interconnect_power for item in self.itemlist], dtype=np.float64)
+        self.total_block_power = float(np.cumsum(block_power)[-1]) if len(block_power) else 0.0
+        self.total_interconnect_power = float(np.cumsum(interconnect_power)[-1]) if len(interconnect_power) else 0.0
 
         # update individual clock percentage
         total_power = self.total_block_power + self.total_interconnect_power
-        for item in self.itemlist:
-            item.compute_percentage(total_power)
+        if total_power > 0:
+            percentages = ((block_power + interconnect_power) / total_power * 100.0).tolist()
+        else:
+            percentages = [0.0] * len(self.itemlist)
+        for item, percentage in zip(self.itemlist, percentages):
+            item.output.percentage = percentage
+
+    def compute_columns(self, items: List[DSP]):
+        columns = DSP_Columns.build(items, self.resources.get_clock)
+        dsp_blocks_used, output_signal_rate, block_power, interconnect_power = columns.compute(self.VCC_CORE, \
+            self.DSP_MULT_CAP, self.DSP_MULT_CAP2, self.DSP_INT_CAP)
+
+        # write the results back to the rows
+        for item, clock_index, enable, blocks, rate, block, interconnect in zip(items, columns.clock_index.tolist(), \
+                columns.enable.tolist(), dsp_blocks_used.tolist(), output_signal_rate.tolist(), block_power.tolist(), \
+                interconnect_power.tolist()):
+            output = item.output
+            output.messages.clear()
+            output.dsp_blocks_used = blocks
+            output.output_signal_rate = rate
+            output.block_power = block
+            output.interconnect_power = interconnect
+            if clock_index < 0:
+                output.clock_frequency = 0
+                output.messages.append(RsMessageManager.get_message(301, { 'clock': item.clock }))
+            elif not enable:
+                output.clock_frequency = 0
+                output.messages.append(RsMessageManager.get_message(102))
+            else:
+                output.clock_frequency = columns.clocks[clock_index].frequency
 
     def compute_static_power(self, temperature: float, scenario: ScenarioType) ->  List[PowerValue]:
         mylist = []
 
         if self.total_dsp_blocks_available > 0:
-            for rail_type, scene_list in self.resources.powercfg.get_polynomial(ElementType.DSP, scenario):
-                total_power = 0.0
-                for s in scene_list:
-                    power = np.polyval(s.coeffs, temperature) * s.factor
-                    power = power * self.total_dsp_blocks_available
-                    total_power += power
-                    # debug info
-                    log(f'[DSP] {rail_type = }', RsLogLevel.DEBUG)
-                    log(f'[DSP]   {temperature = }', RsLogLevel.DEBUG)
-                    log(f'[DSP]   {scenario = }', RsLogLevel.DEBUG)
-                    log(f'[DSP]   {s.coeffs = }', RsLogLevel.DEBUG)
-                    log(f'[DSP]   {s.factor = }', RsLogLevel.DEBUG)
-                    log(f'[DSP]   {self.total_dsp_blocks_available = }', RsLogLevel.DEBUG)
-                    log(f'[DSP]   {power = }', RsLogLevel.DEBUG)
-                    log(f'[DSP]   {total_power = }', RsLogLevel.DEBUG)
-                mylist.append(PowerValue(type=rail_type, value=total_power))
+            table = self.resources.powercfg.get_static_power_table(ElementType.DSP, scenario)
+            powers = table.compute(temperature, self.total_dsp_blocks_available)
+            for rail_type, total_power in zip(table.rail_types, powers):
+                # debug info
+                if trace_enabled():
+                    trace(f'[DSP] {rail_type = }')
+                    trace(f'[DSP]   {temperature = }')
+                    trace(f'[DSP]   {scenario = }')
+                    trace(f'[DSP]   {self.total_dsp_blocks_available = }')
+                    trace(f'[DSP]   {total_power = }')
+                mylist.append(PowerValue(type=rail_type, value=float(total_power)))
 
         return mylist
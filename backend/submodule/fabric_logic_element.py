@@ -4,12 +4,12 @@
 #
 import numpy as np
 from dataclasses import dataclass, field
-from typing import Dict, List
+from typing import Any, Callable, Dict, List, Optional
 from utilities.common_utils import RsEnum, update_attributes
 from .rs_device_resources import FabricLeNotFoundException, FabricLeDescriptionAlreadyExistsException, RsDeviceResources
 from .rs_message import RsMessage, RsMessageManager
 from .rs_power_config import ElementType, ScenarioType, PowerValue
-from .rs_logger import RsLogLevel, log
+from .rs_logger import trace, trace_enabled
 
 class Glitch_Factor(RsEnum):
     TYPICAL = 0, "Typical"
@@ -92,7 +92,58 @@ class Fabric_LE:
             p2 = VCC_CORE ** 2 * self.flip_flop * self.output.output_signal_rate * FF_INT_CAP
             self.output.interconnect_power = p1 + p2
         
+@dataclass
+class Fabric_LE_Columns:
+    lut6 : np.ndarray
+    flip_flop : np.ndarray
+    toggle_rate : np.ndarray
+    clock_enable_rate : np.ndarray
+    glitch_factor : np.ndarray
+    enable : np.ndarray
+    clock_index : np.ndarray
+    clocks : List[Any] = field(default_factory=list)
+
+    @staticmethod
+    def build(items: List[Fabric_LE], get_clock: Callable[[str], Optional[Any]]) -> 'Fabric_LE_Columns':
+        # clocks are resolved once per name, index -1 means clock not found
+        clocks, clock_indexes, clock_index = [], {}, []
+        for item in items:
+            if item.clock not in clock_indexes:
+                clock = get_clock(item.clock)
+                clock_indexes[item.clock] = -1 if clock is None else len(clocks)
+                if clock is not None:
+                    clocks.append(clock)
+            clock_index.append(clock_indexes[item.clock])
+        return Fabric_LE_Columns(
+            lut6=np.array([item.lut6 for item in items], dtype=np.float64),
+            flip_flop=np.array([item.flip_flop for item in items], dtype=np.float64),
+            toggle_rate=np.array([item.toggle_rate for item in items], dtype=np.float64),
+            clock_enable_rate=np.array([item.clock_enable_rate for item in items], dtype=np.float64),
+            glitch_factor=np.array([item.get_glitch_factor() for item in items], dtype=np.float64),
+            enable=np.array([item.enable != False for item in items], dtype=bool),
+            clock_index=np.array(clock_index, dtype=np.int64),
+            clocks=clocks)
+
+    def compute(self, VCC_CORE, LUT_CAP, FF_CAP, FF_CLK_CAP, LUT_INT_CAP, FF_INT_CAP):
+        # same operation order as Fabric_LE.compute_dynamic_power so that results are bit-identical
+        frequencies = np.array([clock.frequency for clock in self.clocks] + [0], dtype=np.float64)
+        active = (self.clock_index >= 0) & self.enable
+        clock_mhz = np.where(active, frequencies[self.clock_index] / 1000000.0, 0.0)
+        output_signal_rate = np.where(self.lut6 > 0, clock_mhz * self.toggle_rate * self.clock_enable_rate,
+                                      np.where(self.flip_flop > 0, clock_mhz * self.toggle_rate, 0.0))
+        vcc2 = VCC_CORE ** 2
+        lut_rate = vcc2 * self.lut6 * output_signal_rate
+        ff_rate = vcc2 * self.flip_flop * output_signal_rate
+        block_power = lut_rate * LUT_CAP * self.glitch_factor + ff_rate * FF_CAP + \
+            vcc2 * self.flip_flop * clock_mhz * self.clock_enable_rate * FF_CLK_CAP
+        interconnect_power = lut_rate * LUT_INT_CAP * self.glitch_factor + ff_rate * FF_INT_CAP
+        zeros = np.zeros(len(active))
+        return np.where(active, output_signal_rate, zeros), np.where(active, block_power, zeros), \
+            np.where(active, interconnect_power, zeros)
+
 class Fabric_LE_SubModule:
+    # compute all rows in one vectorized pass, the scalar per-row path is kept for reference
+    columnar: bool = True
 
     def __init__(self, resources: RsDeviceResources, itemlist: List[Fabric_LE] = None):
         self.resources = resources
@@ -101,6 +152,7 @@ class Fabric_LE_SubModule:
         self.total_block_power = 0.0
         self.total_interconnect_power = 0.0
         self.itemlist: List[Fabric_LE] = itemlist or []
+        self.dirty = True
 
     def get_total_output_power(self) -> float:
         return sum(self.get_power_consumption())
@@ -121,6 +173,12 @@ class Fabric_LE_SubModule:
 
     def get_all(self):
         return self.itemlist
+
+    def is_dirty(self) -> bool:
+        return self.dirty
+
+    def set_dirty(self, dirty: bool = True) -> None:
+        self.dirty = dirty
     
     def get(self, idx):
         if 0 <= idx < len(self.itemlist):
@@ -133,22 +191,32 @@ class Fabric_LE_SubModule:
             raise FabricLeDescriptionAlreadyExistsException
         item = update_attributes(Fabric_LE(), data)
         self.itemlist.append(item)
+        self.dirty = True
         return item
     
     def remove(self, idx):
         if 0 <= idx < len(self.itemlist):
             item = self.itemlist.pop(idx)
+            self.dirty = True
             return item
         raise FabricLeNotFoundException
 
+    def insert(self, idx, item):
+        # put back a row previously removed (e.g. batch rollback)
+        self.itemlist.insert(idx, item)
+        self.dirty = True
+        return item
+
     def clear(self) -> None:
         self.itemlist.clear()
+        self.dirty = True
 
     def update(self, idx, data):
         item = update_attributes(self.get(idx), data)
+        self.dirty = True
         return item
 
-    def compute_output_power(self):
+    def compute_output_power(self, items: List[Fabric_LE] = None):
         # Get device power coefficients
         VCC_CORE    = self.resources.get_VCC_CORE()
         LUT_CAP     = self.resources.get_LUT_CAP()
@@ -157,40 +225,65 @@ class Fabric_LE_SubModule:
         FF_CLK_CAP  = self.resources.get_FF_CLK_CAP()
         FF_INT_CAP  = self.resources.get_FF_INT_CAP()
 
-        # Compute the total power consumption of all logic elements
-        self.total_block_power = 0.0
-        self.total_interconnect_power = 0.0
+        # Compute the power consumption for each individual logic element (or the given subset only)
+        items = self.itemlist if items is None else items
+        if self.columnar:
+            self.compute_columns(items, VCC_CORE, LUT_CAP, FF_CAP, FF_CLK_CAP, LUT_INT_CAP, FF_INT_CAP)
+        else:
+            for item in items:
+                item.compute_dynamic_power(self.resources.get_clock(item.clock), VCC_CORE, LUT_CAP, FF_CAP, FF_CLK_CAP, LUT_INT_CAP, FF_INT_CAP)
 
-        # Compute the power consumption for each individual logic element
-        for item in self.itemlist:
-            item.compute_dynamic_power(self.resources.get_clock(item.clock), VCC_CORE, LUT_CAP, FF_CAP, FF_CLK_CAP, LUT_INT_CAP, FF_INT_CAP)
-            self.total_block_power += item.output.block_power
-            self.total_interconnect_power += item.output.interconnect_power
+        # Compute the total power consumption of all logic elements (cumsum adds in the same order as a loop)
+        block_power = np.array([item.output.block_power for item in self.itemlist], dtype=np.float64)
+        interconnect_power = np.array([item.output.interconnect_power for item in self.itemlist], dtype=np.float64)
+        self.total_block_power = float(np.cumsum(block_power)[-1]) if len(block_power) else 0.0
+        self.total_interconnect_power = float(np.cumsum(interconnect_power)[-1]) if len(interconnect_power) else 0.0
 
         # Update individual logic element percentage
         total_power = self.total_block_power + self.total_interconnect_power
-        for item in self.itemlist:
-            item.compute_percentage(total_power)
+        if total_power > 0:
+            percentages = ((block_power + interconnect_power) / total_power * 100.0).tolist()
+        else:
+            percentages = [0.0] * len(self.itemlist)
+        for item, percentage in zip(self.itemlist, percentages):
+            item.output.percentage = percentage
+
+    def compute_columns(self, items: List[Fabric_LE], VCC_CORE, LUT_CAP, FF_CAP, FF_CLK_CAP, LUT_INT_CAP, FF_INT_CAP):
+        columns = Fabric_LE_Columns.build(items, self.resources.get_clock)
+        output_signal_rate, block_power, interconnect_power = columns.compute(VCC_CORE, LUT_CAP, FF_CAP, FF_CLK_CAP, \
+            LUT_INT_CAP, FF_INT_CAP)
+
+        # write the results back to the rows
+        for item, clock_index, enable, rate, block, interconnect in zip(items, columns.clock_index.tolist(), \
+                columns.enable.tolist(), output_signal_rate.tolist(), block_power.tolist(), interconnect_power.tolist()):
+            output = item.output
+            output.messages.clear()
+            output.block_power = block
+            output.interconnect_power = interconnect
+            output.output_signal_rate = rate
+            if clock_index < 0:
+                output.clock_frequency = 0
+                output.messages.append(RsMessageManager.get_message(301, { 'clock': item.clock }))
+            elif not enable:
+                output.clock_frequency = 0
+                output.messages.append(RsMessageManager.get_message(103))
+            else:
+                output.clock_frequency = columns.clocks[clock_index].frequency
 
     def compute_static_power(self, temperature: float, scenario: ScenarioType) -> List[PowerValue]:
         NUM_CLB = self.resources.get_num_CLBs()
         mylist = []
 
-        for rail_type, scene_list in self.resources.powercfg.get_polynomial(ElementType.FABRIC_LE, scenario):
-            total_power = 0.0
-            for s in scene_list:
-                power = np.polyval(s.coeffs, temperature) * s.factor
-                power = power * NUM_CLB
-                total_power += power
-                # debug info
-                log(f'[FLE] {rail_type = }', RsLogLevel.DEBUG)
-                log(f'[FLE]   {temperature = }', RsLogLevel.DEBUG)
-                log(f'[FLE]   {scenario = }', RsLogLevel.DEBUG)
-                log(f'[FLE]   {s.coeffs = }', RsLogLevel.DEBUG)
-                log(f'[FLE]   {s.factor = }', RsLogLevel.DEBUG)
-                log(f'[FLE]   {NUM_CLB = }', RsLogLevel.DEBUG)
-                log(f'[FLE]   {power = }', RsLogLevel.DEBUG)
-                log(f'[FLE]   {total_power = }', RsLogLevel.DEBUG)
-            mylist.append(PowerValue(type=rail_type, value=total_power))
+        table = self.resources.powercfg.get_static_power_table(ElementType.FABRIC_LE, scenario)
+        powers = table.compute(temperature, NUM_CLB)
+        for rail_type, total_power in zip(table.rail_types, powers):
+            # debug info
+            if trace_enabled():
+                trace(f'[FLE] {rail_type = }')
+                trace(f'[FLE]   {temperature = }')
+                trace(f'[FLE]   {scenario = }')
+                trace(f'[FLE]   {NUM_CLB = }')
+                trace(f'[FLE]   {total_power = }')
+            mylist.append(PowerValue(type=rail_type, value=float(total_power)))
 
         return mylist
@@ -5,15 +5,15 @@
 from abc import ABC, abstractmethod
 from enum import Enum
 import math
-from dataclasses import dataclass, field
-from typing import Any, Dict, List
 import numpy as np
-from utilities.common_utils import RsEnum, update_attributes
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+from utilities.common_utils import RsCustomException, RsEnum, update_attributes
 from .rs_device_resources import IO_Standard_Coeff, IOFeatureNotFoundException, IOFeatureOdtBankNotFoundException, IOFeatureTypeMismatchException, IOStandardCoeffNotFoundException, \
     IONotFoundException, IO_BankType, IO_Standard, RsDeviceResources
 from .rs_message import RsMessage, RsMessageManager
 from .rs_power_config import ElementType, PowerValue, ScenarioType
-from .rs_logger import RsLogLevel, log
+from .rs_logger import trace, trace_enabled
 
 class IO_Direction(RsEnum):
     INPUT = 0, "Input"
@@ -139,7 +139,8 @@ class IO:
         # todo
         return False
 
-    def compute_frequency(self, clock) -> float:
+    def get_frequency_factor(self) -> float:
+        # factor applied to the clock frequency, also used by the vectorized computation (IO_Columns)
         if self.is_SERDES():
             m1 = 0.5
         else:
@@ -148,7 +149,10 @@ class IO:
             m2 = 0.5
         else:
             m2 = 1
-        return clock.frequency * m1 * m2
+        return m1 * m2
+
+    def compute_frequency(self, clock) -> float:
+        return clock.frequency * self.get_frequency_factor()
 
     def compute_signal_rate(self, frequency : float) -> float:
         if self.io_data_type == IO_Data_Type.Clock:
@@ -277,6 +281,121 @@ class IO:
         self.output.block_power = self.compute_block_power()
         self.output.interconnect_power = self.compute_interconnect_power()
 
+@dataclass
+class IO_Standard_Coeff_Table:
+    coeffs : List[Optional[IO_Standard_Coeff]]
+    available : np.ndarray
+    bank_type : np.ndarray
+    voltage : np.ndarray
+    input_ac : np.ndarray
+    output_ac : np.ndarray
+    input_dc : np.ndarray
+    output_dc : np.ndarray
+    int_inner : np.ndarray
+    int_outer : np.ndarray
+    diff : np.ndarray
+
+    @staticmethod
+    def build(get_coeff: Callable[[IO_Standard], IO_Standard_Coeff]) -> 'IO_Standard_Coeff_Table':
+        # coefficients of all io standards indexed by IO_Standard value, None if not available in the power config
+        coeffs = []
+        for io_std in sorted(IO_Standard, key=lambda io_std: io_std.value):
+            try:
+                coeffs.append(get_coeff(io_std) or None)
+            except RsCustomException:
+                coeffs.append(None)
+        def get_array(prop: str, dtype=np.float64) -> np.ndarray:
+            return np.array([0 if coeff is None else getattr(coeff, prop) for coeff in coeffs], dtype=dtype)
+        return IO_Standard_Coeff_Table(
+            coeffs=coeffs,
+            available=np.array([coeff is not None for coeff in coeffs], dtype=bool),
+            bank_type=np.array([0 if coeff is None else coeff.bank_type.value for coeff in coeffs], dtype=np.int64),
+            voltage=get_array('voltage'),
+            input_ac=get_array('input_ac'),
+            output_ac=get_array('output_ac'),
+            input_dc=get_array('input_dc'),
+            output_dc=get_array('output_dc'),
+            int_inner=get_array('int_inner'),
+            int_outer=get_array('int_outer'),
+            diff=np.array([IO().get_diff_or_single_ended(io_std) for io_std in sorted(IO_Standard, key=lambda io_std: io_std.value)], dtype=np.int64))
+
+@dataclass
+class IO_Columns:
+    enable : np.ndarray
+    bus_width : np.ndarray
+    direction : np.ndarray
+    io_standard : np.ndarray
+    differential_termination : np.ndarray
+    io_data_type : np.ndarray
+    toggle_rate : np.ndarray
+    synchronization : np.ndarray
+    input_enable_rate : np.ndarray
+    output_enable_rate : np.ndarray
+    frequency_factor : np.ndarray
+    clock_index : np.ndarray
+    clocks : List[Any] = field(default_factory=list)
+
+    @staticmethod
+    def build(items: List[IO], get_clock: Callable[[str], Optional[Any]]) -> 'IO_Columns':
+        # clocks are resolved once per name, index -1 means clock not found
+        clocks, clock_indexes, clock_index = [], {}, []
+        for item in items:
+            if item.clock not in clock_indexes:
+                clock = get_clock(item.clock)
+                clock_indexes[item.clock] = -1 if clock is None else len(clocks)
+                if clock is not None:
+                    clocks.append(clock)
+            clock_index.append(clock_indexes[item.clock])
+        return IO_Columns(
+            enable=np.array([item.enable != False for item in items], dtype=bool),
+            bus_width=np.array([item.bus_width for item in items], dtype=np.int64),
+            direction=np.array([item.direction.value for item in items], dtype=np.int64),
+            io_standard=np.array([item.io_standard.value for item in items], dtype=np.int64),
+            differential_termination=np.array([item.differential_termination.value for item in items], dtype=np.int64),
+            io_data_type=np.array([item.io_data_type.value for item in items], dtype=np.int64),
+            toggle_rate=np.array([item.toggle_rate for item in items], dtype=np.float64),
+            synchronization=np.array([item.synchronization.value for item in items], dtype=np.int64),
+            input_enable_rate=np.array([item.input_enable_rate for item in items], dtype=np.float64),
+            output_enable_rate=np.array([item.output_enable_rate for item in items], dtype=np.float64),
+            frequency_factor=np.array([item.get_frequency_factor() for item in items], dtype=np.float64),
+            clock_index=np.array(clock_index, dtype=np.int64),
+            clocks=clocks)
+
+    def compute(self, table: IO_Standard_Coeff_Table):
+        # same operation order as IO.compute_dynamic_power so that results are bit-identical
+        frequencies = np.array([clock.frequency for clock in self.clocks] + [0], dtype=np.float64)
+        active = (self.clock_index >= 0) & self.enable
+        ddr = self.io_data_type == IO_Data_Type.DDR.value
+        frequency = frequencies[self.clock_index] * self.frequency_factor
+        frequency_mhz = frequency / 1000000.0
+        io_signal_rate = np.where(self.io_data_type == IO_Data_Type.Clock.value, frequency_mhz * 2,
+                                  np.where(ddr, frequency_mhz * 2 * self.toggle_rate, frequency_mhz * self.toggle_rate))
+
+        input_dir = self.direction == IO_Direction.INPUT.value
+        output_dir = (self.direction == IO_Direction.OUTPUT.value) | (self.direction == IO_Direction.OPEN_DRAIN.value)
+        bidir = self.direction == IO_Direction.BI_DIRECTION.value
+        io_count = np.where(input_dir | output_dir | bidir, self.bus_width * table.diff[self.io_standard], 0).astype(np.float64)
+        sync = np.where(self.synchronization == IO_Synchronization.NONE.value, 0.0, 0.000001)
+
+        input_ac = np.where(output_dir, 0.0, (table.input_ac[self.io_standard] + sync) * self.input_enable_rate * io_count * io_signal_rate)
+        output_ac = np.where(input_dir, 0.0, (table.output_ac[self.io_standard] + sync) * self.output_enable_rate * io_count * io_signal_rate)
+        input_dc = np.where(output_dir, 0.0, table.input_dc[self.io_standard] * io_count * np.where(input_dir, 1.0, 1 - self.output_enable_rate))
+        output_dc = np.where(input_dir, 0.0, table.output_dc[self.io_standard] * self.output_enable_rate * io_count)
+        vcco_power = output_ac + output_dc + input_ac + input_dc
+        vccaux_io_power = np.where(table.bank_type[self.io_standard] == IO_BankType.HR.value, vcco_power * 0.1, 0.0)
+        vccint_power = 0.0000004 * self.synchronization * frequency_mhz
+        block_power = vcco_power + vccaux_io_power + vccint_power
+        termination = (self.differential_termination == IO_differential_termination.ON.value) & (self.bus_width > 0)
+        block_power = np.where(termination, block_power + (0.35 ** 2) / 100.0, block_power)
+
+        input_value = np.where(output_dir, 0.0, table.int_inner[self.io_standard] * io_signal_rate * self.input_enable_rate)
+        output_value = np.where(input_dir, 0.0, table.int_outer[self.io_standard] * io_signal_rate * self.output_enable_rate)
+        interconnect_power = (output_value + input_value) * io_count
+
+        zeros = np.zeros(len(active))
+        return active, np.where(active, io_signal_rate, zeros), np.where(active, block_power, zeros), \
+            np.where(active, interconnect_power, zeros)
+
 @dataclass
 class IO_Usage_Allocation:
     voltage : float = field(default=0.0)
@@ -350,6 +469,7 @@ class IO_Feature_ODT(IO_Feature):
         for data in props['banks']:
             bank = self.get_bank(data['bank'])
             update_attributes(bank, data, exclude=['bank', 'output'])
+            self.context.set_dirty()
 
     def is_odt_io(self, io_std: IO_Standard) -> bool:
         if io_std in [IO_Standard.HSTL_1_2V_Class_I_with_ODT, IO_Standard.HSTL_1_2V_Class_II_with_ODT, IO_Standard.HSTL_1_5V_Class_I_with_ODT, \
@@ -388,6 +508,8 @@ class IO_Feature_ODT(IO_Feature):
         return True
 
 class IO_SubModule:
+    # compute all rows in one vectorized pass, the scalar per-row path is kept for reference
+    columnar: bool = True
 
     def __init__(self, resources: RsDeviceResources, itemlist: List[IO] = None):
         self.resources = resources
@@ -418,6 +540,8 @@ class IO_SubModule:
         ]
         self.io_features: List[IO_Feature] = self.create_features()
         self.itemlist: List[IO] = itemlist or []
+        self.coeff_table: IO_Standard_Coeff_Table = None
+        self.dirty = True
 
     def create_features(self) -> List[IO_Feature]:
         return [IO_Feature_ODT(context=self)]
@@ -446,6 +570,12 @@ class IO_SubModule:
     def get_all(self):
         return self.itemlist
 
+    def is_dirty(self) -> bool:
+        return self.dirty
+
+    def set_dirty(self, dirty: bool = True) -> None:
+        self.dirty = dirty
+
     def get(self, idx):
         if 0 <= idx < len(self.itemlist):
             return self.itemlist[idx]
@@ -454,19 +584,29 @@ class IO_SubModule:
     def add(self, data):
         item = update_attributes(IO(), data)
         self.itemlist.append(item)
+        self.dirty = True
         return item
 
     def update(self, idx, data):
         item = update_attributes(self.get(idx), data)
+        self.dirty = True
         return item
 
     def remove(self, idx):
         if 0 <= idx < len(self.itemlist):
+            self.dirty = True
             return self.itemlist.pop(idx)
         raise IONotFoundException
 
+    def insert(self, idx, item):
+        # put back a row previously removed (e.g. batch rollback)
+        self.itemlist.insert(idx, item)
+        self.dirty = True
+        return item
+
     def clear(self) -> None:
         self.itemlist.clear()
+        self.dirty = True
 
     def find_coeff(self, io_std: IO_Standard) -> IO_Standard_Coeff:
         coeff = self.resources.get_IO_standard_coeff(io_std)
@@ -474,6 +614,12 @@ class IO_SubModule:
             return coeff
         raise IOStandardCoeffNotFoundException
 
+    def get_coeff_table(self) -> IO_Standard_Coeff_Table:
+        # materialized once, the power config of a device does not change after loading
+        if self.coeff_table is None:
+            self.coeff_table = IO_Standard_Coeff_Table.build(self.resources.get_IO_standard_coeff)
+        return self.coeff_table
+
     def get_num_ios_by_banktype_voltage(self, bank_type : IO_BankType, voltage : float) -> int:
         return sum([io.bus_width for io in self.itemlist if io.output.bank_type == bank_type \
                     and io.output.vccio_voltage == voltage \
@@ -491,10 +637,16 @@ class IO_SubModule:
         self.total_on_die_termination_power = 0.0
 
         # Compute the power consumption for each individual items
-        for item in self.itemlist:
-            item.compute_dynamic_power(self.resources.get_clock(item.clock), self.find_coeff(item.io_standard))
-            self.total_interconnect_power += item.output.interconnect_power
-            self.total_block_power += item.output.block_power
+        if self.columnar:
+            self.compute_columns(self.itemlist)
+        else:
+            for item in self.itemlist:
+                item.compute_dynamic_power(self.resources.get_clock(item.clock), self.find_coeff(item.io_standard))
+
+        # (cumsum adds in the same order as a loop)
+        if self.itemlist:
+            self.total_interconnect_power = float(np.cumsum([item.output.interconnect_power for item in self.itemlist])[-1])
+            self.total_block_power = float(np.cumsum([item.output.block_power for item in self.itemlist])[-1])
 
         # Compute io features power consumption e.g. ODT
         for feature in self.io_features:
@@ -539,6 +691,37 @@ class IO_SubModule:
             else:
                 io_bank.percentage = 0.0
 
+    def compute_columns(self, items: List[IO]):
+        table = self.get_coeff_table()
+        columns = IO_Columns.build(items, self.resources.get_clock)
+        active, io_signal_rate, block_power, interconnect_power = columns.compute(table)
+
+        # write the results back to the rows
+        for item, io_std, clock_index, is_active, available, rate, block, interconnect in zip(items, columns.io_standard.tolist(), \
+                columns.clock_index.tolist(), active.tolist(), table.available[columns.io_standard].tolist(), \
+                io_signal_rate.tolist(), block_power.tolist(), interconnect_power.tolist()):
+            coeff = table.coeffs[io_std] if available else self.find_coeff(item.io_standard)
+            output = item.output
+            output.io_coeff = coeff
+            output.bank_type = coeff.bank_type
+            output.bank_number = 0
+            output.vccio_voltage = 0
+            output.io_signal_rate = 0.0
+            output.block_power = 0.0
+            output.interconnect_power = 0.0
+            output.messages.clear()
+            if clock_index < 0:
+                output.messages.append(RsMessageManager.get_message(301, { 'clock': item.clock }))
+            elif not is_active:
+                output.messages.append(RsMessageManager.get_message(105))
+            else:
+                output.frequency = item.compute_frequency(columns.clocks[clock_index])
+                output.io_signal_rate = rate
+                output.bank_number = item.get_bank_number()
+                output.vccio_voltage = coeff.voltage
+                output.block_power = block
+                output.interconnect_power = interconnect
+
     def get_io_banks_used(self, io_type: IO_BankType, voltage: float = None) -> int:
         num_banks = 0
         for elem in self.io_usage:
@@ -568,22 +751,18 @@ class IO_SubModule:
         }
         mylist = []
 
-        for rail_type, scene_list in self.resources.powercfg.get_polynomial(ElementType.IO, scenario):
-            total_power = 0.0
-            for s in scene_list:
-                power = np.polyval(s.coeffs, temperature) * s.factor * io_banks_voltages.get(rail_type, 0)
-                total_power += power
-                # debug info
-                log(f'[IO] {rail_type = }', RsLogLevel.DEBUG)
-                log(f'[IO]   {temperature = }', RsLogLevel.DEBUG)
-                log(f'[IO]   {scenario = }', RsLogLevel.DEBUG)
-                log(f'[IO]   {s.coeffs = }', RsLogLevel.DEBUG)
-                log(f'[IO]   {s.factor = }', RsLogLevel.DEBUG)
-                log(f'[IO]   {HR_IO_BANKS = }', RsLogLevel.DEBUG)
-                log(f'[IO]   {HP_IO_BANKS = }', RsLogLevel.DEBUG)
-                log(f'[IO]   {io_banks_voltages = }', RsLogLevel.DEBUG)
-                log(f'[IO]   {power = }', RsLogLevel.DEBUG)
-                log(f'[IO]   {total_power = }', RsLogLevel.DEBUG)
-            mylist.append(PowerValue(type=rail_type, value=total_power))
+        table = self.resources.powercfg.get_static_power_table(ElementType.IO, scenario)
+        powers = table.compute(temperature, [io_banks_voltages.get(rail_type, 0) for rail_type in table.rail_types])
+        for rail_type, total_power in zip(table.rail_types, powers):
+            # debug info
+            if trace_enabled():
+                trace(f'[IO] {rail_type = }')
+                trace(f'[IO]   {temperature = }')
+                trace(f'[IO]   {scenario = }')
+                trace(f'[IO]   {HR_IO_BANKS = }')
+                trace(f'[IO]   {HP_IO_BANKS = }')
+                trace(f'[IO]   {io_banks_voltages = }')
+                trace(f'[IO]   {total_power = }')
+            mylist.append(PowerValue(type=rail_type, value=float(total_power)))
 
         return mylist
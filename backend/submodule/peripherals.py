@@ -3,16 +3,15 @@
 #  Authorized use only
 #
 import math
-import numpy as np
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
 from enum import IntFlag
-from typing import Any, List, Dict, Tuple
+from typing import Any, List, Dict, Set, Tuple
 from utilities.common_utils import RsEnum, update_attributes
 from .rs_device_resources import IO_BankType, IO_Standard, IO_Standard_Coeff, ModuleType, PeripheralPortNotFoundException, RsDeviceResources, PeripheralNotFoundException, PeripheralType
 from .rs_power_config import ElementType, PowerValue, ScenarioType
 from .rs_message import RsMessage, RsMessageManager
-from .rs_logger import log, RsLogLevel
+from .rs_logger import trace, trace_enabled
 
 class Peripherals_Usage(RsEnum):
     Boot  = 0, "Boot"
@@ -105,23 +104,19 @@ class PeripheralTarget(IntFlag):
     DMA    = 8
 
 def find_highest_bandwidth_peripheral_port(context: 'IPeripheral') -> Tuple['Port', 'Peripheral']:
-    peripherals = context.get_submodule().get_peripherals()
-    name = context.get_name()
     peripheral: IPeripheral = None
     port: Port = None
-    for p in peripherals:
-        for t in p.get_ports() or []:
-            if t.name == name or t.source == name or t.destination == name:
-                if port is None or t.output.calculated_bandwidth > port.output.calculated_bandwidth:
-                    peripheral = p
-                    port = t
+    for t, p in context.get_submodule().get_ports_by_name(context.get_name()):
+        if port is None or t.output.calculated_bandwidth > port.output.calculated_bandwidth:
+            peripheral = p
+            port = t
     return port, peripheral
 
 def find_peripheral(context: 'IPeripheral', name: str) -> 'IPeripheral':
-    for peripheral in context.get_submodule().get_peripherals():
-        if peripheral.get_name() == name:
-            return peripheral
-    return None
+    return context.get_submodule().get_peripheral_by_name(name)
+
+def get_peripheral_bandwidth(context: 'IPeripheral', peripheral: 'IPeripheral') -> float:
+    return context.get_submodule().get_bandwidth(peripheral)
 
 def get_io_output_coeff(context: 'IPeripheral', voltage: float) -> List[float]:
     if voltage == 1.8:
@@ -172,9 +167,17 @@ class Port:
     toggle_rate: float = field(default=0.125)
     clock: str = field(default='')
     output: Port_Output = field(default_factory=Port_Output)
+    context: 'IPeripheral' = field(default=None, repr=False, compare=False)
 
     def set_properties(self, props: Dict[str, Any]) -> None:
+        # track both old and new referred peripherals in case of the port being redirected
+        names = [self.name, self.source, self.destination]
         update_attributes(self, props)
+        if self.context:
+            submodule = self.context.get_submodule()
+            if names != [self.name, self.source, self.destination]:
+                submodule.invalidate_indexes()
+            submodule.set_modified([self.context.get_name(), *names, self.name, self.source, self.destination])
 
 class SubModule(ABC):
     @abstractmethod
@@ -189,11 +192,40 @@ class SubModule(ABC):
     def compute_output_power(self) -> None:
         pass
 
+    @abstractmethod
+    def set_dirty(self, dirty: bool = True) -> None:
+        pass
+
+    @abstractmethod
+    def set_modified(self, names: List[str]) -> None:
+        pass
+
+    @abstractmethod
+    def get_bandwidth(self, peripheral: 'Peripheral') -> float:
+        pass
+
+    @abstractmethod
+    def get_peripheral_by_name(self, name: str) -> 'Peripheral':
+        pass
+
+    @abstractmethod
+    def get_ports_by_name(self, name: str) -> List[Tuple['Port', 'Peripheral']]:
+        pass
+
+    @abstractmethod
+    def invalidate_indexes(self) -> None:
+        pass
+
 class Peripheral_SubModule(SubModule):
 
     def __init__(self, resources : RsDeviceResources):
         self.resources = resources
         self.peripherals : List[Peripheral] = self.initialize_peripherals()
+        self.peripheral_index : Dict[str, Peripheral] = None
+        self.port_index : Dict[str, List[Tuple[Port, Peripheral]]] = None
+        self.modified_peripherals : Set[str] = None
+        self.bandwidths : Dict[str, float] = None
+        self.dirty = True
         # todo: total io available should be populated from device xml
         self.total_io_available = 40
         self.total_io_used = 0
@@ -282,6 +314,115 @@ class Peripheral_SubModule(SubModule):
 
     def clear(self) -> None:
         self.peripherals = self.initialize_peripherals() # re-initialize the list of peripherals
+        self.set_dirty()
+
+    def is_dirty(self) -> bool:
+        return self.dirty
+
+    def set_dirty(self, dirty: bool = True) -> None:
+        self.dirty = dirty
+        if dirty:
+            # peripheral names or port name, source and destination may have changed
+            self.invalidate_indexes()
+            # unknown modification, recompute all peripherals
+            self.modified_peripherals = None
+        else:
+            self.modified_peripherals = set()
+
+    def set_modified(self, names: List[str]) -> None:
+        # track the peripherals modified since last computation by name
+        self.dirty = True
+        if self.modified_peripherals is not None:
+            self.modified_peripherals.update(names)
+
+    def set_clocks_modified(self) -> None:
+        # fabric bandwidth and endpoints depend on the clocks
+        self.set_modified([p.get_name() for p in self.peripherals if p.get_type() == PeripheralType.FPGA_COMPLEX])
+
+    def get_bandwidth(self, peripheral: 'Peripheral') -> float:
+        # bandwidths are memoized along a computation
+        if self.bandwidths is None:
+            return peripheral.get_bandwidth()
+        name = peripheral.get_name()
+        if name not in self.bandwidths:
+            self.bandwidths[name] = peripheral.get_bandwidth()
+        return self.bandwidths[name]
+
+    def update_indexes(self) -> None:
+        # name -> peripheral (first one wins) and name -> ports having the name as their
+        # own name, source or destination (in peripheral and port order)
+        self.peripheral_index = {}
+        self.port_index = {}
+        for peripheral in self.peripherals:
+            self.peripheral_index.setdefault(peripheral.get_name(), peripheral)
+            for port in peripheral.get_ports() or []:
+                for name in dict.fromkeys((port.name, port.source, port.destination)):
+                    self.port_index.setdefault(name, []).append((port, peripheral))
+
+    def invalidate_indexes(self) -> None:
+        # rebuilt on next lookup, to be called whenever a peripheral is renamed or a port is renamed or redirected
+        self.peripheral_index = None
+        self.port_index = None
+
+    def get_peripheral_by_name(self, name: str) -> 'Peripheral':
+        if self.peripheral_index is None:
+            self.update_indexes()
+        return self.peripheral_index.get(name)
+
+    def get_ports_by_name(self, name: str) -> List[Tuple[Port, 'Peripheral']]:
+        if self.port_index is None:
+            self.update_indexes()
+        return self.port_index.get(name, [])
+
+    def get_dependencies(self) -> Tuple[Dict[str, Set[str]], Dict[str, Set[str]]]:
+        # a peripheral reads the output of the ports referring to it thus is computed after the port
+        # owners, a port owner reads the bandwidth of the peripherals its ports refer to thus is
+        # recomputed whenever any of them is modified
+        if self.port_index is None:
+            self.update_indexes()
+        targets = { p.get_name(): set() for p in self.peripherals }
+        downstream = { p.get_name(): set() for p in self.peripherals }
+        for name, ports in self.port_index.items():
+            target = self.peripheral_index.get(name)
+            if target is None:
+                continue
+            for _, owner in ports:
+                if owner is not target:
+                    targets[owner.get_name()].add(name)
+                    downstream[owner.get_name()].add(name)
+                    downstream[name].add(owner.get_name())
+
+        # bcpu boot mode depends on the spi devices
+        for spi in [p for p in self.peripherals if p.get_type() == PeripheralType.SPI]:
+            downstream[spi.get_name()].update([p.get_name() for p in self.peripherals if p.get_type() == PeripheralType.BCPU])
+
+        return targets, downstream
+
+    def get_compute_order(self, targets: Dict[str, Set[str]]) -> List['Peripheral']:
+        # topological order, the list order is kept among independent peripherals and breaks cycles
+        indegree = { p.get_name(): 0 for p in self.peripherals }
+        for names in targets.values():
+            for name in names:
+                indegree[name] += 1
+        order = []
+        remaining = list(self.peripherals)
+        while remaining:
+            peripheral = next((p for p in remaining if indegree[p.get_name()] == 0), remaining[0])
+            remaining.remove(peripheral)
+            order.append(peripheral)
+            for name in targets[peripheral.get_name()]:
+                indegree[name] -= 1
+        return order
+
+    def get_downstream_peripherals(self, names: Set[str], downstream: Dict[str, Set[str]]) -> Set[str]:
+        affected = set()
+        pending = [name for name in names if name in downstream]
+        while pending:
+            name = pending.pop()
+            if name not in affected:
+                affected.add(name)
+                pending.extend(downstream[name])
+        return affected
 
     def get_peripheral_types(self) -> List[PeripheralType]:
         types = [
@@ -303,17 +444,22 @@ class Peripheral_SubModule(SubModule):
         raise PeripheralNotFoundException
 
     def compute_output_power(self) -> None:
-        # complex periperals first
-        for peripheral in [p for p in self.peripherals if p.type in (PeripheralType.ACPU, PeripheralType.BCPU, PeripheralType.FPGA_COMPLEX)]:
-            peripheral.compute()
+        targets, downstream = self.get_dependencies()
 
-        # memory devices send
-        for peripheral in [p for p in self.peripherals if p.type in (PeripheralType.DDR, PeripheralType.OCM)]:
-            peripheral.compute()
+        # only recompute the peripherals downstream of the ones modified since last computation
+        if self.modified_peripherals is None:
+            affected = None
+        else:
+            affected = self.get_downstream_peripherals(self.modified_peripherals, downstream)
 
-        # simple periperals last
-        for peripheral in [p for p in self.peripherals if p.type not in (PeripheralType.ACPU, PeripheralType.BCPU, PeripheralType.FPGA_COMPLEX, PeripheralType.DDR, PeripheralType.OCM)]:
-            peripheral.compute()
+        # port owners before the peripherals their ports refer to
+        self.bandwidths = {}
+        try:
+            for peripheral in self.get_compute_order(targets):
+                if affected is None or peripheral.get_name() in affected:
+                    peripheral.compute()
+        finally:
+            self.bandwidths = None
 
         # calculate total power by sybsystem
         self.total_memory_block_power = sum([p.get_output()['block_power'] for p in self.peripherals if p.type in (PeripheralType.DDR, PeripheralType.OCM)])
@@ -521,8 +667,13 @@ class Peripheral(IPeripheral):
         return self.object.get_messages()
 
     def set_properties(self, props: Dict[str, Any]) -> None:
+        name = self.name
         self.object.set_properties(props)
         update_attributes(self, props)
+        if self.context:
+            if name != self.name:
+                self.context.invalidate_indexes()
+            self.context.set_modified([name, self.name])
 
     def get_bandwidth(self) -> float:
         return self.object.get_bandwidth()
@@ -612,7 +763,7 @@ class Pwm0(ComputeObject):
 class Dma0(ComputeObject):
     def __post_init__(self) -> None:
         self.get_context().set_enable(True)
-        self.channels = [Port(name=f'Channel {i}') for i in range(1, 5)]
+        self.channels = [Port(name=f'Channel {i}', context=self.get_context()) for i in range(1, 5)]
 
     def get_ports(self) -> List[Port]:
         return self.channels
@@ -649,8 +800,8 @@ class Dma0(ComputeObject):
                 continue
 
             # calculate bandwidth
-            source_bandwidth = source.get_bandwidth()
-            destination_bandwidth = destination.get_bandwidth()
+            source_bandwidth = get_peripheral_bandwidth(self.get_context(), source)
+            destination_bandwidth = get_peripheral_bandwidth(self.get_context(), destination)
             bandwidth = min(source_bandwidth, destination_bandwidth)
             if channel.activity == Port_Activity.HIGH:
                 calculated_bandwidth = bandwidth * 0.75
@@ -676,20 +827,21 @@ class Dma0(ComputeObject):
             total_dma_block_power += block_power
 
             # debug info
-            log(f'[DMA] {self.get_context().get_name() = }', RsLogLevel.DEBUG)
-            log(f'[DMA]   {source.get_name() = }', RsLogLevel.DEBUG)
-            log(f'[DMA]   {destination.get_name() = }', RsLogLevel.DEBUG)
-            log(f'[DMA]   {source_power_factor = }', RsLogLevel.DEBUG)
-            log(f'[DMA]   {destination_power_factor = }', RsLogLevel.DEBUG)
-            log(f'[DMA]   {source_bandwidth = }', RsLogLevel.DEBUG)
-            log(f'[DMA]   {destination_bandwidth = }', RsLogLevel.DEBUG)
-            log(f'[DMA]   {bandwidth = }', RsLogLevel.DEBUG)
-            log(f'[DMA]   {VCC_CORE = }', RsLogLevel.DEBUG)
-            log(f'[DMA]   {channel.activity = }', RsLogLevel.DEBUG)
-            log(f'[DMA]   {channel.toggle_rate = }', RsLogLevel.DEBUG)
-            log(f'[DMA]   {channel.output.calculated_bandwidth = }', RsLogLevel.DEBUG)
-            log(f'[DMA]   {channel.output.noc_power = }', RsLogLevel.DEBUG)
-            log(f'[DMA]   {channel.output.block_power = }', RsLogLevel.DEBUG)
+            if trace_enabled():
+                trace(f'[DMA] {self.get_context().get_name() = }')
+                trace(f'[DMA]   {source.get_name() = }')
+                trace(f'[DMA]   {destination.get_name() = }')
+                trace(f'[DMA]   {source_power_factor = }')
+                trace(f'[DMA]   {destination_power_factor = }')
+                trace(f'[DMA]   {source_bandwidth = }')
+                trace(f'[DMA]   {destination_bandwidth = }')
+                trace(f'[DMA]   {bandwidth = }')
+                trace(f'[DMA]   {VCC_CORE = }')
+                trace(f'[DMA]   {channel.activity = }')
+                trace(f'[DMA]   {channel.toggle_rate = }')
+                trace(f'[DMA]   {channel.output.calculated_bandwidth = }')
+                trace(f'[DMA]   {channel.output.noc_power = }')
+                trace(f'[DMA]   {channel.output.block_power = }')
 
         # calculate block power distribution in percentage among channels
         if total_dma_block_power > 0:
@@ -705,7 +857,7 @@ class FPGA_Fabric(ComputeObject):
     def __post_init__(self) -> None:
         self.get_context().set_targets(PeripheralTarget.DMA)
         self.get_context().set_enable(True)
-        self.endpoints = [Port() for _ in range(4)]
+        self.endpoints = [Port(context=self.get_context()) for _ in range(4)]
 
     def get_bandwidth(self) -> float:
         # get max clock frequency configured according excel formula
@@ -745,11 +897,11 @@ class FPGA_Fabric(ComputeObject):
                 continue
 
             if peripheral.get_type() == PeripheralType.GPIO:
-                bandwidth = peripheral.get_bandwidth() * (clock.frequency / 1000000.0)
+                bandwidth = get_peripheral_bandwidth(self.get_context(), peripheral) * (clock.frequency / 1000000.0)
             elif peripheral.get_type() in (PeripheralType.DDR, PeripheralType.OCM):
-                bandwidth = min((clock.frequency / 1000000.0) * 8, peripheral.get_bandwidth())
+                bandwidth = min((clock.frequency / 1000000.0) * 8, get_peripheral_bandwidth(self.get_context(), peripheral))
             else:
-                bandwidth = peripheral.get_bandwidth()
+                bandwidth = get_peripheral_bandwidth(self.get_context(), peripheral)
 
             # calculate bandwidth
             if endpoint.activity == Port_Activity.HIGH:
@@ -772,14 +924,15 @@ class FPGA_Fabric(ComputeObject):
             total_noc_power += noc_power
 
             # debug info
-            log(f'[FPGA] {self.get_context().get_name() = }', RsLogLevel.DEBUG)
-            log(f'[FPGA]   {peripheral.get_name() = }', RsLogLevel.DEBUG)
-            log(f'[FPGA]   {power_factor = }', RsLogLevel.DEBUG)
-            log(f'[FPGA]   {endpoint.activity = }', RsLogLevel.DEBUG)
-            log(f'[FPGA]   {endpoint.toggle_rate = }', RsLogLevel.DEBUG)
-            log(f'[FPGA]   {VCC_CORE = }', RsLogLevel.DEBUG)
-            log(f'[FPGA]   {endpoint.output.calculated_bandwidth = }', RsLogLevel.DEBUG)
-            log(f'[FPGA]   {endpoint.output.noc_power = }', RsLogLevel.DEBUG)
+            if trace_enabled():
+                trace(f'[FPGA] {self.get_context().get_name() = }')
+                trace(f'[FPGA]   {peripheral.get_name() = }')
+                trace(f'[FPGA]   {power_factor = }')
+                trace(f'[FPGA]   {endpoint.activity = }')
+                trace(f'[FPGA]   {endpoint.toggle_rate = }')
+                trace(f'[FPGA]   {VCC_CORE = }')
+                trace(f'[FPGA]   {endpoint.output.calculated_bandwidth = }')
+                trace(f'[FPGA]   {endpoint.output.noc_power = }')
 
         # calculate noc power distribution in percentage among endpoints
         if total_noc_power > 0:
@@ -805,7 +958,7 @@ class A45_RISC_V_ACPU(ComputeObject):
     def __post_init__(self) -> None:
         self.properties = A45_RISC_V_ACPU.properties_(frequency=533000000, load=A45_Load.MEDIUM)
         self.output = A45_RISC_V_ACPU.output_(block_power=0.0)
-        self.endpoints = [Port() for _ in range(4)]
+        self.endpoints = [Port(context=self.get_context()) for _ in range(4)]
         self.messages: List[RsMessage] = []
 
     def get_properties(self) -> Dict[str, Any]:
@@ -859,9 +1012,9 @@ class A45_RISC_V_ACPU(ComputeObject):
                 continue
 
             if peripheral.get_type() == PeripheralType.GPIO:
-                bandwidth = peripheral.get_bandwidth() * 200 # no idea hardcoded in excel
+                bandwidth = get_peripheral_bandwidth(self.get_context(), peripheral) * 200 # no idea hardcoded in excel
             else:
-                bandwidth = peripheral.get_bandwidth()
+                bandwidth = get_peripheral_bandwidth(self.get_context(), peripheral)
 
             # calculate bandwidth
             if endpoint.activity == Port_Activity.HIGH:
@@ -882,14 +1035,15 @@ class A45_RISC_V_ACPU(ComputeObject):
             endpoint.output.noc_power = noc_power
 
             # debug info
-            log(f'[ACPU] {self.get_context().get_name() = }', RsLogLevel.DEBUG)
-            log(f'[ACPU]   {peripheral.get_name() = }', RsLogLevel.DEBUG)
-            log(f'[ACPU]   {power_factor = }', RsLogLevel.DEBUG)
-            log(f'[ACPU]   {endpoint.activity = }', RsLogLevel.DEBUG)
-            log(f'[ACPU]   {endpoint.toggle_rate = }', RsLogLevel.DEBUG)
-            log(f'[ACPU]   {VCC_CORE = }', RsLogLevel.DEBUG)
-            log(f'[ACPU]   {endpoint.output.calculated_bandwidth = }', RsLogLevel.DEBUG)
-            log(f'[ACPU]   {endpoint.output.noc_power = }', RsLogLevel.DEBUG)
+            if trace_enabled():
+                trace(f'[ACPU] {self.get_context().get_name() = }')
+                trace(f'[ACPU]   {peripheral.get_name() = }')
+                trace(f'[ACPU]   {power_factor = }')
+                trace(f'[ACPU]   {endpoint.activity = }')
+                trace(f'[ACPU]   {endpoint.toggle_rate = }')
+                trace(f'[ACPU]   {VCC_CORE = }')
+                trace(f'[ACPU]   {endpoint.output.calculated_bandwidth = }')
+                trace(f'[ACPU]   {endpoint.output.noc_power = }')
 
         # compute block power
         block_power = (LOAD_FACTOR + ACPU_CLK_FACTOR) * (self.properties.frequency / 1000000.0) * VCC_CORE ** 2
@@ -902,20 +1056,16 @@ class A45_RISC_V_ACPU(ComputeObject):
         resources = self.get_context().get_device_resources()
         mylist = []
 
-        for rail_type, scene_list in resources.powercfg.get_polynomial(ElementType.ACPU, scenario):
-            total_power = 0.0
-            for s in scene_list:
-                power = np.polyval(s.coeffs, temperature) * s.factor
-                total_power += power
-                # debug info
-                log(f'[ACPU] {rail_type = }', RsLogLevel.DEBUG)
-                log(f'[ACPU]   {temperature = }', RsLogLevel.DEBUG)
-                log(f'[ACPU]   {scenario = }', RsLogLevel.DEBUG)
-                log(f'[ACPU]   {s.coeffs = }', RsLogLevel.DEBUG)
-                log(f'[ACPU]   {s.factor = }', RsLogLevel.DEBUG)
-                log(f'[ACPU]   {power = }', RsLogLevel.DEBUG)
-                log(f'[ACPU]   {total_power = }', RsLogLevel.DEBUG)
-            mylist.append(PowerValue(type=rail_type, value=total_power))
+        table = resources.powercfg.get_static_power_table(ElementType.ACPU, scenario)
+        powers = table.compute(temperature)
+        for rail_type, total_power in zip(table.rail_types, powers):
+            # debug info
+            if trace_enabled():
+                trace(f'[ACPU] {rail_type = }')
+                trace(f'[ACPU]   {temperature = }')
+                trace(f'[ACPU]   {scenario = }')
+                trace(f'[ACPU]   {total_power = }')
+            mylist.append(PowerValue(type=rail_type, value=float(total_power)))
 
         return mylist
 
@@ -941,7 +1091,7 @@ class N22_RISC_V_BCPU(ComputeObject):
         self.get_context().set_enable(True)
         self.properties = N22_RISC_V_BCPU.properties_(encryption_used=True, clock=N22_RISC_V_Clock.BOOT_Clock_40MHz)
         self.output = N22_RISC_V_BCPU.output_(boot_mode='', active_power=0.0, boot_power=0.0)
-        self.endpoints = [Port() for _ in range(4)]
+        self.endpoints = [Port(context=self.get_context()) for _ in range(4)]
         self.messages: List[RsMessage] = []
 
     def get_properties(self) -> Dict[str, Any]:
@@ -995,9 +1145,9 @@ class N22_RISC_V_BCPU(ComputeObject):
                 continue
 
             if peripheral.get_type() == PeripheralType.GPIO:
-                bandwidth = peripheral.get_bandwidth() * 200 # no idea hardcoded in excel
+                bandwidth = get_peripheral_bandwidth(self.get_context(), peripheral) * 200 # no idea hardcoded in excel
             else:
-                bandwidth = peripheral.get_bandwidth()
+                bandwidth = get_peripheral_bandwidth(self.get_context(), peripheral)
 
             # calculate bandwidth
             if endpoint.activity == Port_Activity.HIGH:
@@ -1021,14 +1171,15 @@ class N22_RISC_V_BCPU(ComputeObject):
             endpoint.output.noc_power = noc_power
 
             # debug info
-            log(f'[BCPU] {self.get_context().get_name() = }', RsLogLevel.DEBUG)
-            log(f'[BCPU]   {peripheral.get_name() = }', RsLogLevel.DEBUG)
-            log(f'[BCPU]   {power_factor = }', RsLogLevel.DEBUG)
-            log(f'[BCPU]   {endpoint.activity = }', RsLogLevel.DEBUG)
-            log(f'[BCPU]   {endpoint.toggle_rate = }', RsLogLevel.DEBUG)
-            log(f'[BCPU]   {VCC_CORE = }', RsLogLevel.DEBUG)
-            log(f'[BCPU]   {endpoint.output.calculated_bandwidth = }', RsLogLevel.DEBUG)
-            log(f'[BCPU]   {endpoint.output.noc_power = }', RsLogLevel.DEBUG)
+            if trace_enabled():
+                trace(f'[BCPU] {self.get_context().get_name() = }')
+                trace(f'[BCPU]   {peripheral.get_name() = }')
+                trace(f'[BCPU]   {power_factor = }')
+                trace(f'[BCPU]   {endpoint.activity = }')
+                trace(f'[BCPU]   {endpoint.toggle_rate = }')
+                trace(f'[BCPU]   {VCC_CORE = }')
+                trace(f'[BCPU]   {endpoint.output.calculated_bandwidth = }')
+                trace(f'[BCPU]   {endpoint.output.noc_power = }')
 
         # compute active power
         if self.properties.clock == N22_RISC_V_Clock.PLL_233MHz:
@@ -1053,20 +1204,16 @@ class N22_RISC_V_BCPU(ComputeObject):
         resources = self.get_context().get_device_resources()
         mylist = []
 
-        for rail_type, scene_list in resources.powercfg.get_polynomial(ElementType.BCPU, scenario):
-            total_power = 0.0
-            for s in scene_list:
-                power = np.polyval(s.coeffs, temperature) * s.factor
-                total_power += power
-                # debug info
-                log(f'[BCPU] {rail_type = }', RsLogLevel.DEBUG)
-                log(f'[BCPU]   {temperature = }', RsLogLevel.DEBUG)
-                log(f'[BCPU]   {scenario = }', RsLogLevel.DEBUG)
-                log(f'[BCPU]   {s.coeffs = }', RsLogLevel.DEBUG)
-                log(f'[BCPU]   {s.factor = }', RsLogLevel.DEBUG)
-                log(f'[BCPU]   {power = }', RsLogLevel.DEBUG)
-                log(f'[BCPU]   {total_power = }', RsLogLevel.DEBUG)
-            mylist.append(PowerValue(type=rail_type, value=total_power))
+        table = resources.powercfg.get_static_power_table(ElementType.BCPU, scenario)
+        powers = table.compute(temperature)
+        for rail_type, total_power in zip(table.rail_types, powers):
+            # debug info
+            if trace_enabled():
+                trace(f'[BCPU] {rail_type = }')
+                trace(f'[BCPU]   {temperature = }')
+                trace(f'[BCPU]   {scenario = }')
+                trace(f'[BCPU]   {total_power = }')
+            mylist.append(PowerValue(type=rail_type, value=float(total_power)))
 
         return mylist
 
@@ -1182,22 +1329,23 @@ class Memory0(ComputeObject):
         self.output.block_power = block_power
 
         # debug info
-        log(f'[MEM0]: {bandwidth = }', RsLogLevel.DEBUG)
-        log(f'[MEM0]: {self.properties.data_rate / 1000000.0 = }', RsLogLevel.DEBUG)
-        log(f'[MEM0]: {endpoint.read_write_rate = }', RsLogLevel.DEBUG)
-        log(f'[MEM0]: {VCC_CORE = }', RsLogLevel.DEBUG)
-        if self.get_context().get_type() == PeripheralType.DDR:
-            log(f'[MEM0]: {DDR_ACLK_FACTOR = }', RsLogLevel.DEBUG)
-            log(f'[MEM0]: {DDR_CLK_FACTOR = }', RsLogLevel.DEBUG)
-            log(f'[MEM0]: {DDR_WRITE_FACTOR = }', RsLogLevel.DEBUG)
-            log(f'[MEM0]: {DDR_READ_FACTOR = }', RsLogLevel.DEBUG)
-        else:
-            log(f'[MEM0]: {SRAM_ACLK_FACTOR = }', RsLogLevel.DEBUG)
-            log(f'[MEM0]: {SRAM_WRITE_FACTOR = }', RsLogLevel.DEBUG)
-            log(f'[MEM0]: {SRAM_READ_FACTOR = }', RsLogLevel.DEBUG)
-        log(f'[MEM0]: {self.output.write_bandwidth = }', RsLogLevel.DEBUG)
-        log(f'[MEM0]: {self.output.read_bandwidth = }', RsLogLevel.DEBUG)
-        log(f'[MEM0]: {self.output.block_power = }', RsLogLevel.DEBUG)
+        if trace_enabled():
+            trace(f'[MEM0]: {bandwidth = }')
+            trace(f'[MEM0]: {self.properties.data_rate / 1000000.0 = }')
+            trace(f'[MEM0]: {endpoint.read_write_rate = }')
+            trace(f'[MEM0]: {VCC_CORE = }')
+            if self.get_context().get_type() == PeripheralType.DDR:
+                trace(f'[MEM0]: {DDR_ACLK_FACTOR = }')
+                trace(f'[MEM0]: {DDR_CLK_FACTOR = }')
+                trace(f'[MEM0]: {DDR_WRITE_FACTOR = }')
+                trace(f'[MEM0]: {DDR_READ_FACTOR = }')
+            else:
+                trace(f'[MEM0]: {SRAM_ACLK_FACTOR = }')
+                trace(f'[MEM0]: {SRAM_WRITE_FACTOR = }')
+                trace(f'[MEM0]: {SRAM_READ_FACTOR = }')
+            trace(f'[MEM0]: {self.output.write_bandwidth = }')
+            trace(f'[MEM0]: {self.output.read_bandwidth = }')
+            trace(f'[MEM0]: {self.output.block_power = }')
 
         return True
 
@@ -1210,25 +1358,19 @@ class Memory0(ComputeObject):
         DDR_IOS = resources.get_num_DDR_IOs()
         mylist = []
 
-        for rail_type, scene_list in resources.powercfg.get_polynomial(ElementType.DDR, scenario):
-            total_power = 0.0
-            for s in scene_list:
-                power = np.polyval(s.coeffs, temperature) * s.factor
-                if rail_type == 'VCC_DDR_IO':
-                    power = power * VCC_DDR_IO * DDR_IOS / 2
-                total_power += power
-                # debug info
-                log(f'[MEM0] {rail_type = }', RsLogLevel.DEBUG)
-                log(f'[MEM0]   {temperature = }', RsLogLevel.DEBUG)
-                log(f'[MEM0]   {scenario = }', RsLogLevel.DEBUG)
-                log(f'[MEM0]   {s.coeffs = }', RsLogLevel.DEBUG)
-                log(f'[MEM0]   {s.factor = }', RsLogLevel.DEBUG)
-                log(f'[MEM0]   {self.get_context().get_type() = }', RsLogLevel.DEBUG)
-                log(f'[MEM0]   {VCC_DDR_IO = }', RsLogLevel.DEBUG)
-                log(f'[MEM0]   {DDR_IOS = }', RsLogLevel.DEBUG)
-                log(f'[MEM0]   {power = }', RsLogLevel.DEBUG)
-                log(f'[MEM0]   {total_power = }', RsLogLevel.DEBUG)
-            mylist.append(PowerValue(type=rail_type, value=total_power))
+        table = resources.powercfg.get_static_power_table(ElementType.DDR, scenario)
+        powers = table.compute(temperature, [VCC_DDR_IO * DDR_IOS / 2 if rail_type == 'VCC_DDR_IO' else 1 for rail_type in table.rail_types])
+        for rail_type, total_power in zip(table.rail_types, powers):
+            # debug info
+            if trace_enabled():
+                trace(f'[MEM0] {rail_type = }')
+                trace(f'[MEM0]   {temperature = }')
+                trace(f'[MEM0]   {scenario = }')
+                trace(f'[MEM0]   {self.get_context().get_type() = }')
+                trace(f'[MEM0]   {VCC_DDR_IO = }')
+                trace(f'[MEM0]   {DDR_IOS = }')
+                trace(f'[MEM0]   {total_power = }')
+            mylist.append(PowerValue(type=rail_type, value=float(total_power)))
 
         return mylist
 
@@ -1326,16 +1468,17 @@ class Gpio0(ComputeObject):
         self.output.block_power = core_power + io_core_power + io_vcco_power + io_vcc_aux_power
 
         # debug info
-        log(f'[GPIO] {bandwidth = }', RsLogLevel.DEBUG)
-        log(f'[GPIO] {clock_frequency = }', RsLogLevel.DEBUG)
-        log(f'[GPIO] {endpoint.toggle_rate = }', RsLogLevel.DEBUG)
-        log(f'[GPIO] {endpoint.toggle_rate * bandwidth = }', RsLogLevel.DEBUG)
-        log(f'[GPIO] {core_power = }', RsLogLevel.DEBUG)
-        log(f'[GPIO] {io_core_power = }', RsLogLevel.DEBUG)
-        log(f'[GPIO] {io_vcco_power = }', RsLogLevel.DEBUG)
-        log(f'[GPIO] {io_vcc_aux_power = }', RsLogLevel.DEBUG)
-        log(f'[GPIO] {self.output.calculated_bandwidth = }', RsLogLevel.DEBUG)
-        log(f'[GPIO] {self.output.block_power = }', RsLogLevel.DEBUG)
+        if trace_enabled():
+            trace(f'[GPIO] {bandwidth = }')
+            trace(f'[GPIO] {clock_frequency = }')
+            trace(f'[GPIO] {endpoint.toggle_rate = }')
+            trace(f'[GPIO] {endpoint.toggle_rate * bandwidth = }')
+            trace(f'[GPIO] {core_power = }')
+            trace(f'[GPIO] {io_core_power = }')
+            trace(f'[GPIO] {io_vcco_power = }')
+            trace(f'[GPIO] {io_vcc_aux_power = }')
+            trace(f'[GPIO] {self.output.calculated_bandwidth = }')
+            trace(f'[GPIO] {self.output.block_power = }')
 
         return True
 
@@ -1357,24 +1500,20 @@ class Gpio0(ComputeObject):
         }
         mylist = []
 
-        for rail_type, scene_list in resources.powercfg.get_polynomial(ElementType.GPIO, scenario):
-            total_power = 0.0
-            for s in scene_list:
-                power = np.polyval(s.coeffs, temperature) * s.factor * voltages.get(rail_type, 0.0) * ios.get(rail_type, 0.0)
-                total_power += power
-                # debug info
-                log(f'[GPIO] {rail_type = }', RsLogLevel.DEBUG)
-                log(f'[GPIO]   {temperature = }', RsLogLevel.DEBUG)
-                log(f'[GPIO]   {scenario = }', RsLogLevel.DEBUG)
-                log(f'[GPIO]   {s.coeffs = }', RsLogLevel.DEBUG)
-                log(f'[GPIO]   {s.factor = }', RsLogLevel.DEBUG)
-                log(f'[GPIO]   {BOOT_IOS = }', RsLogLevel.DEBUG)
-                log(f'[GPIO]   {SOC_IOS = }', RsLogLevel.DEBUG)
-                log(f'[GPIO]   {voltages = }', RsLogLevel.DEBUG)
-                log(f'[GPIO]   {ios = }', RsLogLevel.DEBUG)
-                log(f'[GPIO]   {power = }', RsLogLevel.DEBUG)
-                log(f'[GPIO]   {total_power = }', RsLogLevel.DEBUG)
-            mylist.append(PowerValue(type=rail_type, value=total_power))
+        table = resources.powercfg.get_static_power_table(ElementType.GPIO, scenario)
+        powers = table.compute(temperature, [voltages.get(rail_type, 0.0) for rail_type in table.rail_types], [ios.get(rail_type, 0.0) for rail_type in table.rail_types])
+        for rail_type, total_power in zip(table.rail_types, powers):
+            # debug info
+            if trace_enabled():
+                trace(f'[GPIO] {rail_type = }')
+                trace(f'[GPIO]   {temperature = }')
+                trace(f'[GPIO]   {scenario = }')
+                trace(f'[GPIO]   {BOOT_IOS = }')
+                trace(f'[GPIO]   {SOC_IOS = }')
+                trace(f'[GPIO]   {voltages = }')
+                trace(f'[GPIO]   {ios = }')
+                trace(f'[GPIO]   {total_power = }')
+            mylist.append(PowerValue(type=rail_type, value=float(total_power)))
 
         return mylist
 
@@ -1471,14 +1610,15 @@ class Usb2_0(ComputeObject):
         self.output.block_power = core_power + io_core_power
 
         # debug info
-        log(f'[USB2] {bandwidth = }', RsLogLevel.DEBUG)
-        log(f'[USB2] {self.get_freq() / 1000000.0 = }', RsLogLevel.DEBUG)
-        log(f'[USB2] {endpoint.toggle_rate = }', RsLogLevel.DEBUG)
-        log(f'[USB2] {endpoint.toggle_rate * bandwidth = }', RsLogLevel.DEBUG)
-        log(f'[USB2] {core_power = }', RsLogLevel.DEBUG)
-        log(f'[USB2] {io_core_power = }', RsLogLevel.DEBUG)
-        log(f'[USB2] {self.output.calculated_bandwidth = }', RsLogLevel.DEBUG)
-        log(f'[USB2] {self.output.block_power = }', RsLogLevel.DEBUG)
+        if trace_enabled():
+            trace(f'[USB2] {bandwidth = }')
+            trace(f'[USB2] {self.get_freq() / 1000000.0 = }')
+            trace(f'[USB2] {endpoint.toggle_rate = }')
+            trace(f'[USB2] {endpoint.toggle_rate * bandwidth = }')
+            trace(f'[USB2] {core_power = }')
+            trace(f'[USB2] {io_core_power = }')
+            trace(f'[USB2] {self.output.calculated_bandwidth = }')
+            trace(f'[USB2] {self.output.block_power = }')
 
         return True
 
@@ -1495,23 +1635,19 @@ class Usb2_0(ComputeObject):
         }
         mylist = []
 
-        for rail_type, scene_list in resources.powercfg.get_polynomial(ElementType.USB2, scenario):
-            total_power = 0.0
-            for s in scene_list:
-                power = np.polyval(s.coeffs, temperature) * s.factor * voltages.get(rail_type, 0.0) * ios.get(rail_type, 0.0)
-                total_power += power
-                # debug info
-                log(f'[USB2] {rail_type = }', RsLogLevel.DEBUG)
-                log(f'[USB2]   {temperature = }', RsLogLevel.DEBUG)
-                log(f'[USB2]   {scenario = }', RsLogLevel.DEBUG)
-                log(f'[USB2]   {s.coeffs = }', RsLogLevel.DEBUG)
-                log(f'[USB2]   {s.factor = }', RsLogLevel.DEBUG)
-                log(f'[USB2]   {USB_IOS = }', RsLogLevel.DEBUG)
-                log(f'[USB2]   {voltages = }', RsLogLevel.DEBUG)
-                log(f'[USB2]   {ios = }', RsLogLevel.DEBUG)
-                log(f'[USB2]   {power = }', RsLogLevel.DEBUG)
-                log(f'[USB2]   {total_power = }', RsLogLevel.DEBUG)
-            mylist.append(PowerValue(type=rail_type, value=total_power))
+        table = resources.powercfg.get_static_power_table(ElementType.USB2, scenario)
+        powers = table.compute(temperature, [voltages.get(rail_type, 0.0) for rail_type in table.rail_types], [ios.get(rail_type, 0.0) for rail_type in table.rail_types])
+        for rail_type, total_power in zip(table.rail_types, powers):
+            # debug info
+            if trace_enabled():
+                trace(f'[USB2] {rail_type = }')
+                trace(f'[USB2]   {temperature = }')
+                trace(f'[USB2]   {scenario = }')
+                trace(f'[USB2]   {USB_IOS = }')
+                trace(f'[USB2]   {voltages = }')
+                trace(f'[USB2]   {ios = }')
+                trace(f'[USB2]   {total_power = }')
+            mylist.append(PowerValue(type=rail_type, value=float(total_power)))
 
         return mylist
 
@@ -1609,14 +1745,15 @@ class GigE_0(ComputeObject):
         self.output.block_power = core_power + io_core_power
 
         # debug info
-        log(f'[GIGE] {bandwidth = }', RsLogLevel.DEBUG)
-        log(f'[GIGE] {self.get_freq() / 1000000.0 = }', RsLogLevel.DEBUG)
-        log(f'[GIGE] {endpoint.toggle_rate = }', RsLogLevel.DEBUG)
-        log(f'[GIGE] {endpoint.toggle_rate * bandwidth = }', RsLogLevel.DEBUG)
-        log(f'[GIGE] {core_power = }', RsLogLevel.DEBUG)
-        log(f'[GIGE] {io_core_power = }', RsLogLevel.DEBUG)
-        log(f'[GIGE] {self.output.calculated_bandwidth = }', RsLogLevel.DEBUG)
-        log(f'[GIGE] {self.output.block_power = }', RsLogLevel.DEBUG)
+        if trace_enabled():
+            trace(f'[GIGE] {bandwidth = }')
+            trace(f'[GIGE] {self.get_freq() / 1000000.0 = }')
+            trace(f'[GIGE] {endpoint.toggle_rate = }')
+            trace(f'[GIGE] {endpoint.toggle_rate * bandwidth = }')
+            trace(f'[GIGE] {core_power = }')
+            trace(f'[GIGE] {io_core_power = }')
+            trace(f'[GIGE] {self.output.calculated_bandwidth = }')
+            trace(f'[GIGE] {self.output.block_power = }')
 
         return True
 
@@ -1633,23 +1770,19 @@ class GigE_0(ComputeObject):
         }
         mylist = []
 
-        for rail_type, scene_list in resources.powercfg.get_polynomial(ElementType.GIGE, scenario):
-            total_power = 0.0
-            for s in scene_list:
-                power = np.polyval(s.coeffs, temperature) * s.factor * voltages.get(rail_type, 0.0) * ios.get(rail_type, 0.0)
-                total_power += power
-                # debug info
-                log(f'[GIGE] {rail_type = }', RsLogLevel.DEBUG)
-                log(f'[GIGE]   {temperature = }', RsLogLevel.DEBUG)
-                log(f'[GIGE]   {scenario = }', RsLogLevel.DEBUG)
-                log(f'[GIGE]   {s.coeffs = }', RsLogLevel.DEBUG)
-                log(f'[GIGE]   {s.factor = }', RsLogLevel.DEBUG)
-                log(f'[GIGE]   {GIGE_IOS = }', RsLogLevel.DEBUG)
-                log(f'[GIGE]   {voltages = }', RsLogLevel.DEBUG)
-                log(f'[GIGE]   {ios = }', RsLogLevel.DEBUG)
-                log(f'[GIGE]   {power = }', RsLogLevel.DEBUG)
-                log(f'[GIGE]   {total_power = }', RsLogLevel.DEBUG)
-            mylist.append(PowerValue(type=rail_type, value=total_power))
+        table = resources.powercfg.get_static_power_table(ElementType.GIGE, scenario)
+        powers = table.compute(temperature, [voltages.get(rail_type, 0.0) for rail_type in table.rail_types], [ios.get(rail_type, 0.0) for rail_type in table.rail_types])
+        for rail_type, total_power in zip(table.rail_types, powers):
+            # debug info
+            if trace_enabled():
+                trace(f'[GIGE] {rail_type = }')
+                trace(f'[GIGE]   {temperature = }')
+                trace(f'[GIGE]   {scenario = }')
+                trace(f'[GIGE]   {GIGE_IOS = }')
+                trace(f'[GIGE]   {voltages = }')
+                trace(f'[GIGE]   {ios = }')
+                trace(f'[GIGE]   {total_power = }')
+            mylist.append(PowerValue(type=rail_type, value=float(total_power)))
 
         return mylist
 
@@ -1660,21 +1793,17 @@ class Puffcc0(ComputeObject):
         VCC_PUF = resources.get_VCC_PUF()
         mylist = []
 
-        for rail_type, scene_list in resources.powercfg.get_polynomial(ElementType.PUFFCC, scenario):
-            total_power = 0.0
-            for s in scene_list:
-                power = np.polyval(s.coeffs, temperature) * VCC_PUF * s.factor
-                total_power += power
-                # debug info
-                log(f'[PUFFCC] {rail_type = }', RsLogLevel.DEBUG)
-                log(f'[PUFFCC]   {temperature = }', RsLogLevel.DEBUG)
-                log(f'[PUFFCC]   {scenario = }', RsLogLevel.DEBUG)
-                log(f'[PUFFCC]   {s.coeffs = }', RsLogLevel.DEBUG)
-                log(f'[PUFFCC]   {s.factor = }', RsLogLevel.DEBUG)
-                log(f'[PUFFCC]   {VCC_PUF = }', RsLogLevel.DEBUG)
-                log(f'[PUFFCC]   {power = }', RsLogLevel.DEBUG)
-                log(f'[PUFFCC]   {total_power = }', RsLogLevel.DEBUG)
-            mylist.append(PowerValue(type=rail_type, value=total_power))
+        table = resources.powercfg.get_static_power_table(ElementType.PUFFCC, scenario)
+        powers = table.compute(temperature, VCC_PUF)
+        for rail_type, total_power in zip(table.rail_types, powers):
+            # debug info
+            if trace_enabled():
+                trace(f'[PUFFCC] {rail_type = }')
+                trace(f'[PUFFCC]   {temperature = }')
+                trace(f'[PUFFCC]   {scenario = }')
+                trace(f'[PUFFCC]   {VCC_PUF = }')
+                trace(f'[PUFFCC]   {total_power = }')
+            mylist.append(PowerValue(type=rail_type, value=float(total_power)))
 
         return mylist
 
@@ -1685,21 +1814,17 @@ class RCOsc0(ComputeObject):
         VCC_RC_OSC = resources.get_VCC_RC_OSC()
         mylist = []
 
-        for rail_type, scene_list in resources.powercfg.get_polynomial(ElementType.RC_OSC, scenario):
-            total_power = 0.0
-            for s in scene_list:
-                power = np.polyval(s.coeffs, temperature) * VCC_RC_OSC * s.factor
-                total_power += power
-                # debug info
-                log(f'[RC_OSC] {rail_type = }', RsLogLevel.DEBUG)
-                log(f'[RC_OSC]   {temperature = }', RsLogLevel.DEBUG)
-                log(f'[RC_OSC]   {scenario = }', RsLogLevel.DEBUG)
-                log(f'[RC_OSC]   {s.coeffs = }', RsLogLevel.DEBUG)
-                log(f'[RC_OSC]   {s.factor = }', RsLogLevel.DEBUG)
-                log(f'[RC_OSC]   {VCC_RC_OSC = }', RsLogLevel.DEBUG)
-                log(f'[RC_OSC]   {power = }', RsLogLevel.DEBUG)
-                log(f'[RC_OSC]   {total_power = }', RsLogLevel.DEBUG)
-            mylist.append(PowerValue(type=rail_type, value=total_power))
+        table = resources.powercfg.get_static_power_table(ElementType.RC_OSC, scenario)
+        powers = table.compute(temperature, VCC_RC_OSC)
+        for rail_type, total_power in zip(table.rail_types, powers):
+            # debug info
+            if trace_enabled():
+                trace(f'[RC_OSC] {rail_type = }')
+                trace(f'[RC_OSC]   {temperature = }')
+                trace(f'[RC_OSC]   {scenario = }')
+                trace(f'[RC_OSC]   {VCC_RC_OSC = }')
+                trace(f'[RC_OSC]   {total_power = }')
+            mylist.append(PowerValue(type=rail_type, value=float(total_power)))
 
         return mylist
 
@@ -1709,20 +1834,16 @@ class Noc0(ComputeObject):
         resources = self.get_context().get_device_resources()
         mylist = []
 
-        for rail_type, scene_list in resources.powercfg.get_polynomial(ElementType.NOC, scenario):
-            total_power = 0.0
-            for s in scene_list:
-                power = np.polyval(s.coeffs, temperature) * s.factor
-                total_power += power
-                # debug info
-                log(f'[NOC] {rail_type = }', RsLogLevel.DEBUG)
-                log(f'[NOC]   {temperature = }', RsLogLevel.DEBUG)
-                log(f'[NOC]   {scenario = }', RsLogLevel.DEBUG)
-                log(f'[NOC]   {s.coeffs = }', RsLogLevel.DEBUG)
-                log(f'[NOC]   {s.factor = }', RsLogLevel.DEBUG)
-                log(f'[NOC]   {power = }', RsLogLevel.DEBUG)
-                log(f'[NOC]   {total_power = }', RsLogLevel.DEBUG)
-            mylist.append(PowerValue(type=rail_type, value=total_power))
+        table = resources.powercfg.get_static_power_table(ElementType.NOC, scenario)
+        powers = table.compute(temperature)
+        for rail_type, total_power in zip(table.rail_types, powers):
+            # debug info
+            if trace_enabled():
+                trace(f'[NOC] {rail_type = }')
+                trace(f'[NOC]   {temperature = }')
+                trace(f'[NOC]   {scenario = }')
+                trace(f'[NOC]   {total_power = }')
+            mylist.append(PowerValue(type=rail_type, value=float(total_power)))
 
         return mylist
 
@@ -1824,16 +1945,17 @@ class I2c0(ComputeObject):
         self.output.block_power = core_power + io_core_power + io_vcco_power + io_vcc_aux_power
 
         # debug info
-        log(f'[I2C] {bandwidth = }', RsLogLevel.DEBUG)
-        log(f'[I2C] {self.get_freq() / 1000000.0 = }', RsLogLevel.DEBUG)
-        log(f'[I2C] {endpoint.toggle_rate = }', RsLogLevel.DEBUG)
-        log(f'[I2C] {endpoint.toggle_rate * bandwidth = }', RsLogLevel.DEBUG)
-        log(f'[I2C] {core_power = }', RsLogLevel.DEBUG)
-        log(f'[I2C] {io_core_power = }', RsLogLevel.DEBUG)
-        log(f'[I2C] {io_vcco_power = }', RsLogLevel.DEBUG)
-        log(f'[I2C] {io_vcc_aux_power = }', RsLogLevel.DEBUG)
-        log(f'[I2C] {self.output.calculated_bandwidth = }', RsLogLevel.DEBUG)
-        log(f'[I2C] {self.output.block_power = }', RsLogLevel.DEBUG)
+        if trace_enabled():
+            trace(f'[I2C] {bandwidth = }')
+            trace(f'[I2C] {self.get_freq() / 1000000.0 = }')
+            trace(f'[I2C] {endpoint.toggle_rate = }')
+            trace(f'[I2C] {endpoint.toggle_rate * bandwidth = }')
+            trace(f'[I2C] {core_power = }')
+            trace(f'[I2C] {io_core_power = }')
+            trace(f'[I2C] {io_vcco_power = }')
+            trace(f'[I2C] {io_vcc_aux_power = }')
+            trace(f'[I2C] {self.output.calculated_bandwidth = }')
+            trace(f'[I2C] {self.output.block_power = }')
 
         return True
 
@@ -1935,23 +2057,24 @@ class Jtag0(ComputeObject):
         self.output.block_power = core_power + io_core_power + io_vcco_power + io_vcc_aux_power
 
         # debug info
-        log(f'[JTAG] {self.get_context().get_usage() = }', RsLogLevel.DEBUG)
-        log(f'[JTAG] {bandwidth = }', RsLogLevel.DEBUG)
-        log(f'[JTAG] {bandwidth * toggle_rate = }', RsLogLevel.DEBUG)
-        log(f'[JTAG] {toggle_rate = }', RsLogLevel.DEBUG)
-        log(f'[JTAG] {self.get_freq() / 1000000.0 = }', RsLogLevel.DEBUG)
-        log(f'[JTAG] {VCC_BOOT_IO = }', RsLogLevel.DEBUG)
-        log(f'[JTAG] {OUTPUT_AC = }', RsLogLevel.DEBUG)
-        log(f'[JTAG] {OUTPUT_DC = }', RsLogLevel.DEBUG)
-        log(f'[JTAG] {JTAG_CLK_FACTOR = }', RsLogLevel.DEBUG)
-        log(f'[JTAG] {JTAG_SWITCHING_FACTOR = }', RsLogLevel.DEBUG)
-        log(f'[JTAG] {JTAG_IO_FACTOR = }', RsLogLevel.DEBUG)
-        log(f'[JTAG] {core_power = }', RsLogLevel.DEBUG)
-        log(f'[JTAG] {io_core_power = }', RsLogLevel.DEBUG)
-        log(f'[JTAG] {io_vcco_power = }', RsLogLevel.DEBUG)
-        log(f'[JTAG] {io_vcc_aux_power = }', RsLogLevel.DEBUG)
-        log(f'[JTAG] {self.output.calculated_bandwidth = }', RsLogLevel.DEBUG)
-        log(f'[JTAG] {self.output.block_power = }', RsLogLevel.DEBUG)
+        if trace_enabled():
+            trace(f'[JTAG] {self.get_context().get_usage() = }')
+            trace(f'[JTAG] {bandwidth = }')
+            trace(f'[JTAG] {bandwidth * toggle_rate = }')
+            trace(f'[JTAG] {toggle_rate = }')
+            trace(f'[JTAG] {self.get_freq() / 1000000.0 = }')
+            trace(f'[JTAG] {VCC_BOOT_IO = }')
+            trace(f'[JTAG] {OUTPUT_AC = }')
+            trace(f'[JTAG] {OUTPUT_DC = }')
+            trace(f'[JTAG] {JTAG_CLK_FACTOR = }')
+            trace(f'[JTAG] {JTAG_SWITCHING_FACTOR = }')
+            trace(f'[JTAG] {JTAG_IO_FACTOR = }')
+            trace(f'[JTAG] {core_power = }')
+            trace(f'[JTAG] {io_core_power = }')
+            trace(f'[JTAG] {io_vcco_power = }')
+            trace(f'[JTAG] {io_vcc_aux_power = }')
+            trace(f'[JTAG] {self.output.calculated_bandwidth = }')
+            trace(f'[JTAG] {self.output.block_power = }')
 
         return True
 
@@ -2060,21 +2183,22 @@ class Qspi0(ComputeObject):
         self.output.block_power = core_power + io_core_power + io_vcco_power + io_vcc_aux_power
 
         # debug info
-        log(f'[QSPI] {self.get_context().get_usage() = }', RsLogLevel.DEBUG)
-        log(f'[QSPI] {bandwidth = }', RsLogLevel.DEBUG)
-        log(f'[QSPI] {toggle_rate = }', RsLogLevel.DEBUG)
-        log(f'[QSPI] {VCC_BOOT_IO = }', RsLogLevel.DEBUG)
-        log(f'[QSPI] {OUTPUT_AC = }', RsLogLevel.DEBUG)
-        log(f'[QSPI] {OUTPUT_DC = }', RsLogLevel.DEBUG)
-        log(f'[QSPI] {QSPI_CLK_FACTOR = }', RsLogLevel.DEBUG)
-        log(f'[QSPI] {QSPI_SWITCHING_FACTOR = }', RsLogLevel.DEBUG)
-        log(f'[QSPI] {QSPI_IO_FACTOR = }', RsLogLevel.DEBUG)
-        log(f'[QSPI] {core_power = }', RsLogLevel.DEBUG)
-        log(f'[QSPI] {io_core_power = }', RsLogLevel.DEBUG)
-        log(f'[QSPI] {io_vcco_power = }', RsLogLevel.DEBUG)
-        log(f'[QSPI] {io_vcc_aux_power = }', RsLogLevel.DEBUG)
-        log(f'[QSPI] {self.output.calculated_bandwidth = }', RsLogLevel.DEBUG)
-        log(f'[QSPI] {self.output.block_power = }', RsLogLevel.DEBUG)
+        if trace_enabled():
+            trace(f'[QSPI] {self.get_context().get_usage() = }')
+            trace(f'[QSPI] {bandwidth = }')
+            trace(f'[QSPI] {toggle_rate = }')
+            trace(f'[QSPI] {VCC_BOOT_IO = }')
+            trace(f'[QSPI] {OUTPUT_AC = }')
+            trace(f'[QSPI] {OUTPUT_DC = }')
+            trace(f'[QSPI] {QSPI_CLK_FACTOR = }')
+            trace(f'[QSPI] {QSPI_SWITCHING_FACTOR = }')
+            trace(f'[QSPI] {QSPI_IO_FACTOR = }')
+            trace(f'[QSPI] {core_power = }')
+            trace(f'[QSPI] {io_core_power = }')
+            trace(f'[QSPI] {io_vcco_power = }')
+            trace(f'[QSPI] {io_vcc_aux_power = }')
+            trace(f'[QSPI] {self.output.calculated_bandwidth = }')
+            trace(f'[QSPI] {self.output.block_power = }')
 
         return True
 
@@ -2178,13 +2302,14 @@ class Uart0(ComputeObject):
         self.output.block_power = core_power + io_core_power + io_vcco_power + io_vcc_aux_power
 
         # debug info
-        log(f'[UART] {bandwidth = }', RsLogLevel.DEBUG)
-        log(f'[UART] {self.get_freq() / 1000000.0 = }', RsLogLevel.DEBUG)
-        log(f'[UART] {core_power = }', RsLogLevel.DEBUG)
-        log(f'[UART] {io_core_power = }', RsLogLevel.DEBUG)
-        log(f'[UART] {io_vcco_power = }', RsLogLevel.DEBUG)
-        log(f'[UART] {io_vcc_aux_power = }', RsLogLevel.DEBUG)
-        log(f'[UART] {self.output.calculated_bandwidth = }', RsLogLevel.DEBUG)
-        log(f'[UART] {self.output.block_power = }', RsLogLevel.DEBUG)
+        if trace_enabled():
+            trace(f'[UART] {bandwidth = }')
+            trace(f'[UART] {self.get_freq() / 1000000.0 = }')
+            trace(f'[UART] {core_power = }')
+            trace(f'[UART] {io_core_power = }')
+            trace(f'[UART] {io_vcco_power = }')
+            trace(f'[UART] {io_vcc_aux_power = }')
+            trace(f'[UART] {self.output.calculated_bandwidth = }')
+            trace(f'[UART] {self.output.block_power = }')
 
         return True
@@ -3,8 +3,11 @@
 #  Authorized use only
 #
 import numpy as np
+import itertools
 import math
-from typing import List
+import threading
+from types import MappingProxyType
+from typing import Any, List, Mapping, Tuple
 from .rs_power_config import PowerValue, ScenarioType
 from .rs_device_resources import RsDeviceResources, ModuleType, IO_BankType
 from .clock import Clock_SubModule
@@ -13,8 +16,12 @@ from .dsp import DSP_SubModule
 from .bram import BRAM_SubModule
 from .io import IO_SubModule
 from .peripherals import Peripheral_SubModule
+from .rs_logger import RsLogLevel, log, capture_trace
 from utilities.common_utils import update_attributes
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, is_dataclass
+
+# source of the instance ids of the devices
+device_instance_ids = itertools.count(1)
 
 @dataclass
 class TotalPowerTemperature:
@@ -69,6 +76,7 @@ class RsDevice_output:
     total_power_temperature: List[TotalPowerTemperature] = field(default_factory=list)
     processing_complex: DeviceComplex = field(default_factory=DeviceComplex)
     fpga_complex: DeviceComplex = field(default_factory=DeviceComplex)
+    stale: bool = field(default=False)
 
     def compute(self) -> None:
         overall_power = self.processing_complex.total_power + self.fpga_complex.total_power
@@ -79,6 +87,55 @@ class RsDevice_output:
             self.processing_complex.total_percentage = 0.0
             self.fpga_complex.total_percentage = 0.0
 
+def copy_output(value: Any) -> Any:
+    # detached copy of computed outputs, nested outputs are copied and lists become tuples while
+    # immutable values (e.g. messages) are shared
+    if isinstance(value, (list, tuple)):
+        return tuple(copy_output(item) for item in value)
+    if isinstance(value, dict):
+        return MappingProxyType({ key: copy_output(item) for key, item in value.items() })
+    if is_dataclass(value) and hasattr(value, '__dict__'):
+        output = object.__new__(type(value))
+        output.__dict__.update({ key: copy_output(item) for key, item in value.__dict__.items() })
+        return output
+    return value
+
+@dataclass(frozen=True)
+class RsModuleSnapshot:
+    version: int
+    power: Tuple[float, ...]
+    resources: Tuple[Any, ...]
+    messages: Tuple[Any, ...]
+    outputs: Tuple[Any, ...]
+    features: Tuple[Any, ...] = ()
+
+    def get_power_consumption(self) -> Tuple[float, ...]:
+        return self.power
+
+    def get_resources(self) -> Tuple[Any, ...]:
+        return self.resources
+
+    def get_all_messages(self) -> Tuple[Any, ...]:
+        return self.messages
+
+    def get_outputs(self) -> Tuple[Any, ...]:
+        return self.outputs
+
+    def get_features(self) -> Tuple[Any, ...]:
+        return self.features
+
+@dataclass(frozen=True)
+class RsDeviceSnapshot:
+    version: int
+    output: RsDevice_output
+    modules: Mapping[ModuleType, RsModuleSnapshot]
+
+    def get_power_consumption(self) -> RsDevice_output:
+        return self.output
+
+    def get_module(self, modtype: ModuleType) -> RsModuleSnapshot:
+        return self.modules[modtype]
+
 @dataclass
 class Ambient:
     typical: float = field(default=25.0)
@@ -88,6 +145,9 @@ class Ambient:
 class ThermalSpec:
     theta_ja: float = field(default=10.0)
     ambient: Ambient = field(default_factory=Ambient)
+    # convergence criteria of the junction temperature solver (degree celsius and number of static power passes)
+    tolerance: float = field(default=1e-3)
+    max_iterations: int = field(default=4)
 
 @dataclass
 class TypicalDynamicScaling:
@@ -109,6 +169,9 @@ class StaticPowerResult():
     powers: List[PowerValue] = field(default_factory=list)
     next_temperature: float = field(default=0.0)
     temperature: float = field(default=0.0)
+    iterations: int = field(default=0)
+    residual: float = field(default=0.0)
+    converged: bool = field(default=False)
 
     def add(self, powers: List[PowerValue]) -> None:
         self.powers.extend(powers)
@@ -159,6 +222,19 @@ class RsDevice:
         # static power output result for worse & typical cases
         self.static_power_output = [StaticPowerResult(), StaticPowerResult()]
 
+        # computation is deferred until commit while a transaction is open
+        self.transaction = False
+
+        # identifies this device among the ones created by this process (device ids are
+        # reused when a project is reopened)
+        self.instance_id = next(device_instance_ids)
+
+        # incremented on every modification of the inputs
+        self.revision = 0
+
+        # notified on every modification of the inputs and snapshot published
+        self.changed = threading.Condition()
+
         # fabric logic element module
         self.resources.register_module(ModuleType.FABRIC_LE, Fabric_LE_SubModule(self.resources, []))
 
@@ -178,7 +254,9 @@ class RsDevice:
         self.resources.register_module(ModuleType.SOC_PERIPHERALS, Peripheral_SubModule(self.resources))
 
         # skip compute output power and exit function if no power data available
+        self.snapshot: RsDeviceSnapshot = None
         if not self.resources.powercfg.is_loaded():
+            self.publish_snapshot()
             return
 
         # perform initial calculation
@@ -187,6 +265,45 @@ class RsDevice:
     def get_module(self, modtype):
         return self.resources.get_module(modtype)
 
+    def get_snapshot(self) -> RsDeviceSnapshot:
+        # results of the last computation, safe to read while the device is being modified
+        return self.snapshot
+
+    def snapshot_module(self, modtype : ModuleType, version : int) -> RsModuleSnapshot:
+        module = self.get_module(modtype)
+        if modtype == ModuleType.SOC_PERIPHERALS:
+            outputs = [{ 'output': p.get_output(), 'messages': p.get_messages(), 'ports': [port.output for port in p.get_ports() or []] } \
+                for p in module.get_peripherals()]
+        else:
+            outputs = [item.output for item in module.get_all()]
+        return RsModuleSnapshot(version=version, power=copy_output(module.get_power_consumption()), \
+            resources=copy_output(module.get_resources()), messages=tuple(module.get_all_messages()), outputs=copy_output(outputs), \
+            features=copy_output(module.get_features()) if modtype == ModuleType.IO else ())
+
+    def publish_snapshot(self, modtypes : List[ModuleType] = None) -> None:
+        # copy the outputs of the modules computed (or all) into a new snapshot, the others are shared
+        # with the previous one, then replace the snapshot at once
+        version = self.snapshot.version + 1 if self.snapshot else 1
+        modules = dict(self.snapshot.modules) if self.snapshot else {}
+        for modtype in (ModuleType.CLOCKING, ModuleType.FABRIC_LE, ModuleType.BRAM, ModuleType.DSP, \
+                ModuleType.IO, ModuleType.SOC_PERIPHERALS):
+            if modtypes is None or modtype in modtypes or modtype not in modules:
+                modules[modtype] = self.snapshot_module(modtype, version)
+        self.snapshot = RsDeviceSnapshot(version=version, output=copy_output(self.output), modules=MappingProxyType(modules))
+        self.notify_change()
+
+    def notify_change(self) -> None:
+        with self.changed:
+            self.changed.notify_all()
+
+    def wait_change(self, revision : int, version : int, timeout : float = None) -> bool:
+        # wait until the inputs are modified or a snapshot is published after the given revision &
+        # snapshot version, returns False on timeout or if woken up without change
+        with self.changed:
+            if (self.revision, self.snapshot.version) == (revision, version):
+                self.changed.wait(timeout)
+            return (self.revision, self.snapshot.version) != (revision, version)
+
     def update_dynamic_power_output(self, cmplx : DeviceComplex, typ : str, power : float) -> None:
         for elem in cmplx.dynamic.components:
             if elem.type == typ:
@@ -230,25 +347,108 @@ class RsDevice:
         return self.get_processing_total_dynamic_power(worsecase) + \
             self.get_fpga_total_dynamic_power(worsecase)
 
+    def get_dirty_modules(self) -> List[ModuleType]:
+        dirty = [modtype for modtype in (ModuleType.CLOCKING, ModuleType.FABRIC_LE, ModuleType.BRAM, ModuleType.DSP, \
+            ModuleType.IO, ModuleType.SOC_PERIPHERALS) if self.resources.get_module(modtype).is_dirty()]
+
+        # clock fanout is derived from fabric logic element, bram & dsp inputs
+        if ModuleType.CLOCKING not in dirty and any(modtype in dirty for modtype in (ModuleType.FABRIC_LE, \
+                ModuleType.BRAM, ModuleType.DSP)):
+            dirty.insert(0, ModuleType.CLOCKING)
+
+        return dirty
+
+    def get_clock_consumers(self, modtype : ModuleType, clocks : List[str]) -> List:
+        consumers = {}
+        for clkname in clocks:
+            for item in self.resources.get_clock_consumers(clkname, modtype):
+                consumers[id(item)] = item
+        return list(consumers.values())
+
+    def in_transaction(self) -> bool:
+        return self.transaction
+
+    def is_stale(self) -> bool:
+        return self.output.stale
+
+    def begin_transaction(self) -> None:
+        self.transaction = True
+
+    def commit_transaction(self) -> None:
+        self.transaction = False
+        if self.output.stale:
+            self.compute_output_power()
+
+    def abort_transaction(self) -> None:
+        # the changes made within the transaction are kept, the results are recomputed from them
+        self.transaction = False
+        self.compute_output_power()
+
+    def get_instance_id(self) -> int:
+        return self.instance_id
+
+    def get_revision(self) -> int:
+        return self.revision
+
+    def request_compute(self, deferred: bool = False) -> None:
+        # inputs have been modified
+        self.revision += 1
+
+        # mark the output as stale instead of computing when deferred or within a transaction
+        if deferred or self.transaction:
+            self.output.stale = True
+            self.notify_change()
+        else:
+            self.compute_output_power()
+
     def compute_output_power(self):
+        # only recompute the modules whose inputs (or dependencies) changed since last computation
+        dirty = self.get_dirty_modules()
+
+        # re-index the clock consumers of the modified modules
+        for modtype in (ModuleType.FABRIC_LE, ModuleType.BRAM, ModuleType.DSP, ModuleType.IO):
+            if modtype in dirty:
+                self.resources.update_clock_consumers(modtype)
+
+        # clocks which have been added, modified or removed since last computation
+        clocks = list(self.resources.get_module(ModuleType.CLOCKING).get_modified_clocks())
+
         # compute total dynamic power of each sub modules (exclude peripherals)
+        computed = []
         for modtype in (ModuleType.CLOCKING, ModuleType.FABRIC_LE, ModuleType.BRAM, ModuleType.DSP, \
                 ModuleType.IO):
             module = self.resources.get_module(modtype)
-            module.compute_output_power()
+            if modtype in dirty:
+                module.compute_output_power()
+            elif items := self.get_clock_consumers(modtype, clocks):
+                if modtype == ModuleType.IO:
+                    # io bank allocation spans over all items thus recompute the whole module
+                    module.compute_output_power()
+                else:
+                    # only recompute the items which use the modified clocks
+                    module.compute_output_power(items)
+            else:
+                continue
+            computed.append(modtype)
+            module.set_dirty(False)
             power = module.get_total_output_power()
             self.update_dynamic_power_output(self.output.fpga_complex, \
                 self.get_module_name(modtype), power)
 
         # compute total dynamic power for each sub-components of the peripherals module
-        periph_mod = self.resources.get_module(ModuleType.SOC_PERIPHERALS)
-        periph_mod.compute_output_power()
-        self.update_dynamic_power_output(self.output.processing_complex, 'acpu', periph_mod.get_processor_output_power())
-        self.update_dynamic_power_output(self.output.processing_complex, 'peripherals', periph_mod.get_peripherals_output_power())
-        self.update_dynamic_power_output(self.output.processing_complex, 'bcpu', periph_mod.get_bcpu_output_power())
-        self.update_dynamic_power_output(self.output.processing_complex, 'memory', periph_mod.get_memory_output_power())
-        self.update_dynamic_power_output(self.output.processing_complex, 'dma', periph_mod.get_dma_output_power())
-        self.update_dynamic_power_output(self.output.processing_complex, 'noc', periph_mod.get_noc_output_power())
+        if ModuleType.SOC_PERIPHERALS in dirty or clocks:
+            periph_mod = self.resources.get_module(ModuleType.SOC_PERIPHERALS)
+            if clocks:
+                periph_mod.set_clocks_modified()
+            periph_mod.compute_output_power()
+            periph_mod.set_dirty(False)
+            computed.append(ModuleType.SOC_PERIPHERALS)
+            self.update_dynamic_power_output(self.output.processing_complex, 'acpu', periph_mod.get_processor_output_power())
+            self.update_dynamic_power_output(self.output.processing_complex, 'peripherals', periph_mod.get_peripherals_output_power())
+            self.update_dynamic_power_output(self.output.processing_complex, 'bcpu', periph_mod.get_bcpu_output_power())
+            self.update_dynamic_power_output(self.output.processing_complex, 'memory', periph_mod.get_memory_output_power())
+            self.update_dynamic_power_output(self.output.processing_complex, 'dma', periph_mod.get_dma_output_power())
+            self.update_dynamic_power_output(self.output.processing_complex, 'noc', periph_mod.get_noc_output_power())
 
         # compute the percentage fields by the sum of the powers of the modules
         self.output.processing_complex.dynamic.compute()
@@ -269,6 +469,18 @@ class RsDevice:
         self.output.total_power_temperature[1].temperature = self.get_junction_temperature(False)
         self.output.total_power_temperature[1].power = self.get_total_dynamic_power(False) + \
             self.get_total_static_power(False)
+        self.output.stale = False
+        self.publish_snapshot(computed)
+
+    def compute_output_power_trace(self) -> List[str]:
+        # recompute every module and collect the trace messages of this computation only, regardless
+        # of the log level
+        for module in self.resources.get_modules():
+            if module:
+                module.set_dirty()
+        with capture_trace() as records:
+            self.compute_output_power()
+        return records
 
     def get_power_consumption(self):
         return self.output
@@ -288,13 +500,31 @@ class RsDevice:
         return power
 
     def compute_power_junction_temperature(self, temperature: float, theta_ja: float, dynamic_power: float, \
-            scenario: ScenarioType, N: int = 4) -> StaticPowerResult:
+            scenario: ScenarioType, tolerance: float = 1e-3, max_iterations: int = 4, secant: bool = True) -> StaticPowerResult:
+        # solve tj = ta + theta_ja * (static(tj) + dynamic) by fixed-point iteration. with secant enabled,
+        # the next guess is taken from the secant of the residual through the last two evaluations
         next_temperature = temperature
+        prev = None
         res = None
-        for i in range(N):
+        for i in range(max_iterations):
             res = self.compute(next_temperature, scenario)
+            res.temperature = next_temperature
             res.next_temperature = temperature + (theta_ja * (res.get_total_power() + dynamic_power))
+            res.iterations = i + 1
+            res.residual = abs(res.next_temperature - res.temperature)
+            if not math.isfinite(res.residual):
+                break
+            if res.residual <= tolerance:
+                res.converged = True
+                return res
             next_temperature = res.next_temperature
+            if secant and prev is not None:
+                f0 = prev.next_temperature - prev.temperature
+                f1 = res.next_temperature - res.temperature
+                if f1 != f0:
+                    next_temperature = res.temperature - f1 * (res.temperature - prev.temperature) / (f1 - f0)
+            prev = res
+        log(f'[DEVICE] Junction temperature did not converge for {scenario.value} scenario after {res.iterations} iteration(s) (residual {res.residual})', RsLogLevel.WARNING)
         return res
 
     def compute_static_power(self):
@@ -303,17 +533,22 @@ class RsDevice:
             self.specification.thermal.ambient.worsecase, \
             self.specification.thermal.theta_ja, \
             self.get_total_dynamic_power(True),
-            ScenarioType.WORSE)
+            ScenarioType.WORSE,
+            self.specification.thermal.tolerance,
+            self.specification.thermal.max_iterations)
 
         # static power & junction temperature for typical case
         self.static_power_output[1] = self.compute_power_junction_temperature( \
             self.specification.thermal.ambient.typical, \
             self.specification.thermal.theta_ja, \
             self.get_total_dynamic_power(False),
-            ScenarioType.TYPICAL)
+            ScenarioType.TYPICAL,
+            self.specification.thermal.tolerance,
+            self.specification.thermal.max_iterations)
 
     def clear(self) -> None:
-        # clear all device inputs by user
+        # clear all device inputs by user, a transaction left open by a client is closed as well
+        self.transaction = False
         for module in self.resources.get_modules():
             if module:
                 module.clear()
@@ -2,10 +2,14 @@
 #  Copyright (C) 2024 RapidSilicon
 #  Authorized use only
 #
-from typing import List
+from contextlib import contextmanager, ExitStack
+from typing import Dict, List
+from device.device_resource import Device
 from device.device_xml_parser import parse_device_xml, DeviceList
+from utilities.common_utils import RsReadWriteLock
 from .rs_device_resources import ModuleType, DeviceNotFoundException
 from .rs_device import RsDevice
+import threading
 
 class RsDeviceManager:
     __instance = None
@@ -16,6 +20,10 @@ class RsDeviceManager:
 
     def __init__(self) -> None:
         self.devices: List[RsDevice] = []
+        self.device_list: DeviceList = DeviceList(devices=[])
+        self.pending_devices: Dict[str, Device] = {}
+        self.device_locks: Dict[str, RsReadWriteLock] = {}
+        self.lock = threading.Lock()
 
     @staticmethod
     def get_instance() -> 'RsDeviceManager':
@@ -25,18 +33,60 @@ class RsDeviceManager:
 
     def load_xml(self, device_xml : str) -> None:
         self.device_list = parse_device_xml(device_xml)
+        # devices are created on first access by get_device
         for res in self.device_list.devices:
-            self.devices.append(RsDevice(res))
+            self.pending_devices.setdefault(res.name, res)
+
+    def get_device_list(self) -> List[Device]:
+        return self.device_list.devices
 
     def get_device_all(self) -> List[RsDevice]:
-        return self.devices
+        # devices accessed so far in device list order, the pending ones are not created
+        with self.lock:
+            order = { res.name: idx for idx, res in reversed(list(enumerate(self.device_list.devices))) }
+            return sorted(self.devices, key=lambda device: order.get(device.id, len(order)))
+
+    def get_created_devices(self) -> List[RsDevice]:
+        # devices accessed so far, the pending ones only hold defaults
+        with self.lock:
+            return list(self.devices)
+
+    def get_pending_devices(self) -> List[Device]:
+        # devices not accessed yet in device list order, their inputs are the defaults
+        with self.lock:
+            return [res for res in self.device_list.devices if res.name in self.pending_devices]
 
     def get_device(self, device_id : str) -> RsDevice:
-        devices = [device for device in self.devices if device.id == device_id]
-        if devices:
-            return devices[0]
+        with self.lock:
+            devices = [device for device in self.devices if device.id == device_id]
+            if devices:
+                return devices[0]
+            if device_id in self.pending_devices:
+                device = RsDevice(self.pending_devices.pop(device_id))
+                self.devices.append(device)
+                return device
         raise DeviceNotFoundException
 
+    def get_device_lock(self, device_id : str) -> RsReadWriteLock:
+        # reads of a device run concurrently while its mutations and recomputes are serialized
+        with self.lock:
+            if device_id not in self.device_locks:
+                if device_id not in self.pending_devices and not any(device.id == device_id for device in self.devices):
+                    raise DeviceNotFoundException
+                self.device_locks[device_id] = RsReadWriteLock()
+            return self.device_locks[device_id]
+
+    @contextmanager
+    def lock_devices(self, write : bool = True):
+        # lock all devices in the same order to prevent deadlocks between callers
+        with self.lock:
+            device_ids = sorted(set(self.pending_devices) | set(device.id for device in self.devices))
+        with ExitStack() as stack:
+            for device_id in device_ids:
+                device_lock = self.get_device_lock(device_id)
+                stack.enter_context(device_lock.write_locked() if write else device_lock.read_locked())
+            yield
+
     def clear_all_device_inputs(self) -> None:
         for device in self.devices:
             device.clear()
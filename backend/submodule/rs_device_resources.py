@@ -5,6 +5,7 @@ from .rs_power_config import RsPowerConfig, ElementType, ScenarioType
 from .rs_logger import log, RsLogLevel
 from utilities.common_utils import RsEnum, RsCustomException
 from dataclasses import dataclass, field
+from typing import Any, Dict, List
 
 class DeviceNotFoundException(RsCustomException):
     def __init__(self):
@@ -170,6 +171,7 @@ class RsDeviceResources:
     def __init__(self, device):
         self.device: Device = device
         self.modules = [None, None, None, None, None, None, None]
+        self.clock_consumers: Dict[str, Dict[ModuleType, List[Any]]] = {}
         self.powercfg = RsPowerConfig()
         filepath = self.get_power_config_filepath()
         if filepath:
@@ -537,7 +539,28 @@ class RsDeviceResources:
     def get_clock(self, clkname):
         clock_module = self.get_module(ModuleType.CLOCKING)
         if clock_module != None:
-            for clock in clock_module.get_all():
-                if clock.port == clkname:
-                    return clock
+            return clock_module.get_clock_by_port(clkname)
         return None
+
+    def get_item_clocks(self, modtype: ModuleType, item) -> List[str]:
+        if modtype == ModuleType.BRAM:
+            return [item.port_a.clock, item.port_b.clock]
+        return [item.clock]
+
+    def update_clock_consumers(self, modtype: ModuleType) -> None:
+        # drop the existing entries of the module
+        for clkname in list(self.clock_consumers):
+            self.clock_consumers[clkname].pop(modtype, None)
+            if not self.clock_consumers[clkname]:
+                del self.clock_consumers[clkname]
+
+        # index the items of the module by the name of the clocks they use. an item is
+        # indexed once per port using the clock (e.g. bram port a & b)
+        module = self.get_module(modtype)
+        if module != None:
+            for item in module.get_all():
+                for clkname in self.get_item_clocks(modtype, item):
+                    self.clock_consumers.setdefault(clkname, {}).setdefault(modtype, []).append(item)
+
+    def get_clock_consumers(self, clkname: str, modtype: ModuleType) -> List[Any]:
+        return self.clock_consumers.get(clkname, {}).get(modtype, [])
@@ -1,14 +1,17 @@
+from contextlib import contextmanager
 from enum import Enum
-from typing import Union
+from typing import Iterator, List, Union
 import os
 import logging
 import logging.handlers
+import threading
 
 class RsLogLevel(Enum):
     DEBUG = 'DEBUG'
     INFO = 'INFO'
     WARNING = 'WARNING'
     ERROR = 'ERROR'
+    CRITICAL = 'CRITICAL'
 
 def get_formatter() -> logging.Formatter:
     return logging.Formatter(fmt='%(asctime)s.%(msecs)03d - %(levelname)s - %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
@@ -23,12 +26,21 @@ def get_console_handler() -> logging.Handler:
     handler.setFormatter(get_formatter())
     return handler
 
-def log_setup(filename: str = 'app.log', max_bytes: int = 0, backup_count: int = 0) -> None:
+def log_setup(filename: str = 'app.log', max_bytes: int = 0, backup_count: int = 0, level: RsLogLevel = RsLogLevel.INFO) -> None:
     logger = logging.getLogger("rs_logger")
     if not logger.handlers:
         logger.addHandler(get_file_handler(filename, max_bytes, backup_count))
         logger.addHandler(get_console_handler())
-        logger.setLevel(logging.DEBUG)
+    set_log_level(level)
+
+def set_log_level(level: RsLogLevel) -> None:
+    logging.getLogger("rs_logger").setLevel(level.value)
+
+def get_log_level() -> RsLogLevel:
+    # first level at or above the effective one, e.g. DEBUG for NOTSET (everything is logged) or INFO for a
+    # custom level between DEBUG and INFO
+    level = logging.getLogger("rs_logger").getEffectiveLevel()
+    return next((l for l in RsLogLevel if logging.getLevelName(l.value) >= level), RsLogLevel.CRITICAL)
 
 def log(msg: str, level: RsLogLevel = RsLogLevel.INFO, *, exc_info: Union[Exception, bool] = False) -> None:
     logger = logging.getLogger("rs_logger")
@@ -38,5 +50,31 @@ def log(msg: str, level: RsLogLevel = RsLogLevel.INFO, *, exc_info: Union[Except
         logger.warning(msg, exc_info=exc_info)
     elif level == RsLogLevel.ERROR:
         logger.error(msg, exc_info=exc_info)
+    elif level == RsLogLevel.CRITICAL:
+        logger.critical(msg, exc_info=exc_info)
     else:
         logger.info(msg, exc_info=exc_info)
+
+# per thread trace records collected by capture_trace
+trace_records = threading.local()
+
+def trace_enabled() -> bool:
+    # guard for trace calls in compute loops, false unless debug logging is on or a trace is being captured
+    return getattr(trace_records, 'records', None) is not None or logging.getLogger("rs_logger").isEnabledFor(logging.DEBUG)
+
+def trace(msg: str) -> None:
+    # the messages are formatted by the callers (f-strings) behind trace_enabled
+    records = getattr(trace_records, 'records', None)
+    if records is not None:
+        records.append(msg)
+    logging.getLogger("rs_logger").debug(msg)
+
+@contextmanager
+def capture_trace() -> Iterator[List[str]]:
+    # collect trace messages emitted by the current thread within the block, regardless of the log level
+    previous = getattr(trace_records, 'records', None)
+    trace_records.records = records = []
+    try:
+        yield records
+    finally:
+        trace_records.records = previous
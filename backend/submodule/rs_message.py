@@ -3,8 +3,8 @@
 #  Authorized use only
 #
 from enum import Enum
-from typing import Dict, Any
-import copy
+from functools import lru_cache
+from typing import Dict, Any, Tuple
 
 class RsMessageType(Enum):
     ERRO = "error"
@@ -12,10 +12,19 @@ class RsMessageType(Enum):
     INFO = "info"
 
 class RsMessage:
+    # immutable as the instances are shared between items
+    __slots__ = ('code', 'type', 'text')
+
     def __init__(self, message_code, message_type, message_text):
-        self.code = message_code
-        self.type = message_type
-        self.text = message_text
+        object.__setattr__(self, 'code', message_code)
+        object.__setattr__(self, 'type', message_type)
+        object.__setattr__(self, 'text', message_text)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"'{type(self).__name__}' object is immutable")
+
+    def __reduce__(self):
+        return (RsMessage, (self.code, self.type, self.text))
 
 class RsMessageManager:
     messages = [
@@ -46,12 +55,26 @@ class RsMessageManager:
         RsMessage(311, RsMessageType.ERRO, "Load io error: {message}"),
     ]
 
+    # message table indexed by code
+    message_table: Dict[int, RsMessage] = { message.code: message for message in messages }
+
+    @staticmethod
+    @lru_cache(maxsize=4096)
+    def get_formatted_message(message_code: int, params: Tuple[Tuple[str, type, Any], ...]) -> RsMessage:
+        message = RsMessageManager.message_table[message_code]
+        return RsMessage(message.code, message.type, message.text.format(**{ key: value for key, _, value in params }))
+
     @staticmethod
     def get_message(message_code: int, params : Dict[str, Any] = None) -> RsMessage:
-        message = [m for m in RsMessageManager.messages if m.code == message_code]
-        if message:
-            copied_message = copy.deepcopy(message[0])
-            if params is not None:
-                copied_message.text = copied_message.text.format(**params)
-            return copied_message
-        return RsMessageManager.messages[0]
+        message = RsMessageManager.message_table.get(message_code)
+        if message is None:
+            return RsMessageManager.messages[0]
+        if params is None:
+            return message
+        try:
+            # the value types are part of the key since equal values (1, 1.0, True) format differently
+            return RsMessageManager.get_formatted_message(message_code, \
+                tuple((key, type(value), value) for key, value in sorted(params.items())))
+        except TypeError:
+            # unhashable parameter values are formatted without caching
+            return RsMessage(message.code, message.type, message.text.format(**params))
@@ -1,12 +1,20 @@
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, fields as dataclass_fields, replace
 from enum import Enum
 from marshmallow import Schema, fields, post_load, validate
 from marshmallow.exceptions import ValidationError
 from utilities.common_utils import RsCustomException
-from typing import List, Tuple
+from .rs_logger import RsLogLevel, log
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, Tuple
 import json
 import jsonref
+import hashlib
+import numpy as np
 import os
+import pickle
+import threading
+from urllib.parse import urlsplit
+from urllib.request import url2pathname
 
 class PowerConfigFileNotFoundException(RsCustomException):
     def __init__(self, filepath: str):
@@ -64,32 +72,70 @@ class PowerValue:
     type: str
     value: float
 
-@dataclass
+# the parsed power config is shared by all devices thus made of frozen dataclasses and tuples
+@dataclass(frozen=True)
 class RsDynamicPowerCoeff:
     name: str = field(default='')
     value: float = field(default=0.0)
 
-@dataclass
+@dataclass(frozen=True)
 class RsStaticPowerScenario:
     type: ScenarioType
-    coeffs: List[float]
+    coeffs: Tuple[float, ...]
     factor: float
 
-@dataclass
+@dataclass(frozen=True)
 class RsStaticPowerConfig:
     rail_type: str
     domain: str
-    scenarios: List[RsStaticPowerScenario] = field(default_factory=list)
+    scenarios: Tuple[RsStaticPowerScenario, ...] = field(default=())
 
-@dataclass
+@dataclass(frozen=True)
 class RsComponent:
     type: ElementType
-    coeffs: List[RsDynamicPowerCoeff] = field(default_factory=list)
-    static_power: List[RsStaticPowerConfig] = field(default_factory=list)
+    coeffs: Tuple[RsDynamicPowerCoeff, ...] = field(default=())
+    static_power: Tuple[RsStaticPowerConfig, ...] = field(default=())
 
-@dataclass
+@dataclass(frozen=True)
 class RsPowerConfigData:
-    components: List[RsComponent] = field(default_factory=list)
+    components: Tuple[RsComponent, ...] = field(default=())
+
+@dataclass(frozen=True)
+class RsStaticPowerTable:
+    rail_types: Tuple[str, ...] = field(default=())
+    rail_index: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=int))
+    coeffs: np.ndarray = field(default_factory=lambda: np.zeros((0, 0)))
+    factors: np.ndarray = field(default_factory=lambda: np.zeros(0))
+
+    def freeze(self) -> None:
+        for array in (self.rail_index, self.coeffs, self.factors):
+            array.setflags(write=False)
+
+    def evaluate(self, temperature) -> np.ndarray:
+        # horner evaluation of every scenario polynomial at once, same operation order as np.polyval.
+        # temperature can be a scalar or an array, result shape is (scenarios,) + temperature shape
+        temperature = np.asarray(temperature, dtype=float)
+        shape = (-1,) + (1,) * temperature.ndim
+        values = np.zeros((len(self.factors),) + temperature.shape)
+        for column in self.coeffs.T:
+            values = values * temperature + column.reshape(shape)
+        return values * self.factors.reshape(shape)
+
+    def compute(self, temperature, *multipliers) -> np.ndarray:
+        # total power of each rail, multipliers are scalars or per rail sequences applied in order
+        values = self.evaluate(temperature)
+        shape = (-1,) + (1,) * (values.ndim - 1)
+        for multiplier in multipliers:
+            if np.ndim(multiplier) == 0:
+                values = values * multiplier
+            else:
+                values = values * np.asarray(multiplier, dtype=float)[self.rail_index].reshape(shape)
+        totals = np.zeros((len(self.rail_types),) + values.shape[1:])
+        np.add.at(totals, self.rail_index, values)
+        return totals
+
+def to_tuples(data: Dict[str, Any]) -> Dict[str, Any]:
+    return { key: tuple(value) if isinstance(value, list) else value for key, value in data.items() }
 
 class RsDynamicPowerCoeffSchema(Schema):
     name = fields.Str(required=True)
@@ -97,7 +143,7 @@ class RsDynamicPowerCoeffSchema(Schema):
 
     @post_load
     def post_load(self, data, **kwargs):
-        return RsDynamicPowerCoeff(**data)
+        return RsDynamicPowerCoeff(**to_tuples(data))
 
 class RsStaticPowerScenarioSchema(Schema):
     type = fields.Enum(ScenarioType, by_value=True, required=True)
@@ -106,7 +152,7 @@ class RsStaticPowerScenarioSchema(Schema):
 
     @post_load
     def post_load(self, data, **kwargs):
-        return RsStaticPowerScenario(**data)
+        return RsStaticPowerScenario(**to_tuples(data))
 
 class RsStaticPowerConfigSchema(Schema):
     rail_type = fields.Str(required=True)
@@ -115,7 +161,7 @@ class RsStaticPowerConfigSchema(Schema):
 
     @post_load
     def post_load(self, data, **kwargs):
-        return RsStaticPowerConfig(**data)
+        return RsStaticPowerConfig(**to_tuples(data))
 
 class RsComponentSchema(Schema):
     type = fields.Enum(ElementType, by_value=True, required=True)
@@ -124,35 +170,91 @@ class RsComponentSchema(Schema):
 
     @post_load
     def post_load(self, data, **kwargs):
-        return RsComponent(**data)
+        return RsComponent(**to_tuples(data))
 
 class RsPowerConfigDataSchema(Schema):
     components = fields.Nested(RsComponentSchema, many=True, required=True)
 
     @post_load
     def post_load(self, data, **kwargs):
-        return RsPowerConfigData(**data)
+        return RsPowerConfigData(**to_tuples(data))
+
+def get_file_path(uri: str) -> str:
+    # base uri is 'file:///' + absolute path, drop the extra leading slashes on posix
+    path = url2pathname(urlsplit(uri).path)
+    if os.name != 'nt':
+        path = '/' + path.lstrip('/')
+    return os.path.realpath(path)
+
+def get_file_hash(filepath: str) -> str:
+    with open(filepath, 'rb') as fd:
+        return hashlib.sha256(fd.read()).hexdigest()
+
+def get_file_stamp(filepath: str) -> Tuple[int, int]:
+    stat = os.stat(filepath)
+    return (stat.st_mtime_ns, stat.st_size)
+
+@dataclass(frozen=True)
+class RsPowerConfigCacheEntry:
+    stamps: Dict[str, Tuple[int, int]]
+    data: RsPowerConfigData
+    components: Dict[ElementType, RsComponent]
+    coeffs: Dict[Tuple[ElementType, str], float]
+    polynomials: Dict[Tuple[ElementType, str, ScenarioType], Tuple[Tuple[str, Tuple[RsStaticPowerScenario, ...]], ...]]
+    static_tables: Dict[Tuple[ElementType, ScenarioType], RsStaticPowerTable]
+
+    def is_valid(self) -> bool:
+        # stale once the main file or any $ref file is modified or removed
+        try:
+            return all(get_file_stamp(f) == stamp for f, stamp in self.stamps.items())
+        except OSError:
+            return False
+
+def get_snapshot_version() -> str:
+    # digest of the layout of the pickled classes, the snapshots of a previous layout are rejected
+    layout = []
+    for cls in (ElementType, ScenarioType, RsDynamicPowerCoeff, RsStaticPowerScenario, RsStaticPowerConfig, RsComponent, \
+            RsPowerConfigData, RsStaticPowerTable, RsPowerConfigCacheEntry):
+        if issubclass(cls, Enum):
+            layout.append((cls.__qualname__, [(e.name, e.value) for e in cls]))
+        else:
+            layout.append((cls.__qualname__, [(f.name, str(f.type)) for f in dataclass_fields(cls)]))
+    return hashlib.sha256(repr(layout).encode('utf-8')).hexdigest()
+
+def is_private(stat: os.stat_result) -> bool:
+    # snapshots are unpickled thus only trusted when owned by the current user and not writable by others
+    return not hasattr(os, 'getuid') or (stat.st_uid == os.getuid() and not stat.st_mode & 0o022)
 
 class RsPowerConfig:
+    # parsed power config data shared by all devices, keyed by real file path
+    cache: Dict[str, RsPowerConfigCacheEntry] = {}
+    cache_lock = threading.Lock()
+
+    # directory of pickled snapshots reused across runs, disabled when None
+    snapshot_dir: str = None
+    SNAPSHOT_VERSION = get_snapshot_version()
+
     def __init__(self) -> None:
         self.filepath = None
         self.data: RsPowerConfigData = None
+        self.components: Mapping[ElementType, RsComponent] = {}
+        self.coeffs: Mapping[Tuple[ElementType, str], float] = {}
+        self.polynomials: Mapping[Tuple[ElementType, str, ScenarioType], Tuple[Tuple[str, Tuple[RsStaticPowerScenario, ...]], ...]] = {}
+        self.static_tables: Mapping[Tuple[ElementType, ScenarioType], RsStaticPowerTable] = {}
         self.loaded = False
 
     def load(self, filepath: str) -> bool:
         try:
-            # read the main power config json file
-            with open(filepath, 'r') as fd:
-                rawdata = json.load(fd)
-
-            # resolve all $ref nodes
-            resolved_data = jsonref.replace_refs(rawdata, base_uri='file:///' + os.path.abspath(os.path.dirname(filepath)).replace('\\', '/') + '/')
+            # reuse the data parsed for any device with the same power config file
+            entry = RsPowerConfig.get_cache_entry(filepath)
+            if entry is None:
+                entry = self.parse(filepath)
+                RsPowerConfig.set_cache_entry(filepath, entry)
 
-            # verify json structure
-            data = RsPowerConfigDataSchema().load(resolved_data)
-
-            # store data
-            self.filepath, self.data, self.loaded = filepath, data, True
+            # store data, the indexes shared with the other devices are read-only views
+            self.filepath, self.data, self.loaded = filepath, entry.data, True
+            self.components, self.coeffs = MappingProxyType(entry.components), MappingProxyType(entry.coeffs)
+            self.polynomials, self.static_tables = MappingProxyType(entry.polynomials), MappingProxyType(entry.static_tables)
 
         except FileNotFoundError as ex:
             raise PowerConfigFileNotFoundException(self.filepath)
@@ -162,10 +264,162 @@ class RsPowerConfig:
             raise PowerConfigParsingException(ex.message)
         except ValidationError as ex:
             raise PowerConfigSchemaValidationException(ex)
-        except Exception as ex:
-            raise ex
         return True
 
+    def parse(self, filepath: str) -> RsPowerConfigCacheEntry:
+        entry = self.read_snapshot(filepath)
+        if entry is None:
+            entry = self.parse_json(filepath)
+            self.write_snapshot(filepath, entry)
+        return entry
+
+    def get_snapshot_filepath(self, filepath: str) -> str:
+        return os.path.join(RsPowerConfig.snapshot_dir, hashlib.sha256(os.path.realpath(filepath).encode('utf-8')).hexdigest() + '.pickle')
+
+    def read_snapshot(self, filepath: str) -> RsPowerConfigCacheEntry:
+        if RsPowerConfig.snapshot_dir is None:
+            return None
+        snapshot_filepath = self.get_snapshot_filepath(filepath)
+        try:
+            if not is_private(os.stat(RsPowerConfig.snapshot_dir)):
+                log(f"Power config snapshot directory '{RsPowerConfig.snapshot_dir}' is accessible to other users, snapshot ignored", RsLogLevel.WARNING)
+                return None
+            with open(snapshot_filepath, 'rb') as fd:
+                if not is_private(os.fstat(fd.fileno())):
+                    log(f"Power config snapshot '{snapshot_filepath}' is accessible to other users, snapshot ignored", RsLogLevel.WARNING)
+                    return None
+                # the version is checked before unpickling the classes it describes
+                if pickle.load(fd) != RsPowerConfig.SNAPSHOT_VERSION:
+                    log(f"Power config snapshot '{snapshot_filepath}' is from another version, snapshot ignored", RsLogLevel.WARNING)
+                    return None
+                hashes, entry = pickle.load(fd)
+            # reuse only if the main file and all $ref files are unchanged
+            if any(get_file_hash(f) != h for f, h in hashes.items()):
+                log(f"Power config snapshot '{snapshot_filepath}' is outdated, snapshot ignored", RsLogLevel.WARNING)
+                return None
+            entry = replace(entry, stamps={f: get_file_stamp(f) for f in hashes})
+            for table in entry.static_tables.values():
+                table.freeze()
+            return entry
+        except FileNotFoundError:
+            return None
+        except (OSError, pickle.UnpicklingError, EOFError) as ex:
+            log(f"Failed to read power config snapshot '{snapshot_filepath}': {ex}", RsLogLevel.WARNING)
+            return None
+
+    def write_snapshot(self, filepath: str, entry: RsPowerConfigCacheEntry) -> None:
+        if RsPowerConfig.snapshot_dir is None:
+            return
+        snapshot_filepath = self.get_snapshot_filepath(filepath)
+        try:
+            os.makedirs(RsPowerConfig.snapshot_dir, mode=0o700, exist_ok=True)
+            if not is_private(os.stat(RsPowerConfig.snapshot_dir)):
+                log(f"Power config snapshot directory '{RsPowerConfig.snapshot_dir}' is accessible to other users, snapshot not written", RsLogLevel.WARNING)
+                return
+            hashes = {f: get_file_hash(f) for f in entry.stamps}
+            # write to a temp file first so a concurrent reader never sees a partial snapshot
+            temp_filepath = f'{snapshot_filepath}.{os.getpid()}.tmp'
+            with os.fdopen(os.open(temp_filepath, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_BINARY', 0), 0o600), 'wb') as fd:
+                pickle.dump(RsPowerConfig.SNAPSHOT_VERSION, fd, protocol=pickle.HIGHEST_PROTOCOL)
+                pickle.dump((hashes, entry), fd, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_filepath, snapshot_filepath)
+        except OSError as ex:
+            log(f"Failed to write power config snapshot '{snapshot_filepath}': {ex}", RsLogLevel.WARNING)
+
+    def parse_json(self, filepath: str) -> RsPowerConfigCacheEntry:
+        files = [os.path.realpath(filepath)]
+
+        # record every file pulled in by $ref
+        def loader(uri, **kwargs):
+            files.append(get_file_path(uri))
+            return jsonref.jsonloader(uri, **kwargs)
+
+        # read the main power config json file
+        with open(filepath, 'r') as fd:
+            rawdata = json.load(fd)
+
+        # resolve all $ref nodes
+        resolved_data = jsonref.replace_refs(rawdata, base_uri='file:///' + os.path.abspath(os.path.dirname(filepath)).replace('\\', '/') + '/', loader=loader)
+
+        # verify json structure
+        data = RsPowerConfigDataSchema().load(resolved_data)
+
+        # index components, coeffs & polynomials
+        components, coeffs, polynomials = self.build_index(data)
+
+        # compile static power polynomials
+        tables = self.compile_static_tables(components)
+
+        return RsPowerConfigCacheEntry(stamps={f: get_file_stamp(f) for f in files}, data=data, components=components, \
+            coeffs=coeffs, polynomials=polynomials, static_tables=tables)
+
+    @staticmethod
+    def get_cache_entry(filepath: str) -> RsPowerConfigCacheEntry:
+        with RsPowerConfig.cache_lock:
+            entry = RsPowerConfig.cache.get(os.path.realpath(filepath))
+        if entry is not None and entry.is_valid():
+            return entry
+        return None
+
+    @staticmethod
+    def set_cache_entry(filepath: str, entry: RsPowerConfigCacheEntry) -> None:
+        with RsPowerConfig.cache_lock:
+            RsPowerConfig.cache[os.path.realpath(filepath)] = entry
+
+    @staticmethod
+    def clear_cache() -> None:
+        with RsPowerConfig.cache_lock:
+            RsPowerConfig.cache.clear()
+
+    def build_index(self, data: RsPowerConfigData) -> Tuple[Dict, Dict, Dict]:
+        components, coeffs, polynomials = {}, {}, {}
+        for comp in data.components:
+            # keep the first component of a type
+            if comp.type in components:
+                continue
+            components[comp.type] = comp
+
+            # average of all coeffs with the same name
+            values = {}
+            for c in comp.coeffs:
+                values.setdefault(c.name, []).append(c.value)
+            for name, value in values.items():
+                coeffs[(comp.type, name)] = sum(value) / len(value)
+
+            # polynomials keyed by rail type & scenario, None matches all
+            for rail_type in [None] + [sp.rail_type for sp in comp.static_power]:
+                for scenario in [None] + list(ScenarioType):
+                    mylist = []
+                    for sp in comp.static_power:
+                        if rail_type is None or sp.rail_type == rail_type:
+                            mylist.append((sp.rail_type, tuple(scene for scene in sp.scenarios if scenario is None or scene.type == scenario)))
+                    polynomials[(comp.type, rail_type, scenario)] = tuple(mylist)
+        return components, coeffs, polynomials
+
+    def compile_static_tables(self, components: Dict[ElementType, RsComponent]) -> Dict[Tuple[ElementType, ScenarioType], RsStaticPowerTable]:
+        tables = {}
+        for comp in components.values():
+            for scenario in ScenarioType:
+                rail_types, rail_index, scenes = [], [], []
+                for index, sp in enumerate(comp.static_power):
+                    rail_types.append(sp.rail_type)
+                    for scene in sp.scenarios:
+                        if scene.type == scenario:
+                            rail_index.append(index)
+                            scenes.append(scene)
+                # pad coefficients with leading zeros up to the highest order
+                degree = max([len(s.coeffs) for s in scenes], default=0)
+                coeffs = np.zeros((len(scenes), degree))
+                for row, scene in enumerate(scenes):
+                    if scene.coeffs:
+                        coeffs[row, degree - len(scene.coeffs):] = scene.coeffs
+                table = RsStaticPowerTable(rail_types=tuple(rail_types), rail_index=np.array(rail_index, dtype=int), \
+                    coeffs=coeffs, factors=np.array([s.factor for s in scenes], dtype=float))
+                # tables are shared between devices
+                table.freeze()
+                tables[(comp.type, scenario)] = table
+        return tables
+
     def is_loaded(self) -> bool:
         return self.loaded
 
@@ -174,24 +428,31 @@ class RsPowerConfig:
         if not self.loaded:
             raise PowerConfigNotAvailable()
 
-        comps = [c for c in self.data.components if c.type == type]
-        if comps:
-            return comps[0]
+        comp = self.components.get(type)
+        if comp is not None:
+            return comp
         raise PowerConfigComponentNotFoundException(type.value)
 
     def get_coeff(self, type: ElementType, name: str) -> float:
-        values = [c.value for c in self.get_component(type).coeffs if c.name == name]
-        if values:
-            return sum(values) / len(values)
+        value = self.coeffs.get((type, name))
+        if value is not None:
+            return value
+        self.get_component(type)
         raise PowerConfigCoeffNotFoundException(type.value, name)
 
     def get_polynomial(self, type: ElementType, scenario: ScenarioType = None, rail_type: str = None) -> List[Tuple[str, List[RsStaticPowerScenario]]]:
-        mylist = []
-        for sp in self.get_component(type).static_power:
-            if rail_type is None or sp.rail_type == rail_type:
-                scene_list = []
-                for scene in sp.scenarios:
-                    if scenario is None or scene.type == scenario:
-                        scene_list.append(scene)
-                mylist.append((sp.rail_type, scene_list))
-        return mylist
+        mylist = self.polynomials.get((type, rail_type, scenario))
+        if mylist is not None:
+            return [(rail, list(scene_list)) for rail, scene_list in mylist]
+        self.get_component(type)
+        return []
+
+    def get_static_power_table(self, type: ElementType, scenario: ScenarioType) -> RsStaticPowerTable:
+        # raise power data not available exception
+        if not self.loaded:
+            raise PowerConfigNotAvailable()
+
+        table = self.static_tables.get((type, scenario))
+        if table is not None:
+            return table
+        raise PowerConfigComponentNotFoundException(type.value)
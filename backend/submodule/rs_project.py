@@ -14,6 +14,7 @@ from api.io import IoFeatureSchema, IoSchema
 from api.peripherals import PeripheralSchema
 from api.device import SpecificationSchema
 from submodule.peripherals import Peripheral, Peripheral_SubModule
+from submodule.rs_device import Specification
 from submodule.rs_device_manager import RsDeviceManager
 from submodule.rs_device_resources import DeviceNotFoundException, ModuleType, PeripheralType, ProjectNotLoadedException
 from submodule.rs_message import RsMessage, RsMessageManager
@@ -181,9 +182,12 @@ class RsProjectManager:
 
     def write_file(self, project: RsProject, filepath: str) -> None:
         with open(filepath, 'w') as fd:
-            # collect inputs from all devices
+            # collect inputs from all devices, the pending devices are read first since a device
+            # created meanwhile is then listed by get_device_all
+            devmgr = RsDeviceManager.get_instance()
+            pending = devmgr.get_pending_devices()
             devices = []
-            for device in RsDeviceManager.get_instance().get_device_all():
+            for device in devmgr.get_device_all():
                 data = {
                     'name': device.id,
                     'specification': device.specification,
@@ -200,6 +204,27 @@ class RsProjectManager:
                     }
                 }
                 devices.append(data)
+            # the untouched devices are saved with their default inputs without creating them
+            saved = set(data['name'] for data in devices)
+            for res in pending:
+                if res.name not in saved:
+                    devices.append({
+                        'name': res.name,
+                        'specification': Specification(),
+                        'configuration': {
+                            'clocking': [],
+                            'dsp': [],
+                            'fabric_le': [],
+                            'bram': [],
+                            'io': {
+                                'features': [],
+                                'items': [],
+                            },
+                            'peripherals': []
+                        }
+                    })
+            order = { res.name: idx for idx, res in reversed(list(enumerate(devmgr.get_device_list()))) }
+            devices.sort(key=lambda data: order.get(data['name'], len(order)))
             json.dump(RsProjectSchema(context={ 'output': False }).dump({ 'project': project, 'devices': devices }), fd, indent=2)
 
     def save(self) -> bool:
@@ -2,6 +2,8 @@
 #  Copyright (C) 2024 RapidSilicon
 #  Authorized use only
 #
+import threading
+from contextlib import contextmanager
 from enum import Enum
 
 class RsCustomException(Exception):
@@ -35,3 +37,50 @@ def get_enum_by_value(enum_class, value):
         if enum_member.value == value:
             return enum_member
     return None
+
+class RsReadWriteLock:
+    # many readers or a single writer, waiting writers take precedence over new readers
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.readers = 0
+        self.writer = False
+        self.writers_waiting = 0
+
+    def acquire_read(self) -> None:
+        with self.condition:
+            self.condition.wait_for(lambda: not self.writer and self.writers_waiting == 0)
+            self.readers += 1
+
+    def release_read(self) -> None:
+        with self.condition:
+            self.readers -= 1
+            if self.readers == 0:
+                self.condition.notify_all()
+
+    def acquire_write(self) -> None:
+        with self.condition:
+            self.writers_waiting += 1
+            self.condition.wait_for(lambda: not self.writer and self.readers == 0)
+            self.writers_waiting -= 1
+            self.writer = True
+
+    def release_write(self) -> None:
+        with self.condition:
+            self.writer = False
+            self.condition.notify_all()
+
+    @contextmanager
+    def read_locked(self):
+        self.acquire_read()
+        try:
+            yield self
+        finally:
+            self.release_read()
+
+    @contextmanager
+    def write_locked(self):
+        self.acquire_write()
+        try:
+            yield self
+        finally:
+            self.release_write()
@@ -1,6 +1,7 @@
 import pytest
 from flask import Flask
 from flask.testing import FlaskClient
+from types import SimpleNamespace
 from unittest.mock import patch
 from submodule.rs_device_manager import RsDeviceManager
 from submodule.rs_device_resources import DeviceNotFoundException, BramNotFoundException
@@ -57,3 +58,95 @@ def test_get_bram_consumption(mock_get_instance, client):
     response = client.get('/devices/test-device/bram/consumption')
     
     assert response.status_code == 200
+
+class MockBramModule:
+    def __init__(self):
+        self.itemlist = [SimpleNamespace(name='bram0', bram_used=1)]
+        self.dirty = False
+
+    def get(self, idx):
+        if 0 <= idx < len(self.itemlist):
+            return self.itemlist[idx]
+        raise BramNotFoundException
+
+    def add(self, data):
+        self.itemlist.append(SimpleNamespace(**data))
+        self.dirty = True
+        return self.itemlist[-1]
+
+    def update(self, idx, data):
+        vars(self.get(idx)).update(data)
+        self.dirty = True
+        return self.itemlist[idx]
+
+    def remove(self, idx):
+        self.get(idx)
+        self.dirty = True
+        return self.itemlist.pop(idx)
+
+    def insert(self, idx, item):
+        self.itemlist.insert(idx, item)
+        self.dirty = True
+        return item
+
+    def get_rows(self):
+        return [vars(item) for item in self.itemlist]
+
+# Test for BramsBatchApi POST
+@patch('submodule.rs_device_manager.RsDeviceManager.get_instance')
+@patch('submodule.rs_project.RsProjectManager.get_instance')
+def test_batch_bram(mock_project_mgr, mock_get_instance, client):
+    mock_device = mock_get_instance.return_value.get_device.return_value
+    mock_device.get_module.return_value = module = MockBramModule()
+
+    response = client.post('/devices/test-device/bram/batch', json=[
+        { 'op': 'add', 'data': { 'name': 'bram1', 'bram_used': 2 } },
+        { 'op': 'update', 'rownum': 0, 'data': { 'bram_used': 3 } },
+        { 'op': 'delete', 'rownum': 1 },
+    ])
+
+    assert response.status_code == 200
+    assert [{'name': 'bram1', 'bram_used': 2}, {'name': 'bram0', 'bram_used': 3}, None] == response.json
+    assert [{'name': 'bram0', 'bram_used': 3}] == module.get_rows()
+    mock_device.request_compute.assert_called_once_with(False)
+
+@patch('submodule.rs_device_manager.RsDeviceManager.get_instance')
+def test_batch_bram_failed(mock_get_instance, client):
+    mock_device = mock_get_instance.return_value.get_device.return_value
+    mock_device.get_module.return_value = module = MockBramModule()
+
+    response = client.post('/devices/test-device/bram/batch', json=[
+        { 'op': 'update', 'rownum': 0, 'data': { 'bram_used': 3 } },
+        { 'op': 'delete', 'rownum': 5 },
+        { 'op': 'add', 'data': { 'name': 'bram1' } },
+        { 'op': 'update', 'rownum': 7, 'data': { 'bram_used': 4 } },
+    ])
+
+    assert response.status_code == 400
+    assert [1, 3] == [e['index'] for e in response.json['errors']]
+    assert [{'name': 'bram0', 'bram_used': 1}] == module.get_rows()
+    # row numbers are validated before any row is modified
+    assert not module.dirty
+    mock_device.request_compute.assert_not_called()
+
+@patch('submodule.rs_device_manager.RsDeviceManager.get_instance')
+def test_batch_bram_schema_error(mock_get_instance, client):
+    mock_device = mock_get_instance.return_value.get_device.return_value
+    mock_device.get_module.return_value = module = MockBramModule()
+
+    response = client.post('/devices/test-device/bram/batch', json=[
+        { 'op': 'add', 'data': { 'bram_used': 'abc' } },
+        { 'op': 'update', 'data': { 'bram_used': 3 } },
+        { 'op': 'delete', 'rownum': 0 },
+    ])
+
+    assert response.status_code == 403
+    assert [0, 1] == sorted([e['index'] for e in response.json['errors']])
+    assert [{'name': 'bram0', 'bram_used': 1}] == module.get_rows()
+    mock_device.request_compute.assert_not_called()
+
+@patch('submodule.rs_device_manager.RsDeviceManager.get_instance')
+def test_batch_bram_device_not_found(mock_get_instance, client):
+    mock_get_instance.return_value.get_device.side_effect = DeviceNotFoundException
+    response = client.post('/devices/test-device/bram/batch', json=[])
+    assert response.status_code == 400
@@ -8,7 +8,8 @@ from flask import Flask
 from flask_restful import Api
 from submodule.rs_device_manager import RsDeviceManager, DeviceNotFoundException
 from submodule.rs_device_resources import ClockNotFoundException
-from api.clock import ClocksApi, ClockApi, ClockConsumptionApi
+from submodule.clock import Clock_SubModule
+from api.clock import ClocksApi, ClocksBatchApi, ClockApi, ClockConsumptionApi
 from marshmallow import ValidationError
 
 # Setting up Flask test application and the Api instance
@@ -18,6 +19,7 @@ def app():
     api = Api(app)
     # Register the routes for clock APIs
     api.add_resource(ClocksApi, '/devices/<string:device_id>/clocking')
+    api.add_resource(ClocksBatchApi, '/devices/<string:device_id>/clocking/batch')
     api.add_resource(ClockApi, '/devices/<string:device_id>/clocking/<int:rownum>')
     api.add_resource(ClockConsumptionApi, '/devices/<string:device_id>/clocking/consumption')
     return app
@@ -85,7 +87,8 @@ def test_clock_consumption_get(client, mock_device_manager):
     mock_clock_module.get_power_consumption.return_value = [100, 50, 20]
     mock_clock_module.get_resources.return_value = [10, 5, 2, 1]
     mock_clock_module.get_all_messages.return_value = []
-    mock_device.get_module.return_value = mock_clock_module
+    mock_device.is_stale.return_value = False
+    mock_device.get_snapshot.return_value.get_module.return_value = mock_clock_module
     mock_device_manager.get_device.return_value = mock_device
 
     response = client.get('/devices/device123/clocking/consumption')
@@ -98,7 +101,8 @@ def test_clock_consumption_get(client, mock_device_manager):
         'total_clock_block_power': 100,
         'total_clock_interconnect_power': 50,
         'total_pll_power': 20,
-        'messages': []
+        'messages': [],
+        'stale': False
     }
 
 # Test ClockApi GET with ClockNotFoundException 
@@ -111,3 +115,32 @@ def test_clockapi_get_clock_not_found(client, mock_device_manager):
 
     response = client.get('/devices/device123/clocking/1')
     assert response.status_code == 500  
+
+# Test ClocksBatchApi POST rollback of the applied operations
+def test_clocks_batch_rollback(client, mock_device_manager, mocker):
+    mock_resources = MagicMock()
+    mock_resources.get_num_Clocks.return_value = 5
+    module = Clock_SubModule(mock_resources)
+    module.add({"description": "Clock A", "port": "PORT_A"})
+    module.add({"description": "Clock B", "port": "PORT_B"})
+    module.add({"description": "Clock C", "port": "PORT_C"})
+    clock_a, clock_b, clock_c = module.get_all()
+    module.set_dirty(False)
+    mock_device = mock_device_manager.get_device.return_value
+    mock_device.get_module.return_value = module
+
+    response = client.post('/devices/device1/clocking/batch', json=[
+        { 'op': 'delete', 'rownum': 1 },
+        { 'op': 'update', 'rownum': 0, 'data': { 'port': 'PORT_D', 'frequency': 50000000 } },
+        { 'op': 'add', 'data': { 'description': 'Clock E', 'port': 'PORT_E' } },
+        { 'op': 'add', 'data': { 'description': 'Clock F', 'port': 'PORT_C' } },
+    ])
+
+    assert response.status_code == 400
+    assert [3] == [e['index'] for e in response.json['errors']]
+    assert module.get_all() == [clock_a, clock_b, clock_c]
+    assert (clock_a.port, clock_a.frequency) == ('PORT_A', 100000000)
+    assert module.get_clock_by_port('PORT_B') is clock_b
+    assert module.get_clock_by_port('PORT_D') is None
+    assert module.get_clock_by_port('PORT_E') is None
+    mock_device.request_compute.assert_not_called()
@@ -14,22 +14,26 @@ def client():
 def mock_device_manager(devices=None, device=None):
     mock_device_mgr = MagicMock()
     if devices is not None:
-        mock_device_mgr.get_device_all.return_value = devices
+        mock_device_mgr.get_device_list.return_value = devices
     if device is not None:
         mock_device_mgr.get_device.return_value = device
     return mock_device_mgr
 
 def test_get_devices(client):
     devices = [
-        {"id": "device_1", "series": "series_1"},
-        {"id": "device_2", "series": "series_2"}
+        {"name": "device_1", "series": "series_1", "family": "family_1"},
+        {"name": "device_2", "series": "series_2", "family": "family_2"}
     ]
     mock_device_mgr = mock_device_manager(devices=devices)
     
     with patch('api.device.RsDeviceManager.get_instance', return_value=mock_device_mgr):
         response = client.get('/devices')
         assert response.status_code == 200
-        assert response.json == devices
+        assert response.json == [
+            {"id": "device_1", "series": "series_1"},
+            {"id": "device_2", "series": "series_2"}
+        ]
+        mock_device_mgr.get_device_all.assert_not_called()
 
 def test_get_device_details(client):
     device = {
@@ -77,7 +81,8 @@ def test_update_device_spec(client):
 
 def test_get_device_consumption(client):
     mock_device = MagicMock()
-    mock_device.get_power_consumption.return_value = {
+    mock_device.is_stale.return_value = False
+    mock_device.get_snapshot.return_value.get_power_consumption.return_value = {
         "total_power_temperature": [
             {"type": "core", "power": 10, "temperature": 50},
             {"type": "peripheral", "power": 5, "temperature": 40}
@@ -101,3 +106,113 @@ def test_get_device_consumption(client):
         response = client.get('/devices/device_1/consumption')
         assert response.status_code == 200
         assert len(response.json['total_power_temperature']) == 2
+
+def test_get_device_consumption_trace(client):
+    mock_device = MagicMock()
+    mock_device.is_stale.return_value = False
+    mock_device.get_snapshot.return_value.get_power_consumption.return_value = { "total_power_temperature": [] }
+    mock_device.compute_output_power_trace.return_value = ['[DSP] total_power = 0.1']
+    mock_device_mgr = mock_device_manager(device=mock_device)
+
+    with patch('api.device.RsDeviceManager.get_instance', return_value=mock_device_mgr):
+        response = client.get('/devices/device_1/consumption?trace=true')
+        assert response.status_code == 200
+        assert response.json['trace'] == ['[DSP] total_power = 0.1']
+        assert 'ETag' not in response.headers
+        mock_device_mgr.get_device_lock.assert_called_once_with('device_1')
+        mock_device_mgr.get_device_lock.return_value.write_locked.assert_called_once()
+
+        response = client.get('/devices/device_1/consumption')
+        assert response.status_code == 200
+        assert 'trace' not in response.json
+        mock_device.compute_output_power_trace.assert_called_once()
+
+def test_update_device_spec_deferred(client):
+    mock_device = MagicMock()
+    mock_device_mgr = mock_device_manager(device=mock_device)
+
+    with patch('api.device.RsDeviceManager.get_instance', return_value=mock_device_mgr):
+        response = client.patch('/devices/device_1?compute=deferred', json={
+            "specification": {"power": {"budget": 15}}
+        })
+        assert response.status_code == 200
+        mock_device.request_compute.assert_called_once_with(True)
+
+def test_device_transaction(client):
+    mock_device = MagicMock()
+    mock_device.in_transaction.return_value = True
+    mock_device.is_stale.return_value = False
+    mock_device_mgr = mock_device_manager(device=mock_device)
+
+    with patch('api.device.RsDeviceManager.get_instance', return_value=mock_device_mgr):
+        response = client.post('/devices/device_1/transaction')
+        assert response.status_code == 200
+        assert response.json == {"transaction": True, "stale": False}
+        mock_device.begin_transaction.assert_called_once()
+
+        mock_device.in_transaction.return_value = False
+        response = client.post('/devices/device_1/transaction/commit')
+        assert response.status_code == 200
+        assert response.json == {"transaction": False, "stale": False}
+        mock_device.commit_transaction.assert_called_once()
+
+def test_device_transaction_abort(client):
+    mock_device = MagicMock()
+    mock_device.in_transaction.return_value = False
+    mock_device.is_stale.return_value = False
+    mock_device_mgr = mock_device_manager(device=mock_device)
+
+    with patch('api.device.RsDeviceManager.get_instance', return_value=mock_device_mgr):
+        response = client.delete('/devices/device_1/transaction')
+        assert response.status_code == 200
+        assert response.json == {"transaction": False, "stale": False}
+        mock_device.abort_transaction.assert_called_once()
+        mock_device.commit_transaction.assert_not_called()
+
+def test_device_transaction_device_not_found(client):
+    mock_device_mgr = MagicMock()
+    mock_device_mgr.get_device.side_effect = DeviceNotFoundException
+
+    with patch('api.device.RsDeviceManager.get_instance', return_value=mock_device_mgr):
+        response = client.post('/devices/unknown_device/transaction/commit')
+        assert response.status_code == 400
+
+def test_get_device_consumption_etag(client):
+    mock_device = MagicMock()
+    mock_device.get_instance_id.return_value = 1
+    mock_device.is_stale.return_value = False
+    mock_device.get_snapshot.return_value.version = 1
+    mock_device.get_snapshot.return_value.get_power_consumption.return_value = {}
+    mock_device_mgr = mock_device_manager(device=mock_device)
+
+    with patch('api.device.RsDeviceManager.get_instance', return_value=mock_device_mgr):
+        response = client.get('/devices/device_1/consumption')
+        assert response.status_code == 200
+        etag = response.headers['ETag']
+
+        # unchanged version
+        response = client.get('/devices/device_1/consumption', headers={'If-None-Match': etag})
+        assert response.status_code == 304
+        assert response.headers['ETag'] == etag
+        assert response.data == b''
+
+        # payload serialized once per version
+        response = client.get('/devices/device_1/consumption')
+        assert response.status_code == 200
+        assert response.json == {"stale": False}
+        assert mock_device.get_snapshot.return_value.get_power_consumption.call_count == 1
+
+        # deferred modification
+        mock_device.is_stale.return_value = True
+        response = client.get('/devices/device_1/consumption', headers={'If-None-Match': etag})
+        assert response.status_code == 200
+        assert response.headers['ETag'] != etag
+        assert response.json == {"stale": True}
+
+        # recomputed
+        mock_device.is_stale.return_value = False
+        mock_device.get_snapshot.return_value.version = 2
+        response = client.get('/devices/device_1/consumption', headers={'If-None-Match': etag})
+        assert response.status_code == 200
+        assert response.headers['ETag'] != etag
+        assert mock_device.get_snapshot.return_value.get_power_consumption.call_count == 3
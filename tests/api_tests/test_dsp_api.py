@@ -25,6 +25,20 @@ class MockDevice:
     def get_module(self, module_type):
         return MockDspModule()
 
+    version = 1
+
+    def is_stale(self):
+        return False
+
+    def get_instance_id(self):
+        return 1
+
+    def get_revision(self):
+        return 1
+
+    def get_snapshot(self):
+        return self
+
 class MockRsDeviceManager:
     @staticmethod
     def get_instance():
@@ -0,0 +1,128 @@
+import json
+import pytest
+from unittest.mock import patch, MagicMock
+from flask import Flask
+from device.device_resource import Device
+from submodule.rs_device import RsDevice
+from submodule.rs_device_resources import ModuleType
+from submodule.rs_message import RsMessageManager
+from api import events
+from api.events import events_api, get_state, get_delta, close_event_streams
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+    app.register_blueprint(events_api)
+    client = app.test_client()
+    yield client
+
+@pytest.fixture
+def device():
+    # no power data thus computed outputs are published as set by the tests
+    return RsDevice(Device(name='MockDevice', series='Gemini', family='Gemini', package='BGA', pin_count='100', \
+        speedgrade='1', core_voltage='0.8', filepath='device.xml', resources={}, internals={}))
+
+def parse_event(chunk):
+    fields = dict(line.split(': ', 1) for line in chunk.decode().strip().split('\n'))
+    return fields['event'], json.loads(fields['data'])
+
+def test_get_delta(device):
+    state = get_state(device, None)
+    delta = get_delta(None, state)
+    assert delta['version'] == device.get_snapshot().version
+    assert delta['stale'] == False
+    assert 'total_power_temperature' in delta['total']
+    assert set(delta['modules']) == {'clocking', 'fabric_le', 'bram', 'dsp', 'io', 'peripherals'}
+    assert 'total_dsp_block_power' in delta['modules']['dsp']['consumption']
+
+    # only the changes of the recomputed module
+    dsp = device.get_module(ModuleType.DSP).add({ 'name': 'DSP 1' })
+    dsp.output.block_power = 1.5
+    dsp.output.messages = [RsMessageManager.get_message(102)]
+    device.publish_snapshot([ModuleType.DSP])
+    previous, state = state, get_state(device, state)
+    assert state['modules'][ModuleType.IO] is previous['modules'][ModuleType.IO]
+    delta = get_delta(previous, state)
+    assert delta['version'] == previous['version'] + 1
+    assert 'total' not in delta
+    assert list(delta['modules']) == ['dsp']
+    assert delta['modules']['dsp']['count'] == 1
+    assert delta['modules']['dsp']['outputs'][0]['block_power'] == 1.5
+    assert delta['modules']['dsp']['messages'] == [{ 'type': 'info', 'text': 'DSP is disabled' }]
+
+    # unchanged row
+    device.get_module(ModuleType.DSP).add({ 'name': 'DSP 2' })
+    device.publish_snapshot([ModuleType.DSP])
+    previous, state = state, get_state(device, state)
+    delta = get_delta(previous, state)
+    assert delta['modules']['dsp']['count'] == 2
+    assert list(delta['modules']['dsp']['outputs']) == [1]
+    assert 'messages' not in delta['modules']['dsp']
+
+def test_stream_events(client, device):
+    mock_device_mgr = MagicMock()
+    mock_device_mgr.get_device.return_value = device
+    mock_device_mgr.get_created_devices.return_value = [device]
+
+    with patch('api.events.RsDeviceManager.get_instance', return_value=mock_device_mgr), \
+            patch.object(events, 'heartbeat_interval', 0.05):
+        response = client.get('/devices/MockDevice/events', buffered=False)
+        assert response.status_code == 200
+        assert response.mimetype == 'text/event-stream'
+        chunks = response.iter_encoded()
+        try:
+            event, data = parse_event(next(chunks))
+            assert event == 'delta'
+            assert 'modules' in data
+
+            # nothing changed
+            assert next(chunks) == b': keep-alive\n\n'
+
+            # deferred modification
+            device.get_module(ModuleType.DSP).add({ 'name': 'DSP 1' })
+            device.request_compute(True)
+            event, data = parse_event(next(chunks))
+            assert data == { 'version': device.get_snapshot().version, 'stale': True }
+
+            # recomputed
+            device.publish_snapshot([ModuleType.DSP])
+            event, data = parse_event(next(chunks))
+            assert data['version'] == device.get_snapshot().version
+            assert data['modules']['dsp']['count'] == 1
+
+            # streams end on shutdown
+            close_event_streams()
+            assert list(chunks) in ([], [b': keep-alive\n\n'])
+        finally:
+            events.streams_closed.clear()
+            response.close()
+
+def test_stream_events_device_not_found(client):
+    from submodule.rs_device_resources import DeviceNotFoundException
+    mock_device_mgr = MagicMock()
+    mock_device_mgr.get_device.side_effect = DeviceNotFoundException
+
+    with patch('api.events.RsDeviceManager.get_instance', return_value=mock_device_mgr):
+        response = client.get('/devices/unknown_device/events')
+        assert response.status_code == 400
+
+def test_stream_events_limit(client, device):
+    mock_device_mgr = MagicMock()
+    mock_device_mgr.get_device.return_value = device
+
+    with patch('api.events.RsDeviceManager.get_instance', return_value=mock_device_mgr), \
+            patch.object(events, 'heartbeat_interval', 0.05), patch.object(events, 'max_event_streams', 1):
+        response = client.get('/devices/MockDevice/events', buffered=False)
+        assert response.status_code == 200
+        next(response.iter_encoded())
+
+        # limit reached
+        response2 = client.get('/devices/MockDevice/events', buffered=False)
+        assert response2.status_code == 503
+
+        # released once closed
+        response.close()
+        response = client.get('/devices/MockDevice/events', buffered=False)
+        assert response.status_code == 200
+        response.close()
+        assert events.open_event_streams == 0
@@ -45,9 +45,12 @@ def test_get_fabric_logic_elements(mock_rs_manager):
     api_instance = Fabric_LesApi()
 
     # Calling the get method
-    response = api_instance.get(device_id="1234")
+    with app.test_request_context('/api/devices/1234/fabric_le'):
+        response, status_code, headers = api_instance.get(device_id="1234")
 
     # Assert the correct behavior
+    assert status_code == 200
+    assert 'ETag' in headers
     assert response == schema_mock_instance().dump.return_value
     schema_mock.stop()
 
@@ -198,7 +201,10 @@ def test_get_fabric_le_consumption(mock_schema, mock_rs_manager):
     api_instance = Fabric_LeConsumptionApi()
 
     # Calling the get method
-    response = api_instance.get(device_id="1234")
+    with app.test_request_context('/api/devices/1234/fabric_le/consumption'):
+        response, status_code, headers = api_instance.get(device_id="1234")
 
     # Assert the correct behavior
+    assert status_code == 200
+    assert 'ETag' in headers
     assert response == mock_schema_instance.dump.return_value
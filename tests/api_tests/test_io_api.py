@@ -157,7 +157,7 @@ def test_io_consumption_success(mock_device_manager, client):
     mock_io_module.get_features.return_value = []
     mock_io_module.get_resources.return_value = [[]]
     mock_io_module.get_all_messages.return_value = []
-    mock_device.get_module.return_value = mock_io_module
+    mock_device.get_snapshot.return_value.get_module.return_value = mock_io_module
     mock_device_manager.return_value.get_device.return_value = mock_device
 
     # Act
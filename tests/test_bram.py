@@ -99,3 +99,23 @@ def test_bram_submodule_get_all_messages(bram_submodule):
 def test_bram_submodule_clear(bram_submodule):
     bram_submodule.clear()
     assert len(bram_submodule.get_all()) == 0
+
+def test_bram_submodule_columnar_matches_scalar():
+    clocks = { 'clk_a': MockClock(133000000), 'clk_b': MockClock(7777777) }
+    resources = MockResources()
+    resources.get_clock = lambda clock_name: clocks.get(clock_name)
+
+    results = []
+    for columnar in (False, True):
+        bram_submodule = BRAM_SubModule(resources)
+        bram_submodule.columnar = columnar
+        for i in range(40):
+            bram_submodule.add({ 'name': f'BRAM{i}', 'enable': i % 7 != 0, 'type': list(BRAM_Type)[i % 10], 'bram_used': i % 4,
+                'port_a': { 'clock': ('clk_a', 'clk_b', 'clk_x')[i % 3], 'width': 8 + i, 'toggle_rate': 0.1 + i / 300 },
+                'port_b': { 'clock': ('clk_b', 'clk_a', '', 'clk_a')[i % 4], 'write_enable_rate': 0.3 + i / 97 } })
+        bram_submodule.compute_output_power()
+        results.append((bram_submodule.get_power_consumption(), [(item.port_a, item.port_b, item.output.port_a, item.output.port_b,
+            item.output.block_power, item.output.interconnect_power, item.output.percentage,
+            [message.code for message in item.output.messages]) for item in bram_submodule.get_all()]))
+
+    assert results[0] == results[1]
@@ -5,7 +5,7 @@
 import pytest
 from unittest.mock import Mock
 from submodule.clock import Clock, Source, ClockOutput, Clock_SubModule, Clock_State
-from submodule.rs_device_resources import RsDeviceResources, ClockNotFoundException, ClockMaxCountReachedException, ClockDescriptionPortValidationException
+from submodule.rs_device_resources import RsDeviceResources, ModuleType, ClockNotFoundException, ClockMaxCountReachedException, ClockDescriptionPortValidationException
 from submodule.rs_message import RsMessageType
 
 def test_clock_initialization():
@@ -166,3 +166,100 @@ def test_get_all_messages():
 
     assert len(messages) > 0
     assert messages[0].type == RsMessageType.INFO
+
+def test_clock_submodule_dirty_state():
+    mock_resources = Mock(spec=RsDeviceResources)
+    mock_resources.get_num_Clocks.return_value = 5
+    clock_submodule = Clock_SubModule(mock_resources)
+    assert clock_submodule.is_dirty() == True
+
+    clock_submodule.set_dirty(False)
+    clock_submodule.add({"description": "Clock A", "port": "PORT_A", "enable": True})
+    assert clock_submodule.is_dirty() == True
+
+    clock_submodule.set_dirty(False)
+    clock_submodule.update(0, {"frequency": 50000000})
+    assert clock_submodule.is_dirty() == True
+
+    clock_submodule.set_dirty(False)
+    clock_submodule.remove(0)
+    assert clock_submodule.is_dirty() == True
+
+    clock_submodule.set_dirty(False)
+    clock_submodule.clear()
+    assert clock_submodule.is_dirty() == True
+
+def test_clock_submodule_modified_clocks():
+    mock_resources = Mock(spec=RsDeviceResources)
+    mock_resources.get_num_Clocks.return_value = 5
+    clock_submodule = Clock_SubModule(mock_resources)
+    clock_submodule.add({"description": "Clock A", "port": "PORT_A", "enable": True})
+    clock_submodule.add({"description": "Clock B", "port": "PORT_B", "enable": True})
+    assert clock_submodule.get_modified_clocks() == {"PORT_A", "PORT_B"}
+
+    clock_submodule.set_dirty(False)
+    assert clock_submodule.get_modified_clocks() == set()
+
+    clock_submodule.update(0, {"port": "PORT_C"})
+    assert clock_submodule.get_modified_clocks() == {"PORT_A", "PORT_C"}
+
+    clock_submodule.set_dirty(False)
+    clock_submodule.remove(1)
+    assert clock_submodule.get_modified_clocks() == {"PORT_B"}
+
+def test_clock_submodule_get_clock_by_port():
+    mock_resources = Mock(spec=RsDeviceResources)
+    mock_resources.get_num_Clocks.return_value = 5
+    clock_submodule = Clock_SubModule(mock_resources, [Clock(description="Clock 0", port="PORT_0")])
+    assert clock_submodule.get_clock_by_port("PORT_0") is clock_submodule.get(0)
+
+    clock_a = clock_submodule.add({"description": "Clock A", "port": "PORT_A"})
+    clock_b = clock_submodule.add({"description": "Clock B", "port": "PORT_B"})
+    assert clock_submodule.get_clock_by_port("PORT_A") is clock_a
+    assert clock_submodule.get_clock_by_port("PORT_B") is clock_b
+
+    # renamed clock
+    clock_submodule.update(1, {"port": "PORT_C"})
+    assert clock_submodule.get_clock_by_port("PORT_A") is None
+    assert clock_submodule.get_clock_by_port("PORT_C") is clock_a
+
+    clock_submodule.remove(2)
+    assert clock_submodule.get_clock_by_port("PORT_B") is None
+
+    # rows replaced in place
+    clock_submodule.itemlist[:] = [clock_b]
+    clock_submodule.set_dirty()
+    assert clock_submodule.get_clock_by_port("PORT_B") is clock_b
+    assert clock_submodule.get_clock_by_port("PORT_C") is None
+
+    clock_submodule.clear()
+    assert clock_submodule.get_clock_by_port("PORT_B") is None
+
+def test_get_clock_fanout():
+    mock_resources = Mock(spec=RsDeviceResources)
+    mock_resources.get_num_Clocks.return_value = 5
+    consumers = {
+        ModuleType.FABRIC_LE: [Mock(flip_flop=10), Mock(flip_flop=5)],
+        ModuleType.BRAM: [Mock(bram_used=2), Mock(bram_used=2)],
+        ModuleType.DSP: [Mock(number_of_multipliers=3)],
+    }
+    mock_resources.get_clock_consumers.side_effect = lambda clock, modtype: consumers.get(modtype, []) if clock == "PORT_A" else []
+    clock_submodule = Clock_SubModule(mock_resources)
+    assert clock_submodule.get_clock_fanout("PORT_A") == 22
+    assert clock_submodule.get_clock_fanout("PORT_B") == 0
+
+def test_get_clock_fanouts():
+    mock_resources = Mock(spec=RsDeviceResources)
+    mock_resources.get_num_Clocks.return_value = 5
+    consumers = {
+        ("PORT_A", ModuleType.FABRIC_LE): [Mock(flip_flop=10)],
+        ("PORT_A", ModuleType.BRAM): [Mock(bram_used=2), Mock(bram_used=2)],
+        ("PORT_A", ModuleType.DSP): [Mock(number_of_multipliers=3)],
+        ("PORT_B", ModuleType.FABRIC_LE): [Mock(flip_flop=5)],
+        ("PORT_B", ModuleType.BRAM): [Mock(bram_used=4)],
+        ("PORT_C", ModuleType.BRAM): [Mock(bram_used=4)],
+    }
+    mock_resources.get_clock_consumers.side_effect = lambda clock, modtype: consumers.get((clock, modtype), [])
+    clock_submodule = Clock_SubModule(mock_resources, [Clock(port="PORT_A"), Clock(port="PORT_B"), Clock(port="PORT_D")])
+    assert clock_submodule.get_clock_fanouts() == { "PORT_A": 17, "PORT_B": 9, "PORT_D": 0 }
+    mock_resources.get_module.assert_not_called()
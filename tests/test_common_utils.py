@@ -3,8 +3,10 @@
 #  Authorized use only
 #
 import pytest
+import threading
+import time
 from enum import Enum
-from utilities.common_utils import RsCustomException, RsEnum, update_attributes, get_enum_by_value
+from utilities.common_utils import RsCustomException, RsEnum, RsReadWriteLock, update_attributes, get_enum_by_value
 
 def test_rs_custom_exception():
     with pytest.raises(RsCustomException, match="Test Exception"):
@@ -53,3 +55,34 @@ def test_get_enum_by_value():
 
     result = get_enum_by_value(MyEnum, 3)
     assert result is None  
+
+def test_rs_read_write_lock():
+    lock = RsReadWriteLock()
+    events = []
+
+    # readers share the lock
+    with lock.read_locked():
+        with lock.read_locked():
+            assert lock.readers == 2
+
+    # writer waits for the readers, new readers wait for the waiting writer
+    lock.acquire_read()
+    def writer():
+        with lock.write_locked():
+            events.append('write')
+    def reader():
+        with lock.read_locked():
+            events.append('read')
+    write_thread = threading.Thread(target=writer)
+    write_thread.start()
+    while lock.writers_waiting == 0:
+        time.sleep(0.001)
+    read_thread = threading.Thread(target=reader)
+    read_thread.start()
+    time.sleep(0.05)
+    assert events == []
+    lock.release_read()
+    write_thread.join(1)
+    read_thread.join(1)
+    assert events == ['write', 'read']
+    assert lock.readers == 0 and not lock.writer
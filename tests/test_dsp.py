@@ -126,3 +126,29 @@ def test_dsp_submodule_compute_output_power():
     assert dsp_submodule.total_block_power == expected_block_power
     assert dsp_submodule.total_interconnect_power == expected_interconnect_power
 
+
+def test_dsp_submodule_columnar_matches_scalar():
+    mock_resources = Mock()
+    mock_resources.get_num_DSP_BLOCKs.return_value = 10
+    mock_resources.get_VCC_CORE.return_value = 0.8
+    mock_resources.get_DSP_MULT_CAP.return_value = 0.0113
+    mock_resources.get_DSP_MULT_CAP2.return_value = 0.0271
+    mock_resources.get_DSP_INT_CAP.return_value = 0.0049
+    clocks = { 'clk_a': Mock(frequency=133000000), 'clk_b': Mock(frequency=7777777) }
+    mock_resources.get_clock.side_effect = lambda name: clocks.get(name)
+
+    results = []
+    for columnar in (False, True):
+        dsp_submodule = DSP_SubModule(mock_resources, [])
+        dsp_submodule.columnar = columnar
+        for i in range(48):
+            dsp_submodule.add({ 'name': f'DSP{i}', 'enable': i % 7 != 0, 'number_of_multipliers': i % 5,
+                'dsp_mode': list(DSP_Mode)[i % 3], 'pipelining': list(Pipelining)[(i // 3) % 4],
+                'a_input_width': 6 + i % 7, 'b_input_width': 7 + i % 6, 'clock': ('clk_a', 'clk_b', 'clk_a', 'clk_x')[i % 4],
+                'toggle_rate': 0.1 + i / 300 })
+        dsp_submodule.compute_output_power()
+        results.append((dsp_submodule.get_power_consumption(), [(item.output.dsp_blocks_used, item.output.clock_frequency,
+            item.output.output_signal_rate, item.output.block_power, item.output.interconnect_power, item.output.percentage,
+            len(item.output.messages)) for item in dsp_submodule.get_all()]))
+
+    assert results[0] == results[1]
@@ -3,7 +3,7 @@
 #  Authorized use only
 
 import pytest
-from unittest.mock import Mock
+from unittest.mock import Mock, patch
 from submodule.fabric_logic_element import Fabric_LE, Fabric_LE_SubModule, Glitch_Factor, Fabric_LE_output, FabricLeDescriptionAlreadyExistsException
 from submodule.rs_message import RsMessage, RsMessageManager, RsMessageType
 
@@ -43,8 +43,8 @@ def test_get_glitch_factor(glitch_factor, expected_value):
 def test_compute_dynamic_power_no_clock():
     fabric_le = Fabric_LE(enable=True, lut6=10, flip_flop=10)
     mock_message_manager = Mock()
-    RsMessageManager.get_message = mock_message_manager
-    fabric_le.compute_dynamic_power(None, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0)
+    with patch.object(RsMessageManager, 'get_message', mock_message_manager):
+        fabric_le.compute_dynamic_power(None, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0)
     mock_message_manager.assert_called_with(301, {'clock': ''})
     assert fabric_le.output.block_power == 0.0
     assert fabric_le.output.interconnect_power == 0.0
@@ -52,8 +52,8 @@ def test_compute_dynamic_power_no_clock():
 def test_compute_dynamic_power_disabled():
     fabric_le = Fabric_LE(enable=False, lut6=10, flip_flop=10)
     mock_message_manager = Mock()
-    RsMessageManager.get_message = mock_message_manager
-    fabric_le.compute_dynamic_power(Mock(frequency=100), 1.0, 1.0, 1.0, 1.0, 1.0, 1.0)
+    with patch.object(RsMessageManager, 'get_message', mock_message_manager):
+        fabric_le.compute_dynamic_power(Mock(frequency=100), 1.0, 1.0, 1.0, 1.0, 1.0, 1.0)
     mock_message_manager.assert_called_with(103)
     assert fabric_le.output.block_power == 0.0
     assert fabric_le.output.interconnect_power == 0.0
@@ -132,3 +132,53 @@ def test_compute_output_power():
     assert fabric_le_submodule.total_block_power == expected_block_power_value
     assert fabric_le_submodule.total_interconnect_power == expected_interconnect_power_value
 
+
+def test_compute_output_power_subset():
+    mock_resources = Mock()
+    mock_resources.get_VCC_CORE.return_value = 1.0
+    mock_resources.get_LUT_CAP.return_value = 1.0
+    mock_resources.get_LUT_INT_CAP.return_value = 1.0
+    mock_resources.get_FF_CAP.return_value = 1.0
+    mock_resources.get_FF_CLK_CAP.return_value = 1.0
+    mock_resources.get_FF_INT_CAP.return_value = 1.0
+    mock_resources.get_clock.return_value.frequency = 1000000  # 1 MHz
+
+    fabric_le_submodule = Fabric_LE_SubModule(mock_resources)
+    le1 = fabric_le_submodule.add({'name': 'LE1', 'lut6': 10, 'flip_flop': 5, 'enable': True})
+    le2 = fabric_le_submodule.add({'name': 'LE2', 'lut6': 20, 'flip_flop': 5, 'enable': True})
+    fabric_le_submodule.compute_output_power()
+    le1_block_power = le1.output.block_power
+    total_power = fabric_le_submodule.get_total_output_power()
+
+    # only the given item is recomputed while the totals cover all items
+    mock_resources.get_clock.return_value.frequency = 2000000  # 2 MHz
+    fabric_le_submodule.compute_output_power([le2])
+    assert le1.output.block_power == le1_block_power
+    assert fabric_le_submodule.total_block_power == le1.output.block_power + le2.output.block_power
+    assert fabric_le_submodule.get_total_output_power() > total_power
+
+def test_compute_output_power_columnar_matches_scalar():
+    mock_resources = Mock()
+    mock_resources.get_VCC_CORE.return_value = 0.8
+    mock_resources.get_LUT_CAP.return_value = 0.0012
+    mock_resources.get_LUT_INT_CAP.return_value = 0.0031
+    mock_resources.get_FF_CAP.return_value = 0.0007
+    mock_resources.get_FF_CLK_CAP.return_value = 0.00013
+    mock_resources.get_FF_INT_CAP.return_value = 0.0017
+    clocks = { 'clk_a': Mock(frequency=133000000), 'clk_b': Mock(frequency=7777777) }
+    mock_resources.get_clock.side_effect = lambda name: clocks.get(name)
+
+    results = []
+    for columnar in (False, True):
+        fabric_le_submodule = Fabric_LE_SubModule(mock_resources)
+        fabric_le_submodule.columnar = columnar
+        for i in range(40):
+            fabric_le_submodule.add({ 'name': f'LE{i}', 'enable': i % 7 != 0, 'lut6': (i * 37) % 11, 'flip_flop': (i * 13) % 5,
+                'clock': ('clk_a', 'clk_b', 'clk_x')[i % 3], 'toggle_rate': 0.1 + i / 300, 'clock_enable_rate': 0.3 + i / 97,
+                'glitch_factor': list(Glitch_Factor)[i % 3] })
+        fabric_le_submodule.compute_output_power()
+        results.append((fabric_le_submodule.get_power_consumption(), [(item.output.clock_frequency, item.output.output_signal_rate,
+            item.output.block_power, item.output.interconnect_power, item.output.percentage, len(item.output.messages))
+            for item in fabric_le_submodule.get_all()]))
+
+    assert results[0] == results[1]
@@ -171,3 +171,33 @@ def test_clear_io(mock_resources):
     io_submodule.add({"enable": True, "name": "TestIO"})
     io_submodule.clear()
     assert len(io_submodule.itemlist) == 0
+
+@pytest.mark.parametrize("serdes", [False, True])
+def test_compute_output_power_columnar_matches_scalar(mock_resources, serdes):
+    coeffs = {
+        IO_BankType.HR: IO_Standard_Coeff(voltage=1.8, bank_type=IO_BankType.HR, input_ac=0.011, output_ac=0.023, input_dc=0.0031, output_dc=0.0047, int_inner=0.0013, int_outer=0.0029),
+        IO_BankType.HP: IO_Standard_Coeff(voltage=1.2, bank_type=IO_BankType.HP, input_ac=0.017, output_ac=0.019, input_dc=0.0037, output_dc=0.0043, int_inner=0.0017, int_outer=0.0023),
+    }
+    clocks = { 'clk_a': MagicMock(frequency=133000000), 'clk_b': MagicMock(frequency=7777777) }
+    mock_resources.get_IO_standard_coeff = MagicMock(side_effect=lambda io_std: coeffs[IO_BankType.HP if io_std.value % 2 else IO_BankType.HR])
+    mock_resources.get_clock = MagicMock(side_effect=lambda name: clocks.get(name))
+
+    # serdes rows (odd bus width) halve the clock frequency on both paths, a quarter for ddr
+    results = []
+    with patch.object(IO, 'is_SERDES', lambda item: serdes and item.bus_width % 2 == 1):
+        for columnar in (False, True):
+            io_submodule = IO_SubModule(resources=mock_resources)
+            io_submodule.columnar = columnar
+            for i in range(64):
+                io_submodule.add({ 'name': f'IO{i}', 'enable': i % 7 != 0, 'bus_width': i % 9, 'direction': list(IO_Direction)[i % 4],
+                    'io_standard': list(IO_Standard)[(i * 5) % len(IO_Standard)], 'io_data_type': list(IO_Data_Type)[(i // 4) % 4],
+                    'synchronization': list(IO_Synchronization)[i % 11], 'differential_termination': list(IO_differential_termination)[i % 2],
+                    'clock': ('clk_a', 'clk_b', 'clk_a', 'clk_x')[(i // 2) % 4], 'toggle_rate': 0.1 + i / 300,
+                    'input_enable_rate': 0.3 + i / 97, 'output_enable_rate': 0.9 - i / 101 })
+            io_submodule.compute_output_power()
+            results.append((io_submodule.get_power_consumption(), [(item.output.bank_type, item.output.bank_number, item.output.frequency,
+                item.output.vccio_voltage, item.output.io_signal_rate, item.output.block_power, item.output.interconnect_power,
+                item.output.percentage, len(item.output.messages)) for item in io_submodule.get_all()]))
+
+    assert results[0] == results[1]
+    assert serdes == any(item[2] == 33250000 for item in results[0][1])
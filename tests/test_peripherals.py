@@ -3,7 +3,7 @@
 #  Authorized use only
 #
 import pytest
-from unittest.mock import Mock, create_autospec
+from unittest.mock import Mock, create_autospec, patch
 from submodule.rs_device_resources import IO_Standard_Coeff, IO_Standard, IO_BankType
 from submodule.peripherals import (
     Peripherals_Usage,
@@ -25,6 +25,8 @@ from submodule.peripherals import (
     get_power_factor,
     Port,
     Peripheral,
+    PeripheralType,
+    Peripheral_SubModule,
     Dma0,
     Pwm0,
     SubModule,
@@ -104,14 +106,14 @@ def test_peripheral_initialization():
 # Test functions with proper mocks
 def test_find_highest_bandwidth_peripheral_port():
     mock_context = Mock()
-    mock_context.get_submodule.return_value.get_peripherals.return_value = []
+    mock_context.get_submodule.return_value.get_ports_by_name.return_value = []
     port, peripheral = find_highest_bandwidth_peripheral_port(mock_context)
     assert port is None
     assert peripheral is None
 
 def test_find_peripheral():
     mock_context = Mock()
-    mock_context.get_submodule.return_value.get_peripherals.return_value = []
+    mock_context.get_submodule.return_value.get_peripheral_by_name.return_value = None
     peripheral = find_peripheral(mock_context, 'TestPeripheral')
     assert peripheral is None
 
@@ -140,3 +142,119 @@ def test_pwm0_compute():
     mock_context = Mock()
     pwm = Pwm0(context=mock_context)
     assert pwm.compute() == False  # Because io_used is 0 by default
+
+def create_peripheral_submodule():
+    mock_resources = Mock(spec=RsDeviceResources)
+    for method in ('get_num_I2Cs', 'get_num_UARTs', 'get_num_JTAGs', 'get_num_USBs', 'get_num_GIGEs', 'get_num_PWMs', \
+                   'get_num_DDRs', 'get_num_DMAs', 'get_num_SOC_IOs'):
+        getattr(mock_resources, method).return_value = 1
+    mock_resources.get_series.return_value = 'Gemini'
+    mock_resources.get_device_name.return_value = '1VG28'
+    return Peripheral_SubModule(mock_resources)
+
+def test_peripheral_submodule_indexes():
+    submodule = create_peripheral_submodule()
+    dma = submodule.get_peripheral_by_name('DMA')
+    acpu = submodule.get_peripheral_by_name('A45 RISC-V')
+    assert dma.get_type() == PeripheralType.DMA
+    assert submodule.get_peripheral_by_name('unknown') is None
+    assert submodule.get_ports_by_name('DDR') == []
+
+    # ports are indexed by name, source and destination
+    acpu.get_port(0).set_properties({ 'name': 'DDR' })
+    dma.get_port(1).set_properties({ 'source': 'DDR', 'destination': 'OCM' })
+    acpu.get_port(2).set_properties({ 'source': 'DDR', 'destination': 'DDR' })
+    assert submodule.get_ports_by_name('DDR') == [(dma.get_port(1), dma), (acpu.get_port(0), acpu), (acpu.get_port(2), acpu)]
+    assert submodule.get_ports_by_name('OCM') == [(dma.get_port(1), dma)]
+
+    # renamed port
+    dma.get_port(1).set_properties({ 'source': 'OCM' })
+    assert submodule.get_ports_by_name('DDR') == [(acpu.get_port(0), acpu), (acpu.get_port(2), acpu)]
+    assert submodule.get_ports_by_name('OCM') == [(dma.get_port(1), dma)]
+
+    # highest bandwidth port, first one wins on a tie
+    acpu.get_port(0).output.calculated_bandwidth = 0.5
+    acpu.get_port(2).output.calculated_bandwidth = 0.5
+    assert find_highest_bandwidth_peripheral_port(submodule.get_peripheral_by_name('DDR')) == (acpu.get_port(0), acpu)
+
+    submodule.clear()
+    assert submodule.get_peripheral_by_name('DMA') is not dma
+    assert submodule.get_ports_by_name('DDR') == []
+
+def test_peripheral_submodule_compute_order():
+    submodule = create_peripheral_submodule()
+    dma = submodule.get_peripheral_by_name('DMA')
+    acpu = submodule.get_peripheral_by_name('A45 RISC-V')
+    dma.get_port(0).set_properties({ 'source': 'DDR', 'destination': 'SPI/QSPI' })
+    acpu.get_port(0).set_properties({ 'name': 'DMA' })
+    submodule.update_indexes()
+    targets, downstream = submodule.get_dependencies()
+    order = [p.get_name() for p in submodule.get_compute_order(targets)]
+
+    # port owners first, list order otherwise
+    assert order.index('A45 RISC-V') < order.index('DMA') < order.index('DDR')
+    assert order.index('DMA') < order.index('SPI/QSPI')
+    assert sorted(order) == sorted([p.get_name() for p in submodule.get_peripherals()])
+    assert submodule.get_downstream_peripherals({'DDR'}, downstream) == {'DDR', 'DMA', 'SPI/QSPI', 'A45 RISC-V', 'N22 RISC-V'}
+    assert submodule.get_downstream_peripherals({'UART0 (BCPU)'}, downstream) == {'UART0 (BCPU)'}
+
+def test_peripheral_submodule_indexes_invalidation():
+    submodule = create_peripheral_submodule()
+    dma = submodule.get_peripheral_by_name('DMA')
+    with patch.object(Peripheral, 'compute', Mock(return_value=True)), \
+            patch.object(submodule, 'update_indexes', wraps=submodule.update_indexes) as update_indexes:
+        # indexes built by the lookups above
+        submodule.compute_output_power()
+        assert update_indexes.call_count == 0
+
+        # neither a peripheral nor a port renamed or redirected
+        submodule.set_dirty(False)
+        dma.get_port(0).set_properties({ 'activity': Port_Activity.HIGH })
+        submodule.get_peripheral_by_name('OCM').set_properties({ 'data_rate': 800000000 })
+        submodule.set_clocks_modified()
+        submodule.compute_output_power()
+        assert update_indexes.call_count == 0
+
+        # redirected port
+        submodule.set_dirty(False)
+        dma.get_port(0).set_properties({ 'source': 'DDR' })
+        submodule.compute_output_power()
+        assert update_indexes.call_count == 1
+        assert submodule.get_ports_by_name('DDR') == [(dma.get_port(0), dma)]
+
+def test_peripheral_submodule_compute_modified_only():
+    submodule = create_peripheral_submodule()
+    dma = submodule.get_peripheral_by_name('DMA')
+    dma.get_port(0).set_properties({ 'source': 'DDR', 'destination': 'OCM' })
+    computed = []
+    bandwidths = []
+    def compute(self):
+        computed.append(self.get_name())
+        bandwidths.append(self.get_submodule().get_bandwidth(submodule.get_peripheral_by_name('DDR')))
+        return True
+
+    with patch.object(Peripheral, 'compute', compute), patch.object(Peripheral, 'get_bandwidth', Mock(return_value=100.0)) as get_bandwidth:
+        submodule.compute_output_power()
+        assert len(computed) == len(submodule.get_peripherals())
+        assert get_bandwidth.call_count == 1
+        assert set(bandwidths) == {100.0}
+
+        # only the peripherals downstream of the modified one
+        computed.clear()
+        submodule.set_dirty(False)
+        submodule.get_peripheral_by_name('OCM').set_properties({ 'data_rate': 800000000 })
+        submodule.compute_output_power()
+        assert computed == ['DMA', 'DDR', 'OCM']
+
+        # redirected channel
+        computed.clear()
+        submodule.set_dirty(False)
+        dma.get_port(0).set_properties({ 'destination': 'GPIO' })
+        submodule.compute_output_power()
+        assert computed == ['OCM', 'DMA', 'DDR', 'GPIO']
+
+        # unknown modification
+        computed.clear()
+        submodule.set_dirty()
+        submodule.compute_output_power()
+        assert len(computed) == len(submodule.get_peripherals())
@@ -4,12 +4,17 @@
 #
 import pytest
 import os
+import socket
 import sys
+import threading
+import time
+import urllib.error
+import urllib.request
 from unittest import mock
 from flask import Flask
 from submodule.rs_device_manager import RsDeviceManager
-from backend.restapi_server import main 
-from api.device import device_api
+from backend.restapi_server import main, create_server, get_request_lock
+from api.device import device_api, DeviceConsumptionApi
 from api.clock import clock_api
 from api.dsp import dsp_api
 from api.fabric_le import fabric_le_api
@@ -53,10 +58,162 @@ def test_device_file_exists(mock_rs_device_manager):
     with mock.patch.object(sys, 'argv', test_args):
         with mock.patch('os.path.exists', return_value=True):
             mock_rs_device_manager.return_value.load_xml = mock.MagicMock()
-            with mock.patch('flask.Flask.run') as mock_flask_run:
+            with mock.patch('backend.restapi_server.create_server') as mock_create_server:
                 main()
                 mock_rs_device_manager.return_value.load_xml.assert_called_with('device.xml')
+                mock_create_server.return_value.serve_forever.assert_called()
+
+# Test for production wsgi server mode
+def test_server_mode(mock_rs_device_manager):
+    test_args = ["program", "device.xml", "--threads", "4", "--port", "5001"]
+    with mock.patch.object(sys, 'argv', test_args):
+        with mock.patch('os.path.exists', return_value=True):
+            with mock.patch('backend.restapi_server.create_server') as mock_create_server, mock.patch('flask.Flask.run') as mock_flask_run:
+                main()
+                assert mock_create_server.call_args.args[1:] == (5001, 4)
+                mock_create_server.return_value.serve_forever.assert_called()
+                mock_flask_run.assert_not_called()
+
+@pytest.mark.parametrize("threads, max_streams", [
+    ("2", 1),
+    ("3", 1),
+    ("8", 4),
+])
+def test_server_mode_event_streams(mock_rs_device_manager, threads, max_streams):
+    test_args = ["program", "device.xml", "--threads", threads]
+    with mock.patch.object(sys, 'argv', test_args):
+        with mock.patch('os.path.exists', return_value=True):
+            with mock.patch('backend.restapi_server.create_server'), \
+                    mock.patch('backend.restapi_server.set_max_event_streams') as mock_set_max_event_streams:
+                main()
+                mock_set_max_event_streams.assert_called_once_with(max_streams)
+
+@pytest.mark.parametrize("threads", ["1", "0"])
+def test_server_mode_too_few_threads(mock_rs_device_manager, threads):
+    test_args = ["program", "device.xml", "--threads", threads]
+    with mock.patch.object(sys, 'argv', test_args):
+        with mock.patch('os.path.exists', return_value=True):
+            with mock.patch('backend.restapi_server.create_server') as mock_create_server:
+                with pytest.raises(SystemExit):
+                    main()
+                mock_create_server.assert_not_called()
+
+# Test for debug mode served by the development server
+def test_debug_mode(mock_rs_device_manager):
+    test_args = ["program", "device.xml", "--debug"]
+    with mock.patch.object(sys, 'argv', test_args):
+        with mock.patch('os.path.exists', return_value=True):
+            with mock.patch('backend.restapi_server.create_server') as mock_create_server, mock.patch('flask.Flask.run') as mock_flask_run:
+                main()
                 mock_flask_run.assert_called()
+                mock_create_server.assert_not_called()
+
+def test_server_drain_on_shutdown():
+    app = Flask(__name__)
+    started = threading.Event()
+
+    @app.route('/slow')
+    def slow():
+        started.set()
+        time.sleep(0.2)
+        return 'done'
+
+    server = create_server(app, 0, 2)
+    serve_thread = threading.Thread(target=server.serve_forever)
+    serve_thread.start()
+    responses = []
+    client_thread = threading.Thread(target=lambda: responses.append(urllib.request.urlopen(f'http://127.0.0.1:{server.server_port}/slow').read()))
+    client_thread.start()
+    assert started.wait(5)
+
+    # the request in progress completes before the server stops
+    server.shutdown()
+    serve_thread.join(5)
+    client_thread.join(5)
+    assert responses == [b'done']
+    assert not serve_thread.is_alive()
+
+    # no longer accepting connections
+    with pytest.raises(OSError):
+        urllib.request.urlopen(f'http://127.0.0.1:{server.server_port}/slow', timeout=1)
+
+def test_waitress_internals():
+    # RsWSGIServer drains the requests in progress through these waitress internals
+    server = create_server(Flask(__name__), 0, 1)
+    try:
+        assert callable(server.server.asyncore.loop)
+        assert isinstance(server.server._map, dict)
+        assert isinstance(server.server.adj.asyncore_loop_timeout, (int, float))
+        assert callable(server.server.task_dispatcher.shutdown)
+        assert callable(server.server.trigger.close)
+        assert callable(server.server.pull_trigger)
+        with socket.create_connection(('127.0.0.1', server.server_port), timeout=5):
+            expiration = time.monotonic() + 5
+            while not server.server.active_channels and time.monotonic() < expiration:
+                server.poll()
+            channels = list(server.server.active_channels.values())
+            assert len(channels) == 1
+            assert isinstance(channels[0].requests, list)
+            assert channels[0].total_outbufs_len == 0
+            assert not server.is_busy()
+    finally:
+        server.shutdown()
+        server.serve_forever()
+
+def test_server_event_streams_limit():
+    from api import events
+    from device.device_resource import Device
+    from submodule.rs_device import RsDevice
+    app = Flask(__name__)
+    app.register_blueprint(events.events_api)
+    app.add_url_rule('/ping', 'ping', lambda: 'pong')
+    device = RsDevice(Device(name='MockDevice', series='Gemini', family='Gemini', package='BGA', pin_count='100', \
+        speedgrade='1', core_voltage='0.8', filepath='device.xml', resources={}, internals={}))
+    mock_device_mgr = mock.MagicMock()
+    mock_device_mgr.get_device.return_value = device
+    mock_device_mgr.get_created_devices.return_value = [device]
+
+    with mock.patch('api.events.RsDeviceManager.get_instance', return_value=mock_device_mgr), \
+            mock.patch.object(events, 'max_event_streams', 2):
+        server = create_server(app, 0, 4)
+        serve_thread = threading.Thread(target=server.serve_forever)
+        serve_thread.start()
+        url = f'http://127.0.0.1:{server.server_port}'
+        try:
+            streams = [urllib.request.urlopen(f'{url}/devices/MockDevice/events', timeout=5) for _ in range(2)]
+            assert all(stream.readline().startswith(b'id: ') for stream in streams)
+
+            # the other requests are served while the streams are open
+            for _ in range(8):
+                assert urllib.request.urlopen(f'{url}/ping', timeout=5).read() == b'pong'
+
+            # no more streams than the limit
+            with pytest.raises(urllib.error.HTTPError) as e:
+                urllib.request.urlopen(f'{url}/devices/MockDevice/events', timeout=5)
+            assert e.value.code == 503
+        finally:
+            # the open streams end on shutdown
+            events.close_event_streams()
+            server.shutdown()
+            serve_thread.join(10)
+            events.streams_closed.clear()
+        assert not serve_thread.is_alive()
+        assert events.open_event_streams == 0
+
+def test_get_request_lock(mock_rs_device_manager):
+    app = Flask(__name__)
+    app.add_url_rule('/devices/<device_id>/clocking', 'clocking', lambda device_id: '')
+    app.add_url_rule('/project', 'project', lambda: '')
+    with app.test_request_context('/devices/MPW1/clocking'):
+        assert get_request_lock() is mock_rs_device_manager.return_value.get_device_lock.return_value
+        mock_rs_device_manager.return_value.get_device_lock.assert_called_with('MPW1')
+    with app.test_request_context('/project'):
+        assert get_request_lock() is None
+
+    # snapshot readers are not locked
+    app.add_url_rule('/devices/<device_id>/consumption', view_func=DeviceConsumptionApi.as_view('consumption'))
+    with app.test_request_context('/devices/MPW1/consumption'):
+        assert get_request_lock() is None
 
 # Test for file not existing
 def test_device_file_not_exists():
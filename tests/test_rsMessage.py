@@ -62,3 +62,30 @@ def test_message_type():
 def test_get_invalid_message(invalid_code):
     # Test retrieving messages with invalid codes
         RsMessageManager.get_message(invalid_code)
+
+def test_get_message_shared():
+    message = RsMessageManager.get_message(104)
+    assert message is RsMessageManager.get_message(104)
+    assert message.text == "BRAM is disabled"
+    with pytest.raises(AttributeError):
+        message.text = "changed"
+
+def test_get_message_formatted_cached():
+    message = RsMessageManager.get_message(301, { 'clock': 'clk_a' })
+    assert message.code == 301
+    assert message.type == RsMessageType.ERRO
+    assert message.text == "Invalid clock 'clk_a'"
+    assert message is RsMessageManager.get_message(301, { 'clock': 'clk_a' })
+    assert RsMessageManager.get_message(301, { 'clock': 'clk_b' }).text == "Invalid clock 'clk_b'"
+    assert RsMessageManager.get_message(307, { 'message': ['unhashable'] }).text == "Load error: ['unhashable']"
+
+def test_get_message_formatted_value_types():
+    assert RsMessageManager.get_message(202, { 'bank_type': 'HP', 'voltage': 1 }).text == \
+        "Not enough HP banks powered at 1V available"
+    assert RsMessageManager.get_message(202, { 'bank_type': 'HP', 'voltage': 1.0 }).text == \
+        "Not enough HP banks powered at 1.0V available"
+    assert RsMessageManager.get_message(301, { 'clock': True }).text == "Invalid clock 'True'"
+    assert RsMessageManager.get_message(301, { 'clock': 1 }).text == "Invalid clock '1'"
+
+def test_get_message_unknown_code():
+    assert RsMessageManager.get_message(404) is RsMessageManager.messages[0]
@@ -140,3 +140,227 @@ def test_create_project(mock_write_file):
     assert project.state == RsProjectState.LOADED, "Project state should be LOADED after creation."
     assert project.filepath == filepath, "Project filepath should be set."
     mock_write_file.assert_called_once_with(project, filepath)
+
+from dataclasses import FrozenInstanceError
+from unittest.mock import MagicMock
+from device.device_resource import Device
+from submodule.dsp import DSP
+from submodule.rs_device import RsDevice, StaticPowerResult
+from submodule.rs_power_config import PowerValue, ScenarioType
+from submodule.rs_logger import trace
+
+def create_device_with_mock_modules(dirty_modules):
+    device = RsDevice(Device(name='MockDevice', series='Gemini', family='Gemini', package='BGA', pin_count='100', \
+        speedgrade='1', core_voltage='0.8', filepath='device.xml', resources={}, internals={}))
+    for modtype in (ModuleType.CLOCKING, ModuleType.FABRIC_LE, ModuleType.BRAM, ModuleType.DSP, ModuleType.IO, \
+            ModuleType.SOC_PERIPHERALS):
+        module = MagicMock()
+        module.is_dirty.return_value = modtype in dirty_modules
+        module.get_total_output_power.return_value = 0.0
+        module.compute_static_power.return_value = []
+        module.get_peripherals.return_value = []
+        for getter in ('get_processor_output_power', 'get_peripherals_output_power', 'get_bcpu_output_power', \
+                'get_memory_output_power', 'get_dma_output_power', 'get_noc_output_power'):
+            getattr(module, getter).return_value = 0.0
+        device.resources.register_module(modtype, module)
+    return device
+
+@pytest.mark.parametrize("dirty_modules, expected_modules", [
+    ([], []),
+    ([ModuleType.IO], [ModuleType.IO]),
+    ([ModuleType.SOC_PERIPHERALS], [ModuleType.SOC_PERIPHERALS]),
+    ([ModuleType.BRAM], [ModuleType.CLOCKING, ModuleType.BRAM]),
+    ([ModuleType.FABRIC_LE, ModuleType.IO], [ModuleType.CLOCKING, ModuleType.FABRIC_LE, ModuleType.IO]),
+    ([ModuleType.CLOCKING], [ModuleType.CLOCKING]),
+])
+def test_compute_output_power_dirty_modules(dirty_modules, expected_modules):
+    device = create_device_with_mock_modules(dirty_modules)
+    device.compute_output_power()
+    for modtype in (ModuleType.CLOCKING, ModuleType.FABRIC_LE, ModuleType.BRAM, ModuleType.DSP, ModuleType.IO, \
+            ModuleType.SOC_PERIPHERALS):
+        module = device.get_module(modtype)
+        if modtype in expected_modules:
+            module.compute_output_power.assert_called_once()
+            module.set_dirty.assert_called_once_with(False)
+        else:
+            module.compute_output_power.assert_not_called()
+
+def test_request_compute_deferred():
+    device = create_device_with_mock_modules([ModuleType.DSP])
+    device.request_compute(deferred=True)
+    assert device.is_stale()
+    device.get_module(ModuleType.DSP).compute_output_power.assert_not_called()
+    device.request_compute()
+    assert not device.is_stale()
+    device.get_module(ModuleType.DSP).compute_output_power.assert_called_once()
+
+def test_transaction_compute_once_on_commit():
+    device = create_device_with_mock_modules([ModuleType.DSP])
+    device.begin_transaction()
+    device.request_compute()
+    device.request_compute()
+    assert device.in_transaction()
+    assert device.is_stale()
+    device.get_module(ModuleType.DSP).compute_output_power.assert_not_called()
+    device.commit_transaction()
+    assert not device.in_transaction()
+    assert not device.is_stale()
+    device.get_module(ModuleType.DSP).compute_output_power.assert_called_once()
+
+def test_transaction_abort():
+    device = create_device_with_mock_modules([ModuleType.DSP])
+    device.begin_transaction()
+    device.request_compute()
+    assert device.is_stale()
+    device.abort_transaction()
+    assert not device.in_transaction()
+    assert not device.is_stale()
+    device.get_module(ModuleType.DSP).compute_output_power.assert_called_once()
+
+def test_transaction_reset_on_clear():
+    device = create_device_with_mock_modules([ModuleType.DSP])
+    device.begin_transaction()
+    device.clear()
+    assert not device.in_transaction()
+    device.request_compute()
+    assert not device.is_stale()
+    device.get_module(ModuleType.DSP).compute_output_power.assert_called_once()
+
+def test_transaction_reset_on_project_close():
+    device = create_device_with_mock_modules([])
+    device.begin_transaction()
+    device_mgr = RsDeviceManager()
+    with patch.object(device_mgr, 'devices', [device]), \
+            patch('submodule.rs_project.RsDeviceManager.get_instance', return_value=device_mgr):
+        RsProjectManager.get_instance().close()
+    assert not device.in_transaction()
+
+def test_compute_output_power_trace():
+    device = create_device_with_mock_modules([])
+    for modtype in (ModuleType.CLOCKING, ModuleType.FABRIC_LE, ModuleType.BRAM, ModuleType.DSP, ModuleType.IO, \
+            ModuleType.SOC_PERIPHERALS):
+        module = device.get_module(modtype)
+        module.set_dirty.side_effect = lambda dirty=True, module=module: setattr(module.is_dirty, 'return_value', dirty)
+    device.get_module(ModuleType.DSP).compute_output_power.side_effect = lambda: trace('[DSP] traced')
+    assert ['[DSP] traced'] == device.compute_output_power_trace()
+    for modtype in (ModuleType.CLOCKING, ModuleType.FABRIC_LE, ModuleType.BRAM, ModuleType.DSP, ModuleType.IO, \
+            ModuleType.SOC_PERIPHERALS):
+        device.get_module(modtype).compute_output_power.assert_called_once()
+
+def test_compute_output_power_modified_clock_consumers():
+    device = create_device_with_mock_modules([ModuleType.CLOCKING])
+    fle_a = Mock(clock='clk_a')
+    fle_b = Mock(clock='clk_b')
+    io_a = Mock(clock='clk_a')
+    device.get_module(ModuleType.FABRIC_LE).get_all.return_value = [fle_a, fle_b]
+    device.get_module(ModuleType.BRAM).get_all.return_value = [Mock(port_a=Mock(clock='clk_b'), port_b=Mock(clock='clk_b'))]
+    device.get_module(ModuleType.IO).get_all.return_value = [io_a]
+    for modtype in (ModuleType.FABRIC_LE, ModuleType.BRAM, ModuleType.DSP, ModuleType.IO):
+        device.resources.update_clock_consumers(modtype)
+    device.get_module(ModuleType.CLOCKING).get_modified_clocks.return_value = {'clk_a'}
+
+    device.compute_output_power()
+
+    device.get_module(ModuleType.CLOCKING).compute_output_power.assert_called_once_with()
+    device.get_module(ModuleType.FABRIC_LE).compute_output_power.assert_called_once_with([fle_a])
+    device.get_module(ModuleType.BRAM).compute_output_power.assert_not_called()
+    device.get_module(ModuleType.DSP).compute_output_power.assert_not_called()
+    device.get_module(ModuleType.IO).compute_output_power.assert_called_once_with()
+    device.get_module(ModuleType.SOC_PERIPHERALS).compute_output_power.assert_called_once_with()
+
+def create_device_with_linear_static_power(base, slope):
+    device = create_device_with_mock_modules([])
+    def compute(temperature, scenario):
+        return StaticPowerResult(powers=[PowerValue(type='Vcc_core', value=base + slope * temperature)])
+    device.compute = MagicMock(side_effect=compute)
+    return device
+
+@pytest.mark.parametrize("secant", [False, True])
+def test_compute_power_junction_temperature_converges(secant):
+    device = create_device_with_linear_static_power(0.5, 0.01)
+    res = device.compute_power_junction_temperature(25.0, 10.0, 1.5, ScenarioType.WORSE, tolerance=1e-9, max_iterations=20, secant=secant)
+    expected = (25.0 + 10.0 * (0.5 + 1.5)) / (1 - 10.0 * 0.01)
+    assert res.converged
+    assert res.residual <= 1e-9
+    assert res.next_temperature == pytest.approx(expected)
+    assert res.iterations == device.compute.call_count
+    assert res.iterations < 20
+
+def test_compute_power_junction_temperature_secant_fewer_iterations():
+    fixed = create_device_with_linear_static_power(0.5, 0.05)
+    secant = create_device_with_linear_static_power(0.5, 0.05)
+    res1 = fixed.compute_power_junction_temperature(25.0, 10.0, 1.5, ScenarioType.TYPICAL, tolerance=1e-9, max_iterations=20, secant=False)
+    res2 = secant.compute_power_junction_temperature(25.0, 10.0, 1.5, ScenarioType.TYPICAL, tolerance=1e-9, max_iterations=20)
+    assert res2.next_temperature == pytest.approx(res1.next_temperature)
+    assert res2.iterations < res1.iterations
+
+def test_compute_power_junction_temperature_runaway():
+    device = create_device_with_linear_static_power(0.5, 0.2)
+    res = device.compute_power_junction_temperature(25.0, 10.0, 1.5, ScenarioType.WORSE, max_iterations=5, secant=False)
+    assert not res.converged
+    assert res.iterations == 5
+    assert res.residual > 1.0
+
+def test_publish_snapshot():
+    device = create_device_with_mock_modules([ModuleType.DSP])
+    version = device.get_snapshot().version
+    dsp = DSP(enable=True)
+    dsp.output.block_power = 1.0
+    device.get_module(ModuleType.DSP).get_all.return_value = [dsp]
+    device.get_module(ModuleType.DSP).get_power_consumption.return_value = (1.0, 2.0)
+
+    device.compute_output_power()
+    snapshot = device.get_snapshot()
+    dsp_snapshot = snapshot.get_module(ModuleType.DSP)
+    assert snapshot.version == version + 1
+    assert dsp_snapshot.version == snapshot.version
+    assert dsp_snapshot.get_power_consumption() == (1.0, 2.0)
+    assert dsp_snapshot.get_outputs()[0].block_power == 1.0
+    assert dsp_snapshot.get_outputs()[0].messages == ()
+    assert snapshot.get_power_consumption().total_power_temperature[0].power == \
+        device.get_power_consumption().total_power_temperature[0].power
+    with pytest.raises(FrozenInstanceError):
+        snapshot.version = 0
+
+    # detached from the live outputs
+    dsp.output.block_power = 2.0
+    device.get_power_consumption().fpga_complex.total_power = 1.0
+    assert dsp_snapshot.get_outputs()[0].block_power == 1.0
+    assert snapshot.get_power_consumption().fpga_complex.total_power == 0.0
+
+    # outputs of the modules not recomputed are shared with the previous snapshot
+    device.get_module(ModuleType.DSP).is_dirty.return_value = False
+    device.request_compute()
+    assert device.get_snapshot().version == snapshot.version + 1
+    assert device.get_snapshot().get_module(ModuleType.DSP) is dsp_snapshot
+    assert device.get_snapshot().get_module(ModuleType.IO) is snapshot.get_module(ModuleType.IO)
+
+def test_revision():
+    device = create_device_with_mock_modules([ModuleType.DSP])
+    assert device.get_revision() == 0
+    assert device.get_instance_id() != create_device_with_mock_modules([ModuleType.DSP]).get_instance_id()
+
+    device.request_compute(True)
+    assert device.get_revision() == 1
+    version = device.get_snapshot().version
+
+    # the snapshot only changes once computed
+    device.request_compute()
+    assert device.get_revision() == 2
+    assert device.get_snapshot().version == version + 1
+
+def test_compute_power_junction_temperature_default_iterations():
+    # at most 4 passes as before the tolerance, the secant step converges a linear static power within them
+    device = create_device_with_linear_static_power(0.5, 0.05)
+    res = device.compute_power_junction_temperature(25.0, 10.0, 1.5, ScenarioType.WORSE)
+    assert res.converged
+    assert res.iterations <= 4
+    assert res.next_temperature == pytest.approx((25.0 + 10.0 * (0.5 + 1.5)) / (1 - 10.0 * 0.05))
+
+def test_compute_static_power_specification():
+    device = create_device_with_linear_static_power(0.5, 0.05)
+    device.specification.thermal.tolerance = 1e-12
+    device.specification.thermal.max_iterations = 2
+    device.compute_static_power()
+    assert device.compute.call_count == 4
+    assert all(res.iterations == 2 and not res.converged for res in device.static_power_output)
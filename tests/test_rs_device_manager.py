@@ -36,6 +36,7 @@ def test_load_xml(device_manager):
 
 def test_direct_append(device_manager):
     mock_device = MagicMock(spec=RsDevice)
+    mock_device.id = 'device_1'
     device_manager.devices.append(mock_device)
     devices = device_manager.get_device_all()
     assert len(devices) == 1    
@@ -54,7 +55,9 @@ def test_get_device(device_manager):
 
 def test_clear_all_device_inputs(device_manager):
     mock_device1 = MagicMock(spec=RsDevice)
+    mock_device1.id = 'device_1'
     mock_device2 = MagicMock(spec=RsDevice)
+    mock_device2.id = 'device_2'
     device_manager.devices = [mock_device1, mock_device2]
 
     device_manager.clear_all_device_inputs()
@@ -67,7 +70,9 @@ def test_clear_all_device_inputs(device_manager):
 
 def test_get_device_all(device_manager):
     mock_device1 = MagicMock(spec=RsDevice)
+    mock_device1.id = 'device_1'
     mock_device2 = MagicMock(spec=RsDevice)
+    mock_device2.id = 'device_2'
     device_manager.devices = [mock_device1, mock_device2]
 
     all_devices = device_manager.get_device_all()
@@ -81,3 +86,64 @@ def test_no_duplicate_instance():
     device_manager2 = RsDeviceManager.get_instance()
     assert device_manager1 is device_manager2
     assert len(RsDeviceManager.get_instance().devices) == len(device_manager1.devices)
+
+def test_load_xml_lazy_device(device_manager):
+    res1 = MagicMock(series='Series_A')
+    res1.name = 'device_1'
+    res2 = MagicMock(series='Series_B')
+    res2.name = 'device_2'
+    with patch('submodule.rs_device_manager.parse_device_xml', return_value=DeviceList(devices=[res1, res2])), \
+            patch('submodule.rs_device_manager.RsDevice') as mock_rs_device:
+        mock_rs_device.side_effect = lambda res: MagicMock(id=res.name)
+        device_manager.load_xml('device.xml')
+
+        # no device is created until first access
+        mock_rs_device.assert_not_called()
+        assert [res1, res2] == device_manager.get_device_list()
+        assert [] == device_manager.get_created_devices()
+
+        device = device_manager.get_device('device_2')
+        assert 'device_2' == device.id
+        assert device is device_manager.get_device('device_2')
+        mock_rs_device.assert_called_once_with(res2)
+        assert [device] == device_manager.get_created_devices()
+
+        with pytest.raises(DeviceNotFoundException):
+            device_manager.get_device('device_3')
+
+        # the pending devices are listed without being created (e.g. project save)
+        assert [device] == device_manager.get_device_all()
+        assert [res1] == device_manager.get_pending_devices()
+        assert 1 == mock_rs_device.call_count
+
+        # created devices are listed in device list order
+        device_1 = device_manager.get_device('device_1')
+        assert [device_1, device] == device_manager.get_device_all()
+        assert [] == device_manager.get_pending_devices()
+
+def test_get_device_lock(device_manager):
+    mock_device = MagicMock(spec=RsDevice)
+    mock_device.id = 'device_1'
+    device_manager.devices = [mock_device]
+    device_manager.pending_devices = { 'device_2': MagicMock() }
+
+    lock = device_manager.get_device_lock('device_1')
+    assert device_manager.get_device_lock('device_1') is lock
+    assert device_manager.get_device_lock('device_2') is not lock
+    with pytest.raises(DeviceNotFoundException):
+        device_manager.get_device_lock('device_3')
+
+def test_lock_devices(device_manager):
+    mock_device = MagicMock(spec=RsDevice)
+    mock_device.id = 'device_1'
+    device_manager.devices = [mock_device]
+    device_manager.pending_devices = { 'device_2': MagicMock() }
+
+    with device_manager.lock_devices():
+        assert device_manager.get_device_lock('device_1').writer
+        assert device_manager.get_device_lock('device_2').writer
+    with device_manager.lock_devices(write=False):
+        assert device_manager.get_device_lock('device_1').readers == 1
+        assert device_manager.get_device_lock('device_2').readers == 1
+    assert not device_manager.get_device_lock('device_1').writer
+    assert device_manager.get_device_lock('device_2').readers == 0
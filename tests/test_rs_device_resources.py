@@ -80,9 +80,33 @@ def test_register_module(device_resources):
     assert device_resources.get_module(ModuleType.CLOCKING) == module
 
 def test_get_clock_not_found(device_resources):
-    device_resources.register_module(ModuleType.CLOCKING, MagicMock(get_all=MagicMock(return_value=[])))
+    device_resources.register_module(ModuleType.CLOCKING, MagicMock(get_clock_by_port=MagicMock(return_value=None)))
     assert device_resources.get_clock('non_existent_clock') is None
 
+def test_update_clock_consumers(device_resources):
+    fle_a = MagicMock(clock='clk_a')
+    fle_b = MagicMock(clock='clk_b')
+    bram = MagicMock(port_a=MagicMock(clock='clk_a'), port_b=MagicMock(clock='clk_a'))
+    fle_module = MagicMock(get_all=MagicMock(return_value=[fle_a, fle_b]))
+    device_resources.register_module(ModuleType.FABRIC_LE, fle_module)
+    device_resources.register_module(ModuleType.BRAM, MagicMock(get_all=MagicMock(return_value=[bram])))
+    device_resources.update_clock_consumers(ModuleType.FABRIC_LE)
+    device_resources.update_clock_consumers(ModuleType.BRAM)
+    assert device_resources.get_clock_consumers('clk_a', ModuleType.FABRIC_LE) == [fle_a]
+    assert device_resources.get_clock_consumers('clk_b', ModuleType.FABRIC_LE) == [fle_b]
+    assert device_resources.get_clock_consumers('clk_a', ModuleType.BRAM) == [bram, bram]
+    assert device_resources.get_clock_consumers('clk_c', ModuleType.DSP) == []
+
+    # re-index after fabric logic element module changed
+    fle_module.get_all.return_value = [fle_a]
+    device_resources.update_clock_consumers(ModuleType.FABRIC_LE)
+    assert device_resources.get_clock_consumers('clk_b', ModuleType.FABRIC_LE) == []
+    assert device_resources.get_clock_consumers('clk_a', ModuleType.BRAM) == [bram, bram]
+
+    # unregistered module
+    device_resources.update_clock_consumers(ModuleType.DSP)
+    assert device_resources.get_clock_consumers('clk_a', ModuleType.DSP) == []
+
 @pytest.mark.parametrize("method_name, element_type, coef_name, coef_value", [
     ("get_UART_CLK_FACTOR", ElementType.UART, "UART_CLK_FACTOR", 0.1234),
     ("get_UART_SWITCHING_FACTOR", ElementType.UART, "UART_SWITCHING_FACTOR", 0.4567),
@@ -0,0 +1,54 @@
+#
+#  Copyright (C) 2024 RapidSilicon
+#  Authorized use only
+#
+import pytest
+import logging
+from unittest.mock import patch
+from submodule.rs_logger import RsLogLevel, set_log_level, get_log_level, trace, trace_enabled, capture_trace
+
+@pytest.fixture
+def log_level():
+    level = get_log_level()
+    yield
+    set_log_level(level)
+
+@pytest.mark.parametrize("level, enabled", [
+    (RsLogLevel.DEBUG, True),
+    (RsLogLevel.INFO, False),
+    (RsLogLevel.ERROR, False),
+    (RsLogLevel.CRITICAL, False),
+])
+def test_trace_enabled(log_level, level, enabled):
+    set_log_level(level)
+    assert level == get_log_level()
+    assert enabled == trace_enabled()
+
+@pytest.mark.parametrize("level, expected", [
+    (logging.NOTSET, RsLogLevel.DEBUG),
+    (logging.DEBUG, RsLogLevel.DEBUG),
+    (15, RsLogLevel.INFO),
+    (logging.WARNING, RsLogLevel.WARNING),
+    (logging.CRITICAL, RsLogLevel.CRITICAL),
+    (60, RsLogLevel.CRITICAL),
+])
+def test_get_log_level(level, expected):
+    with patch.object(logging.getLogger("rs_logger"), 'getEffectiveLevel', return_value=level):
+        assert expected == get_log_level()
+
+def test_trace(log_level, caplog):
+    caplog.set_level(logging.DEBUG, logger="rs_logger")
+    trace('[TEST] 100% done')
+    set_log_level(RsLogLevel.INFO)
+    trace('[TEST] skipped')
+    assert ['[TEST] 100% done'] == [record.getMessage() for record in caplog.records]
+
+def test_capture_trace(log_level):
+    set_log_level(RsLogLevel.INFO)
+    trace('[TEST] before')
+    with capture_trace() as records:
+        assert trace_enabled()
+        trace('[TEST] captured')
+    trace('[TEST] after')
+    assert not trace_enabled()
+    assert ['[TEST] captured'] == records
@@ -2,7 +2,11 @@
 #  Copyright (C) 2024 RapidSilicon
 #  Authorized use only
 
-from unittest.mock import Mock
+from dataclasses import FrozenInstanceError
+from unittest.mock import Mock, patch
+import json
+import os
+import numpy as np
 import pytest
 from submodule.rs_power_config import (
     RsPowerConfig,
@@ -12,7 +16,9 @@ from submodule.rs_power_config import (
     PowerConfigFileNotFoundException, 
     PowerConfigParsingException, 
     PowerConfigSchemaValidationException, 
-    PowerConfigComponentNotFoundException
+    PowerConfigComponentNotFoundException,
+    PowerConfigNotAvailable,
+    RsStaticPowerTable
 )
 
 def test_not_loaded():
@@ -63,4 +69,162 @@ def test_get_polynomial_coeff():
     assert True == isinstance(polynomials[0][1], list)
     assert 1 == len(polynomials[0][1])
     assert 54321.1 == polynomials[0][1][0].factor
-    assert [0.1, 0.2, 0.3, 0.4, 0.5] == polynomials[0][1][0].coeffs
+    assert (0.1, 0.2, 0.3, 0.4, 0.5) == polynomials[0][1][0].coeffs
+
+def test_get_static_power_table_not_loaded():
+    with pytest.raises(PowerConfigNotAvailable):
+        RsPowerConfig().get_static_power_table(ElementType.DSP, ScenarioType.TYPICAL)
+
+def test_get_static_power_table_with_not_exist_component():
+    pwrcfg = RsPowerConfig()
+    pwrcfg.load('tests/data/power_config.json')
+    with pytest.raises(PowerConfigComponentNotFoundException):
+        pwrcfg.get_static_power_table(ElementType.FABRIC_LE, ScenarioType.TYPICAL)
+
+@pytest.mark.parametrize("scenario", [ScenarioType.TYPICAL, ScenarioType.WORSE])
+def test_get_static_power_table(scenario):
+    pwrcfg = RsPowerConfig()
+    pwrcfg.load('tests/data/power_config.json')
+    table = pwrcfg.get_static_power_table(ElementType.DSP, scenario)
+    polynomials = pwrcfg.get_polynomial(ElementType.DSP, scenario)
+    assert tuple(rail_type for rail_type, _ in polynomials) == table.rail_types
+    for temperature in (-40.0, 25.0, 100.0):
+        expected = [sum([np.polyval(s.coeffs, temperature) * s.factor * 3 for s in scene_list]) for _, scene_list in polynomials]
+        assert expected == list(table.compute(temperature, 3))
+
+def test_static_power_table_multiple_temperatures():
+    table = RsStaticPowerTable(rail_types=['A', 'B'], rail_index=np.array([0, 0, 1]), \
+        coeffs=np.array([[0.0, 1.0, 2.0], [1.0, 0.0, 0.0], [0.0, 0.0, 4.0]]), factors=np.array([1.0, 2.0, 0.5]))
+    powers = table.compute(np.array([0.0, 1.0, 2.0]), [10.0, 1.0])
+    assert (2, 3) == powers.shape
+    assert [20.0, 50.0, 120.0] == list(powers[0])
+    assert [2.0, 2.0, 2.0] == list(powers[1])
+
+def test_get_coeff_average(tmp_path):
+    filepath = tmp_path / 'power_config.json'
+    filepath.write_text(json.dumps({'components': [
+        {'type': 'dsp', 'coeffs': [{'name': 'A', 'value': 0.1}, {'name': 'B', 'value': 2.0}, {'name': 'A', 'value': 0.2}]},
+        {'type': 'dsp', 'coeffs': [{'name': 'C', 'value': 3.0}]}
+    ]}))
+    pwrcfg = RsPowerConfig()
+    pwrcfg.load(str(filepath))
+    assert (0.1 + 0.2) / 2 == pwrcfg.get_coeff(ElementType.DSP, 'A')
+    assert 2.0 == pwrcfg.get_coeff(ElementType.DSP, 'B')
+    with pytest.raises(PowerConfigCoeffNotFoundException):
+        pwrcfg.get_coeff(ElementType.DSP, 'C')
+
+def test_get_polynomial_rail_type():
+    pwrcfg = RsPowerConfig()
+    pwrcfg.load('tests/data/power_config.json')
+    assert 1 == len(pwrcfg.get_polynomial(ElementType.DSP, rail_type='Vcc_core (DSP)')[0][1])
+    assert [('Vcc_core (DSP)', [])] == pwrcfg.get_polynomial(ElementType.DSP, ScenarioType.WORSE, 'Vcc_core (DSP)')
+    assert [] == pwrcfg.get_polynomial(ElementType.DSP, ScenarioType.TYPICAL, 'ABC')
+    with pytest.raises(PowerConfigComponentNotFoundException):
+        pwrcfg.get_polynomial(ElementType.BRAM, ScenarioType.TYPICAL)
+
+def write_power_config(path, value):
+    (path / 'power_config.json').write_text(json.dumps({'components': [{'$ref': 'dsp.json'}]}))
+    (path / 'dsp.json').write_text(json.dumps({'type': 'dsp', 'coeffs': [{'name': 'A', 'value': value}]}))
+    return str(path / 'power_config.json')
+
+def test_load_shared_cache(tmp_path):
+    filepath = write_power_config(tmp_path, 0.5)
+    pwrcfg1 = RsPowerConfig()
+    pwrcfg1.load(filepath)
+    pwrcfg2 = RsPowerConfig()
+    with patch('submodule.rs_power_config.RsPowerConfigDataSchema') as mock_schema:
+        pwrcfg2.load(filepath)
+        mock_schema.assert_not_called()
+    assert pwrcfg1.data is pwrcfg2.data
+    assert pwrcfg1.get_component(ElementType.DSP) is pwrcfg2.get_component(ElementType.DSP)
+    assert pwrcfg1.get_static_power_table(ElementType.DSP, ScenarioType.TYPICAL) is pwrcfg2.get_static_power_table(ElementType.DSP, ScenarioType.TYPICAL)
+    assert 0.5 == pwrcfg2.get_coeff(ElementType.DSP, 'A')
+
+def test_load_shared_cache_read_only(tmp_path):
+    pwrcfg = RsPowerConfig()
+    pwrcfg.load(write_power_config(tmp_path, 0.5))
+    with pytest.raises(FrozenInstanceError):
+        pwrcfg.get_component(ElementType.DSP).coeffs[0].value = 0.75
+    with pytest.raises(AttributeError):
+        pwrcfg.data.components[0].coeffs.append(None)
+    with pytest.raises(TypeError):
+        pwrcfg.coeffs[(ElementType.DSP, 'A')] = 0.75
+    assert 0.5 == pwrcfg.get_coeff(ElementType.DSP, 'A')
+
+def test_load_shared_cache_ref_modified(tmp_path):
+    filepath = write_power_config(tmp_path, 0.5)
+    pwrcfg1 = RsPowerConfig()
+    pwrcfg1.load(filepath)
+    (tmp_path / 'dsp.json').write_text(json.dumps({'type': 'dsp', 'coeffs': [{'name': 'A', 'value': 0.75}]}))
+    pwrcfg2 = RsPowerConfig()
+    pwrcfg2.load(filepath)
+    assert pwrcfg1.data is not pwrcfg2.data
+    assert 0.5 == pwrcfg1.get_coeff(ElementType.DSP, 'A')
+    assert 0.75 == pwrcfg2.get_coeff(ElementType.DSP, 'A')
+
+@pytest.fixture
+def snapshot_dir(tmp_path):
+    RsPowerConfig.snapshot_dir = str(tmp_path / 'cache')
+    RsPowerConfig.clear_cache()
+    yield tmp_path / 'cache'
+    RsPowerConfig.snapshot_dir = None
+    RsPowerConfig.clear_cache()
+
+def test_load_snapshot(tmp_path, snapshot_dir):
+    filepath = write_power_config(tmp_path, 0.5)
+    RsPowerConfig().load(filepath)
+    assert 1 == len(list(snapshot_dir.glob('*.pickle')))
+    RsPowerConfig.clear_cache()
+    pwrcfg = RsPowerConfig()
+    with patch('submodule.rs_power_config.RsPowerConfigDataSchema') as mock_schema:
+        pwrcfg.load(filepath)
+        mock_schema.assert_not_called()
+    assert 0.5 == pwrcfg.get_coeff(ElementType.DSP, 'A')
+    assert False == pwrcfg.get_static_power_table(ElementType.DSP, ScenarioType.TYPICAL).coeffs.flags.writeable
+
+def test_load_snapshot_ref_modified(tmp_path, snapshot_dir):
+    filepath = write_power_config(tmp_path, 0.5)
+    RsPowerConfig().load(filepath)
+    RsPowerConfig.clear_cache()
+    (tmp_path / 'dsp.json').write_text(json.dumps({'type': 'dsp', 'coeffs': [{'name': 'A', 'value': 0.75}]}))
+    pwrcfg = RsPowerConfig()
+    pwrcfg.load(filepath)
+    assert 0.75 == pwrcfg.get_coeff(ElementType.DSP, 'A')
+
+def test_load_snapshot_corrupted(tmp_path, snapshot_dir):
+    filepath = write_power_config(tmp_path, 0.5)
+    RsPowerConfig().load(filepath)
+    RsPowerConfig.clear_cache()
+    for snapshot in snapshot_dir.glob('*.pickle'):
+        snapshot.write_bytes(b'corrupted')
+    pwrcfg = RsPowerConfig()
+    with patch('submodule.rs_power_config.log') as mock_log:
+        pwrcfg.load(filepath)
+        assert 'Failed to read' in mock_log.call_args_list[0].args[0]
+    assert 0.5 == pwrcfg.get_coeff(ElementType.DSP, 'A')
+
+def test_load_snapshot_version(tmp_path, snapshot_dir):
+    filepath = write_power_config(tmp_path, 0.5)
+    RsPowerConfig().load(filepath)
+    RsPowerConfig.clear_cache()
+    with patch.object(RsPowerConfig, 'SNAPSHOT_VERSION', 'other'), patch('submodule.rs_power_config.log') as mock_log:
+        pwrcfg = RsPowerConfig()
+        pwrcfg.load(filepath)
+        assert 'another version' in mock_log.call_args_list[0].args[0]
+    assert 0.5 == pwrcfg.get_coeff(ElementType.DSP, 'A')
+
+@pytest.mark.skipif(not hasattr(os, 'getuid'), reason="posix permissions")
+def test_load_snapshot_private(tmp_path, snapshot_dir):
+    filepath = write_power_config(tmp_path, 0.5)
+    RsPowerConfig().load(filepath)
+    assert 0o700 == snapshot_dir.stat().st_mode & 0o777
+    assert all(0o600 == snapshot.stat().st_mode & 0o777 for snapshot in snapshot_dir.glob('*.pickle'))
+
+    # not reused once other users can write to the directory
+    RsPowerConfig.clear_cache()
+    snapshot_dir.chmod(0o777)
+    with patch('submodule.rs_power_config.log') as mock_log, \
+            patch('submodule.rs_power_config.pickle.load') as mock_load:
+        RsPowerConfig().load(filepath)
+        mock_load.assert_not_called()
+        assert 'accessible to other users' in mock_log.call_args_list[0].args[0]
@@ -10,6 +10,7 @@ from datetime import datetime
 from submodule.rs_project import RsProjectManager, RsProject, RsProjectState, ProjectNotLoadedException
 from submodule.rs_device_resources import DeviceNotFoundException
 from submodule.rs_device_manager import RsDeviceManager
+from submodule.rs_device import Specification
 
 @pytest.fixture
 def rs_project_manager():
@@ -148,6 +149,30 @@ def test_save_project(rs_project_manager, tmp_path):
         expected_filepath = str(project.filepath)
         mock_write_file.assert_called_once_with(project, tmp_path / "project_save.json")
 
+def test_write_file_pending_devices(rs_project_manager, tmp_path):
+    res1 = MagicMock()
+    res1.name = 'device_1'
+    res2 = MagicMock()
+    res2.name = 'device_2'
+    device = MagicMock(id='device_2', specification=Specification())
+    device.get_module.return_value.get_all.return_value = []
+    device.get_module.return_value.get_features.return_value = []
+    device.get_module.return_value.get_peripherals.return_value = []
+    mock_device_manager = MagicMock(spec=RsDeviceManager)
+    mock_device_manager.get_device_list.return_value = [res1, res2]
+    mock_device_manager.get_pending_devices.return_value = [res1]
+    mock_device_manager.get_device_all.return_value = [device]
+
+    with patch('submodule.rs_project.RsDeviceManager.get_instance', return_value=mock_device_manager):
+        rs_project_manager.write_file(rs_project_manager.get(), tmp_path / "project.json")
+
+    # the pending device is saved with its defaults in device list order without being created
+    with open(tmp_path / "project.json") as fd:
+        devices = json.load(fd)['devices']
+    assert ['device_1', 'device_2'] == [data['name'] for data in devices]
+    assert devices[0] == devices[1] | { 'name': 'device_1' }
+    mock_device_manager.get_device.assert_not_called()
+
 def test_close_project(rs_project_manager):
     rs_project_manager.close()
     project = rs_project_manager.get()